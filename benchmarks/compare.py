@@ -0,0 +1,52 @@
+"""
+Compara dos archivos de resultados de benchmarks/run.py.
+
+Informa, para cada caso y tamaño presente en ambos archivos, la razón entre el tiempo
+mínimo actual y el de referencia. Sale con código 1 si algún caso es más lento que la
+referencia por encima del umbral indicado.
+
+Uso:
+    python -m benchmarks.compare referencia.json actual.json [--threshold 1.2]
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("meta", {}), {(r["name"], r["size"]): r for r in data["results"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmarks")
+    parser.add_argument("baseline", help="Resultados de referencia")
+    parser.add_argument("current", help="Resultados actuales")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Razón actual/referencia a partir de la cual se considera regresión")
+    args = parser.parse_args(argv)
+
+    meta_base, base = load_results(args.baseline)
+    meta_cur, cur = load_results(args.current)
+    print(f"Referencia: {meta_base.get('commit')}  Actual: {meta_cur.get('commit')}\n")
+
+    regresiones = []
+    for key in sorted(set(base) & set(cur)):
+        antes = base[key]["min_s"]
+        ahora = cur[key]["min_s"]
+        razon = ahora / antes if antes > 0 else float("inf")
+        marca = ""
+        if razon > args.threshold:
+            marca = "  <-- REGRESIÓN"
+            regresiones.append(key)
+        print(f"{key[0]:<40} {key[1]:<14} {antes:10.4f} s -> {ahora:10.4f} s  x{razon:5.2f}{marca}")
+
+    if regresiones:
+        print(f"\n{len(regresiones)} caso(s) superan el umbral x{args.threshold}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Benchmarks de las funciones principales de la suite sobre matrices sintéticas.
+
+Cubre la carga de archivos (load_file / load_nmr_data), calculate_integral, todos los
+métodos de transform / normalize / scale, save_processed_data y la cuantificación de
+qNMR. Los resultados se guardan en JSON para comparar entre commits con
+benchmarks/compare.py.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.run --sizes 50x16000,200x32000 --output resultados.json
+"""
+from pathlib import Path
+import subprocess
+import tempfile
+import argparse
+import platform
+import datetime
+import time
+import json
+import sys
+import os
+import numpy as np
+
+from benchmarks.synthetic import generate_matrix, write_matrix_csv
+from src.suite.core.handler import load_nmr_data, save_processed_data
+from src.suite.core.processor import RMNProcessor
+from src.suite.core.trnsf import transform
+from src.suite.core.norm import normalize
+from src.suite.core.scaling import scale
+from src.suite.core import quant
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TRANSFORM_METHODS = ["none", "log", "glog", "sqrt"]
+NORM_METHODS = ["total_area", "pqn", "vector", "internal_standard"]
+SCALE_METHODS = ["auto", "pareto", "range", "center"]
+
+
+def time_call(func, repeat):
+    """Ejecuta func `repeat` veces y devuelve la lista de tiempos (s)"""
+    tiempos = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        tiempos.append(time.perf_counter() - t0)
+    return tiempos
+
+
+def parse_sizes(text):
+    """Convierte '50x16000,200x32000' en [(50, 16000), (200, 32000)]"""
+    sizes = []
+    for item in text.split(","):
+        n_samples, n_points = item.lower().split("x")
+        sizes.append((int(n_samples), int(n_points)))
+    return sizes
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_cases(ppm, X, names, csv_path, out_path, n_regions):
+    """Devuelve la lista de casos (nombre, función) para una matriz"""
+    cases = [
+        ("load_nmr_data", lambda: load_nmr_data(csv_path)),
+        ("RMNProcessor.load_file", lambda: RMNProcessor().load_file(csv_path)),
+    ]
+
+    # Integración: regiones equiespaciadas sobre todo el eje
+    processor = RMNProcessor()
+    processor.load_arrays(ppm, X, names)
+    bordes = np.linspace(0, len(ppm) - 1, n_regions + 1).astype(int)
+    regiones = list(zip(bordes[:-1], bordes[1:] - 1))
+
+    def integrar():
+        processor.integrales_df = None
+        processor.regiones = []
+        for x1, x2 in regiones:
+            processor.calculate_integral(x1, x2)
+
+    cases.append((f"calculate_integral[{n_regions} regiones]", integrar))
+
+    Xpos = np.abs(X)
+    for method in TRANSFORM_METHODS:
+        cases.append((f"transform[{method}]", lambda m=method: transform(Xpos, method=m)))
+
+    for method in NORM_METHODS:
+        kwargs = {"ppm_min": -0.05, "ppm_max": 0.05} if method == "internal_standard" else {}
+        cases.append((f"normalize[{method}]",
+                      lambda m=method, kw=kwargs: normalize(X, method=m, ppm=ppm, **kw)))
+
+    for method in SCALE_METHODS:
+        cases.append((f"scale[{method}]", lambda m=method: scale(X, method=m)))
+
+    cases.append(("save_processed_data",
+                  lambda: save_processed_data(out_path, ppm, X, names)))
+
+    # Cuantificación qNMR: K por muestra con estándar interno y concentraciones
+    def cuantificar():
+        k = quant.internal_k_factors(ppm, X, -0.05, 0.05, concentration=1.0, protons=9)
+        integrales = processor.get_integrales().values
+        quant.quantify(integrales, np.ones(integrales.shape[1]), k)
+
+    cases.append(("qnmr.quantify[estandar interno]", cuantificar))
+
+    return cases
+
+
+def run(sizes, repeat, n_regions, seed, only=None):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_samples, n_points in sizes:
+            ppm, X, names = generate_matrix(n_samples, n_points, seed=seed)
+            csv_path = os.path.join(tmp, f"sintetico_{n_samples}x{n_points}.csv")
+            out_path = os.path.join(tmp, "salida.csv")
+            write_matrix_csv(csv_path, ppm, X, names)
+
+            for name, func in build_cases(ppm, X, names, csv_path, out_path, n_regions):
+                if only and only not in name:
+                    continue
+                tiempos = time_call(func, repeat)
+                results.append({
+                    "name": name,
+                    "size": f"{n_samples}x{n_points}",
+                    "n_samples": n_samples,
+                    "n_points": n_points,
+                    "times_s": tiempos,
+                    "min_s": min(tiempos),
+                    "median_s": float(np.median(tiempos)),
+                })
+                print(f"{name:<40} {n_samples:>6}x{n_points:<7} {min(tiempos):10.4f} s", flush=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de ISQ Suite")
+    parser.add_argument("--sizes", default="50x16000,200x32000",
+                        help="Tamaños muestras x puntos separados por coma (p. ej. 50x16000,200x32000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por caso")
+    parser.add_argument("--regions", type=int, default=50, help="Número de regiones de integración")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador sintético")
+    parser.add_argument("--only", help="Ejecutar solo los casos cuyo nombre contenga este texto")
+    parser.add_argument("--output", default="bench_results.json", help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    results = run(parse_sizes(args.sizes), args.repeat, args.regions, args.seed, args.only)
+
+    salida = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "regions": args.regions,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(salida, f, indent=2)
+    print(f"\nResultados guardados en: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Benchmark de arranque de las aplicaciones de la suite.
+
+Mide, para cada punto de entrada (maini, mains, mainq y launcher.run):
+- el tiempo hasta la primera ventana (desde que se lanza el intérprete hasta que
+  la ventana principal se dibuja por primera vez),
+- el tiempo de importación de cada módulo de interfaz (python -X importtime),
+- qué módulos pesados ya estaban importados cuando apareció la ventana.
+
+Falla (código de salida 1) si se supera alguno de los presupuestos definidos en
+startup_budget.json o si un módulo pesado se importa antes de mostrar la ventana.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.startup [--budget archivo.json] [--output resultados.json]
+"""
+from pathlib import Path
+import subprocess
+import argparse
+import json
+import time
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET = Path(__file__).resolve().parent / "startup_budget.json"
+
+ENTRY_POINTS = {
+    "maini": ("src.suite.apps.inmr.maini", "main"),
+    "mains": ("src.suite.apps.snmr.mains", "main"),
+    "mainq": ("src.suite.apps.qnmr.mainq", "main"),
+    "launcher": ("src.suite.launcher", "run"),
+}
+
+# Código que corre en el proceso hijo: reemplaza mainloop para que, tras dibujar la
+# primera ventana, informe el instante y los módulos cargados y luego cierre todo.
+CHILD_CODE = """
+import importlib, json, sys, time, tkinter
+
+def _first_window(self, n=0):
+    self.update()
+    print("@@STARTUP@@" + json.dumps({{
+        "t_window": time.time(),
+        "modules": sorted(m for m in {heavy!r} if m in sys.modules),
+    }}), flush=True)
+    self.destroy()
+
+tkinter.Misc.mainloop = _first_window
+getattr(importlib.import_module({module!r}), {func!r})()
+"""
+
+
+def measure_first_window(name, heavy_modules):
+    """Lanza un punto de entrada en un proceso nuevo y mide el tiempo hasta su primera ventana"""
+    module, func = ENTRY_POINTS[name]
+    code = CHILD_CODE.format(module=module, func=func, heavy=list(heavy_modules))
+
+    t_start = time.time()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@STARTUP@@"):
+            info = json.loads(line[len("@@STARTUP@@"):])
+            return info["t_window"] - t_start, info["modules"]
+
+    raise RuntimeError(f"{name} no llegó a mostrar su ventana:\n{proc.stderr.strip()}")
+
+
+def measure_import_time(module):
+    """Devuelve el tiempo acumulado de importación (s) de un módulo usando -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{proc.stderr.strip()}")
+
+    # Formato: "import time: self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6
+
+    raise RuntimeError(f"No se encontró {module} en la salida de -X importtime")
+
+
+def run(budget):
+    """Ejecuta todas las mediciones y devuelve (resultados, lista de fallas)"""
+    repeat = int(budget.get("repeat", 1))
+    heavy = budget.get("heavy_modules", [])
+    results = {"time_to_first_window_s": {}, "import_time_s": {}, "heavy_before_window": {}}
+    failures = []
+
+    for name, limit in budget.get("time_to_first_window_s", {}).items():
+        times = []
+        loaded = []
+        for _ in range(repeat):
+            elapsed, loaded = measure_first_window(name, heavy)
+            times.append(elapsed)
+        best = min(times)
+        results["time_to_first_window_s"][name] = best
+        results["heavy_before_window"][name] = loaded
+        if best > limit:
+            failures.append(f"{name}: primera ventana en {best:.3f} s (presupuesto {limit:.3f} s)")
+        if loaded:
+            failures.append(f"{name}: módulos pesados importados antes de la ventana: {', '.join(loaded)}")
+
+    for module, limit in budget.get("import_time_s", {}).items():
+        best = min(measure_import_time(module) for _ in range(repeat))
+        results["import_time_s"][module] = best
+        if best > limit:
+            failures.append(f"{module}: importación en {best:.3f} s (presupuesto {limit:.3f} s)")
+
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de ISQ Suite")
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET), help="Archivo JSON con los presupuestos")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args(argv)
+
+    with open(args.budget, encoding="utf-8") as f:
+        budget = json.load(f)
+
+    results, failures = run(budget)
+
+    print("Tiempo hasta la primera ventana:")
+    for name, value in results["time_to_first_window_s"].items():
+        print(f"  {name:<10} {value:8.3f} s")
+    print("Tiempo de importación:")
+    for module, value in results["import_time_s"].items():
+        print(f"  {module:<25} {value:8.3f} s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "failures": failures}, f, indent=2)
+
+    if failures:
+        print("\nPresupuesto excedido:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Generador de matrices sintéticas de espectros de RMN para benchmarks.
+
+Cada espectro es una suma de picos lorentzianos (con concentraciones que varían entre
+muestras), más ruido gaussiano, deriva de línea base y un pequeño corrimiento químico
+aleatorio por muestra y por pico. Incluye un pico de referencia (TSP/DSS) en 0 ppm.
+"""
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+def generate_matrix(
+        n_samples: int,
+        n_points: int,
+        n_peaks: int = 60,
+        ppm_range: Tuple[float, float] = (10.0, -0.5),
+        noise: float = 0.002,
+        drift: float = 0.02,
+        jitter: float = 0.003,
+        seed: Optional[int] = 0
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Genera una matriz sintética de espectros.
+
+    Parámetros:
+    n_samples -- Número de muestras (filas)
+    n_points -- Número de puntos ppm (columnas)
+    n_peaks -- Número de picos lorentzianos (sin contar la referencia)
+    ppm_range -- Límites del eje ppm (inicio, fin); por convención el eje es decreciente
+    noise -- Desviación estándar del ruido, relativa a la altura máxima
+    drift -- Amplitud de la deriva de línea base, relativa a la altura máxima
+    jitter -- Desviación estándar del corrimiento químico por muestra y pico (ppm)
+    seed -- Semilla del generador aleatorio
+
+    Retorna:
+    ppm -- Vector de desplazamientos químicos
+    data -- Matriz de espectros (muestras x puntos ppm)
+    sample_names -- Lista de nombres de muestras
+    """
+    rng = np.random.default_rng(seed)
+    ppm = np.linspace(ppm_range[0], ppm_range[1], n_points)
+    lo, hi = min(ppm_range), max(ppm_range)
+
+    # Picos: posición, semiancho (HWHM) y altura de base
+    centros = rng.uniform(lo + 0.5, hi - 0.5, n_peaks)
+    anchos = rng.uniform(0.001, 0.008, n_peaks)
+    alturas = rng.lognormal(mean=0.0, sigma=1.0, size=n_peaks)
+
+    # Variación biológica por muestra y pico, y dilución global por muestra
+    concentraciones = rng.lognormal(mean=0.0, sigma=0.3, size=(n_samples, n_peaks))
+    dilucion = rng.lognormal(mean=0.0, sigma=0.2, size=n_samples)
+
+    data = np.zeros((n_samples, n_points))
+    for j in range(n_peaks):
+        desplazado = centros[j] + rng.normal(0.0, jitter, n_samples)
+        amplitud = alturas[j] * concentraciones[:, j] * dilucion
+        data += amplitud[:, None] / (1.0 + ((ppm[None, :] - desplazado[:, None]) / anchos[j]) ** 2)
+
+    # Referencia en 0 ppm con concentración fija (estándar interno)
+    referencia = rng.normal(0.0, jitter / 3, n_samples)
+    data += 1.0 / (1.0 + ((ppm[None, :] - referencia[:, None]) / 0.002) ** 2)
+
+    escala = data.max()
+
+    # Deriva de línea base: polinomio de grado 2 con coeficientes por muestra
+    t = np.linspace(-1.0, 1.0, n_points)
+    coeficientes = rng.normal(0.0, drift * escala, size=(n_samples, 3))
+    data += coeficientes[:, [0]] + coeficientes[:, [1]] * t + coeficientes[:, [2]] * t ** 2
+
+    data += rng.normal(0.0, noise * escala, size=data.shape)
+
+    sample_names = [f"muestra_{i + 1:05d}" for i in range(n_samples)]
+    return ppm, data, sample_names
+
+
+def write_matrix_csv(path: str, ppm: np.ndarray, data: np.ndarray, sample_names: List[str]) -> None:
+    """
+    Escribe la matriz con la estructura de entrada de la suite: primera fila con los
+    nombres de muestra, primera columna con los valores ppm.
+    """
+    df = pd.DataFrame(data.T, columns=sample_names)
+    df.insert(0, "", ppm)
+    df.to_csv(path, index=False)
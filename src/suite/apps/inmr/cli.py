@@ -0,0 +1,52 @@
+"""
+Integración por lotes de iNMR sin interfaz gráfica.
+
+Aplica una plantilla de regiones a varios archivos de espectros (un proceso por archivo)
+y guarda una sola tabla con una fila por muestra: archivo, muestra y una columna por
+región de la plantilla.
+
+Uso (desde la raíz del repositorio):
+    python -m src.suite.apps.inmr.cli plantilla.csv integrales.csv lote1.csv lote2.csv \\
+        --procesos 8 --regla simpson
+"""
+import argparse
+import sys
+from src.suite.core import templates
+from src.suite.core.integration import RULES
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Integración por lotes con una plantilla de regiones (iNMR)")
+    parser.add_argument("plantilla", help="Plantilla de regiones (CSV)")
+    parser.add_argument("salida", help="Archivo CSV con la tabla de integrales")
+    parser.add_argument("archivos", nargs="+", help="Archivos de espectros (CSV o TXT)")
+    parser.add_argument("--procesos", type=int, help="Número de procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--por-protones", action="store_true",
+                        help="Dividir cada integral por el número de protones de su región")
+    parser.add_argument("--regla", choices=RULES, default="suma",
+                        help="Regla de integración: suma de puntos o trapecios/Simpson escalados por Δppm")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        plantilla = templates.read_template(args.plantilla)
+        tabla, errores = templates.batch_integrate(args.archivos, plantilla, args.procesos, args.regla)
+        for archivo, error in errores.items():
+            print(f"Error en {archivo}: {error}", file=sys.stderr)
+
+        if args.por_protones:
+            for nombre, protones in zip(plantilla["nombre"], plantilla["protones"]):
+                tabla[nombre] = tabla[nombre] / protones
+        tabla.to_csv(args.salida, index=False)
+        print(f"{len(tabla)} muestras de {len(args.archivos) - len(errores)} archivos integradas "
+              f"en {len(plantilla)} regiones")
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Procesamiento de sNMR por línea de comandos, sin interfaz gráfica.
+
+Aplica las mismas etapas que la aplicación (línea base, transformación, control de
+calidad, normalización y escalado) y guarda la matriz procesada en CSV. El informe del
+control de calidad se imprime por pantalla y, opcionalmente, se guarda en CSV.
+
+Uso (desde la raíz del repositorio):
+    python -m src.suite.apps.snmr.cli entrada.csv salida.csv --normalizacion pqn \\
+        --escalado pareto --qc excluir --informe-qc informe.csv
+"""
+import argparse
+import sys
+import numpy as np
+from src.suite.core import handler, pipeline, qc as quality
+from src.suite.core.exclusions import parse_exclusions
+
+NORM_METHODS = {"area_total": "total_area", "pqn": "pqn", "vector": "vector", "estandar_interno": "internal_standard"}
+SCALE_METHODS = {"auto": "auto", "pareto": "pareto", "rango": "range", "centrado": "center"}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Procesamiento de espectros de RMN (sNMR)")
+    parser.add_argument("entrada", help="Archivo CSV de espectros")
+    parser.add_argument("salida", help="Archivo CSV de salida")
+    parser.add_argument("--linea-base", choices=["als", "arpls"], help="Corrección de línea base")
+    parser.add_argument("--lam", type=float, default=1e5, help="Suavidad de la línea base (λ)")
+    parser.add_argument("--p", type=float, default=0.01, help="Asimetría de ALS")
+    parser.add_argument("--transformacion", choices=["log", "glog"], help="Transformación")
+    parser.add_argument("--glog-lambda", type=float, default=1.0, help="λ de la transformación glog")
+    parser.add_argument("--qc", choices=["marcar", "excluir"],
+                        help="Control de calidad: marcar o excluir las muestras atípicas")
+    parser.add_argument("--qc-componentes", type=int, default=2, help="Componentes de la PCA del control de calidad")
+    parser.add_argument("--qc-confianza", type=float, default=0.99, help="Nivel de confianza de los límites T² y DModX")
+    parser.add_argument("--informe-qc", help="Archivo CSV donde guardar el informe del control de calidad")
+    parser.add_argument("--normalizacion", choices=list(NORM_METHODS), help="Normalización")
+    parser.add_argument("--ref-ppm", type=float, nargs=2, metavar=("MIN", "MAX"),
+                        help="Región del estándar interno (normalización estandar_interno)")
+    parser.add_argument("--excluir", default="", metavar="REGIONES",
+                        help="Regiones fuera del área total (normalización area_total), p. ej. \"4.70 - 4.90; -0.1 - 0.1\"")
+    parser.add_argument("--escalado", choices=list(SCALE_METHODS), help="Escalado")
+    return parser
+
+
+def build_config(args) -> dict:
+    """Traduce los argumentos a la configuración de pipeline.run_pipeline"""
+    config = {}
+    if args.linea_base:
+        params = {"lam": args.lam}
+        if args.linea_base == "als":
+            params["p"] = args.p
+        config["linea_base"] = (args.linea_base, params)
+    if args.transformacion:
+        params = {"lambda_val": args.glog_lambda} if args.transformacion == "glog" else {}
+        config["transformacion"] = (args.transformacion, params)
+    if args.qc:
+        config["control_calidad"] = (args.qc, {"n_components": args.qc_componentes,
+                                               "confidence": args.qc_confianza})
+    if args.normalizacion:
+        params = {}
+        if args.normalizacion == "estandar_interno":
+            if not args.ref_ppm:
+                raise ValueError("La normalización por estándar interno requiere --ref-ppm")
+            params = {"ppm_min": args.ref_ppm[0], "ppm_max": args.ref_ppm[1]}
+        elif args.normalizacion == "area_total":
+            params = {"scale_to": 100.0, "exclusiones": parse_exclusions(args.excluir)}
+        config["normalizacion"] = (NORM_METHODS[args.normalizacion], params)
+    if args.escalado:
+        params = {"feature_range": (0, 1)} if args.escalado == "rango" else {}
+        config["escalado"] = (SCALE_METHODS[args.escalado], params)
+    return config
+
+
+def print_qc_report(informe: dict, sample_names) -> None:
+    atipicas = np.flatnonzero(informe["atipicas"])
+    print(f"Control de calidad: límite T² = {informe['t2_lim']:.3f}, límite DModX = {informe['dmodx_lim']:.3f}")
+    print(f"{len(atipicas)} de {len(sample_names)} muestras atípicas")
+    for i in atipicas:
+        print(f"  {sample_names[i]}: T² = {informe['t2'][i]:.3f}, DModX = {informe['dmodx'][i]:.3f}")
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        ppm, data, sample_names = handler.load_nmr_data(args.entrada)
+        handler.validate_nmr_data(ppm, data, sample_names)
+        data = np.nan_to_num(data, nan=0.0)
+
+        informe = {}
+        procesada = pipeline.run_pipeline(data, ppm, build_config(args), informe)
+        qc = informe.get("control_calidad")
+        if qc is not None:
+            print_qc_report(qc, sample_names)
+            if args.informe_qc:
+                quality.report_table(qc, sample_names).to_csv(args.informe_qc, index=False)
+            sample_names = [sample_names[i] for i in qc["conservadas"]]
+
+        handler.save_processed_data(args.salida, ppm, procesada, sample_names)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
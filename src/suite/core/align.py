@@ -0,0 +1,152 @@
+"""
+Alineamiento de espectros por intervalos (al estilo icoshift).
+
+El espectro se divide en intervalos y, en cada uno, todas las muestras se desplazan un
+número entero de puntos para maximizar su correlación cruzada con un espectro objetivo
+(media o mediana). La correlación se calcula con FFT para todas las muestras del bloque
+a la vez; los bloques de muestras se reparten entre procesos.
+"""
+from typing import List, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.suite.core.instrument import instrumented
+from src.suite.core.parallel import map_row_blocks
+
+Interval = Tuple[int, int]
+
+
+def make_intervals(n_points: int, n_intervals: int = 1) -> List[Interval]:
+    """
+    Divide el eje en n_intervals intervalos contiguos de igual largo.
+
+    Retorna:
+    Lista de pares (inicio, fin) de índices, con fin exclusivo
+    """
+    if n_intervals < 1:
+        raise ValueError("El número de intervalos debe ser al menos 1")
+    n_intervals = min(n_intervals, n_points)
+    bordes = np.linspace(0, n_points, n_intervals + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bordes[:-1], bordes[1:]) if b > a]
+
+
+def ppm_intervals(ppm: np.ndarray, ranges: Sequence[Tuple[float, float]]) -> List[Interval]:
+    """
+    Convierte rangos en ppm a intervalos de índices (fin exclusivo).
+    """
+    intervals = []
+    for ppm_a, ppm_b in ranges:
+        a = int(np.argmin(np.abs(ppm - ppm_a)))
+        b = int(np.argmin(np.abs(ppm - ppm_b)))
+        a, b = sorted((a, b))
+        intervals.append((a, b + 1))
+    return intervals
+
+
+def target_spectrum(X: np.ndarray, target: Union[str, np.ndarray] = "mean") -> np.ndarray:
+    """
+    Devuelve el espectro objetivo del alineamiento.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    target -- 'mean', 'median' o un espectro (1D) dado explícitamente
+    """
+    if isinstance(target, str):
+        if target == "mean":
+            return np.mean(X, axis=0)
+        elif target == "median":
+            return np.median(X, axis=0)
+        raise ValueError(f"Objetivo de alineamiento no reconocido: {target}")
+
+    target = np.asarray(target, dtype=float)
+    if target.shape != (X.shape[1],):
+        raise ValueError("El espectro objetivo no coincide con el número de puntos")
+    return target
+
+
+def fft_shifts(segments: np.ndarray, target: np.ndarray, max_shift: int) -> np.ndarray:
+    """
+    Calcula el desplazamiento óptimo de cada fila respecto al objetivo.
+
+    La correlación c[k] = sum_n segmento[n + k] * objetivo[n] se obtiene para todas las
+    filas con una sola FFT (con relleno de ceros, para que no sea circular).
+
+    Parámetros:
+    segments -- Matriz (filas x L) con el mismo intervalo de cada muestra
+    target -- Intervalo del espectro objetivo (L)
+    max_shift -- Desplazamiento máximo permitido en puntos
+
+    Retorna:
+    Vector de desplazamientos k; la fila alineada es segmento[n + k]
+    """
+    n_rows, length = segments.shape
+    max_shift = int(min(max_shift, length - 1))
+    nfft = 1 << int(np.ceil(np.log2(2 * length)))
+
+    espectro = np.fft.rfft(segments, nfft, axis=1) * np.conj(np.fft.rfft(target, nfft))
+    corr = np.fft.irfft(espectro, nfft, axis=1)
+
+    # Retardos -max_shift..max_shift (los negativos están al final del arreglo circular)
+    lags = np.arange(-max_shift, max_shift + 1)
+    return lags[np.argmax(corr[:, lags], axis=1)]
+
+
+def shift_rows(segments: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+    """
+    Desplaza cada fila k puntos (fila[n + k]), repitiendo el valor del borde.
+    """
+    length = segments.shape[1]
+    idx = np.clip(np.arange(length)[None, :] + shifts[:, None], 0, length - 1)
+    return np.take_along_axis(segments, idx, axis=1)
+
+
+def _align_block(X_block, out_block, start, stop, target, intervals, max_shift):
+    """Trabajador: alinea un bloque de muestras intervalo por intervalo"""
+    out_block[...] = X_block
+    for a, b in intervals:
+        segments = np.asarray(X_block[:, a:b], dtype=float)
+        shifts = fft_shifts(segments, target[a:b], max_shift)
+        out_block[:, a:b] = shift_rows(segments, shifts)
+
+
+@instrumented("alineacion")
+def align_spectra(
+        X: np.ndarray,
+        target: Union[str, np.ndarray] = "mean",
+        intervals: Optional[Sequence[Interval]] = None,
+        n_intervals: int = 1,
+        max_shift: Optional[int] = None,
+        n_jobs: Optional[int] = None
+) -> np.ndarray:
+    """
+    Alinea todas las muestras a un espectro objetivo, intervalo por intervalo.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    target -- 'mean', 'median' o un espectro objetivo explícito
+    intervals -- Intervalos (inicio, fin exclusivo) a alinear; los puntos fuera de ellos
+                 no se modifican. Si es None, se usa make_intervals(n_intervals)
+    n_intervals -- Número de intervalos iguales cuando no se indican explícitamente
+    max_shift -- Desplazamiento máximo en puntos (por defecto, un cuarto del intervalo más corto)
+    n_jobs -- Número de procesos (por defecto todos los núcleos)
+
+    Retorna:
+    Matriz alineada con la misma forma que X
+    """
+    if X.size == 0:
+        raise ValueError("La matriz de entrada está vacía")
+
+    n_points = X.shape[1]
+    if intervals is None:
+        intervals = make_intervals(n_points, n_intervals)
+    intervals = [(int(a), int(b)) for a, b in intervals]
+    for a, b in intervals:
+        if not 0 <= a < b <= n_points:
+            raise ValueError(f"Intervalo fuera de rango: ({a}, {b})")
+
+    if max_shift is None:
+        max_shift = max(1, min(b - a for a, b in intervals) // 4)
+    if max_shift < 0:
+        raise ValueError("El desplazamiento máximo no puede ser negativo")
+
+    objetivo = target_spectrum(np.asarray(X), target)
+    return map_row_blocks(_align_block, X, n_jobs=n_jobs,
+                          target=objetivo, intervals=intervals, max_shift=int(max_shift))
@@ -0,0 +1,199 @@
+"""
+Corrección de línea base por mínimos cuadrados penalizados (ALS y arPLS).
+
+Ambos métodos resuelven, en cada iteración, el sistema (W + λ·DᵀD) z = W y, donde D es
+el operador de segundas diferencias. DᵀD es pentadiagonal, así que se construye una sola
+vez con scipy.sparse y se resuelve en forma de banda (LAPACK pbsv), lo que cuesta O(n)
+por espectro. Las muestras se reparten entre procesos con memoria compartida.
+"""
+from typing import Optional, Tuple, Union
+from scipy.linalg import solveh_banded
+from scipy import sparse
+import numpy as np
+from src.suite.core.instrument import instrumented
+from src.suite.core.parallel import map_row_blocks
+
+ParamType = Union[float, np.ndarray]
+
+
+def second_difference_bands(n_points: int) -> np.ndarray:
+    """
+    Devuelve DᵀD (segundas diferencias) en el formato de banda inferior de solveh_banded.
+
+    Parámetros:
+    n_points -- Número de puntos del espectro
+
+    Retorna:
+    Arreglo (3, n_points): diagonal principal, primera y segunda subdiagonal
+    """
+    if n_points < 3:
+        raise ValueError("Se necesitan al menos 3 puntos para estimar la línea base")
+
+    D = sparse.diags([1.0, -2.0, 1.0], [0, 1, 2], shape=(n_points - 2, n_points), format="csr")
+    DtD = (D.T @ D).todia()
+
+    bands = np.zeros((3, n_points))
+    for k in range(3):
+        diagonal = DtD.diagonal(-k)
+        bands[k, :len(diagonal)] = diagonal
+    return bands
+
+
+def als_baseline(
+        y: np.ndarray,
+        lam: float = 1e5,
+        p: float = 0.01,
+        n_iter: int = 10,
+        bands: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Estima la línea base de un espectro por mínimos cuadrados asimétricos (Eilers y Boelens).
+
+    Parámetros:
+    y -- Espectro (1D)
+    lam -- Suavidad de la línea base (λ); valores mayores dan líneas más rígidas
+    p -- Asimetría: peso de los puntos por encima de la línea base (0 < p < 1)
+    n_iter -- Número de iteraciones de repesado
+    bands -- DᵀD precalculado con second_difference_bands (opcional)
+
+    Retorna:
+    Línea base estimada (1D)
+    """
+    if not 0 < p < 1:
+        raise ValueError("p debe estar entre 0 y 1")
+
+    bands = second_difference_bands(len(y)) if bands is None else bands
+    system = lam * bands
+    w = np.ones_like(y)
+    z = y
+    for _ in range(n_iter):
+        system[0] = lam * bands[0] + w
+        z = solveh_banded(system, w * y, lower=True, check_finite=False)
+        w_new = np.where(y > z, p, 1.0 - p)
+        if np.array_equal(w_new, w):
+            break
+        w = w_new
+    return z
+
+
+def arpls_baseline(
+        y: np.ndarray,
+        lam: float = 1e5,
+        ratio: float = 1e-6,
+        n_iter: int = 50,
+        bands: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Estima la línea base con mínimos cuadrados penalizados asimétricamente repesados
+    (arPLS, Baek et al. 2015).
+
+    Parámetros:
+    y -- Espectro (1D)
+    lam -- Suavidad de la línea base (λ)
+    ratio -- Criterio de convergencia sobre el cambio relativo de los pesos
+    n_iter -- Número máximo de iteraciones
+    bands -- DᵀD precalculado con second_difference_bands (opcional)
+
+    Retorna:
+    Línea base estimada (1D)
+    """
+    bands = second_difference_bands(len(y)) if bands is None else bands
+    system = lam * bands
+    w = np.ones_like(y)
+    z = y
+    for _ in range(n_iter):
+        system[0] = lam * bands[0] + w
+        z = solveh_banded(system, w * y, lower=True, check_finite=False)
+
+        d = y - z
+        dn = d[d < 0]
+        if dn.size < 2:
+            break
+        m, s = dn.mean(), dn.std()
+        if s == 0:
+            break
+        exponente = np.clip(2.0 * (d - (2.0 * s - m)) / s, -500, 500)
+        w_new = 1.0 / (1.0 + np.exp(exponente))
+
+        if np.linalg.norm(w - w_new) / np.linalg.norm(w) < ratio:
+            break
+        w = w_new
+    return z
+
+
+def resolve_params(n_samples: int, lam: ParamType, p: ParamType) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte λ y p (escalares o un valor por muestra) en vectores de largo n_samples.
+    """
+    lam = np.broadcast_to(np.asarray(lam, dtype=float), (n_samples,)).copy()
+    p = np.broadcast_to(np.asarray(p, dtype=float), (n_samples,)).copy()
+    if np.any(lam <= 0):
+        raise ValueError("lam debe ser mayor que cero")
+    return lam, p
+
+
+def _baseline_block(X_block, out_block, start, stop, method, lam, p, n_iter):
+    """Trabajador: estima la línea base de un bloque de muestras"""
+    bands = second_difference_bands(X_block.shape[1])
+    for i in range(X_block.shape[0]):
+        y = np.asarray(X_block[i], dtype=float)
+        if method == "als":
+            out_block[i] = als_baseline(y, lam[start + i], p[start + i], n_iter, bands)
+        else:
+            out_block[i] = arpls_baseline(y, lam[start + i], n_iter=n_iter, bands=bands)
+
+
+@instrumented("baseline")
+def estimate_baseline(
+        X: np.ndarray,
+        method: str = "als",
+        lam: ParamType = 1e5,
+        p: ParamType = 0.01,
+        n_iter: Optional[int] = None,
+        n_jobs: Optional[int] = None
+) -> np.ndarray:
+    """
+    Estima la línea base de todas las muestras de una matriz.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    method -- 'als' o 'arpls'
+    lam -- λ común o un valor por muestra
+    p -- Asimetría común o un valor por muestra (solo ALS)
+    n_iter -- Iteraciones (por defecto 10 para ALS y 50 para arPLS)
+    n_jobs -- Número de procesos (por defecto todos los núcleos)
+
+    Retorna:
+    Matriz de líneas base con la misma forma que X
+    """
+    if X.size == 0:
+        raise ValueError("La matriz de entrada está vacía")
+
+    method = method.lower()
+    if method not in ("als", "arpls"):
+        raise ValueError(f"Método de línea base no reconocido: {method}")
+    if n_iter is None:
+        n_iter = 10 if method == "als" else 50
+
+    lam, p = resolve_params(X.shape[0], lam, p)
+    return map_row_blocks(_baseline_block, X, n_jobs=n_jobs,
+                          method=method, lam=lam, p=p, n_iter=n_iter)
+
+
+def baseline_correct(
+        X: np.ndarray,
+        method: str = "als",
+        lam: ParamType = 1e5,
+        p: ParamType = 0.01,
+        n_iter: Optional[int] = None,
+        n_jobs: Optional[int] = None
+) -> np.ndarray:
+    """
+    Resta la línea base estimada a cada muestra.
+
+    Parámetros: ver estimate_baseline
+
+    Retorna:
+    Matriz corregida (X - línea base)
+    """
+    return X - estimate_baseline(X, method, lam, p, n_iter, n_jobs)
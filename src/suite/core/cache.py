@@ -0,0 +1,227 @@
+"""
+Caché persistente de integrales en SQLite.
+
+Cada entrada guarda el vector de integrales (una por muestra) de una región, identificada
+por la huella del set de datos (hash del eje ppm y de la matriz de espectros), los índices
+(x1, x2) de la región y el modo de integración. Como la huella cambia con cualquier
+modificación de los datos (línea base, alineamiento, etc.), las entradas nunca quedan
+desactualizadas: simplemente dejan de usarse y el límite de tamaño las descarta (LRU).
+
+Configuración por variables de entorno:
+    ISQ_CACHE     -- ruta del archivo SQLite, o 0 para desactivar la caché
+                     (por defecto ~/.isq-suite/integrales.sqlite)
+    ISQ_CACHE_MB  -- tamaño máximo de los datos guardados, en MB (por defecto 256)
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import threading
+import hashlib
+import sqlite3
+import os
+
+DEFAULT_MAX_MB = 256
+
+# Filas leídas por bloque al calcular la huella (la matriz puede ser un np.memmap)
+HASH_BLOCK_ROWS = 256
+
+# Orden de acceso para el LRU, asignado por la propia base en cada sentencia: varios
+# procesos (p. ej. integración por lotes) comparten el archivo y un contador por proceso
+# daría valores repetidos
+_NEXT_ACCESS = "(SELECT COALESCE(MAX(acceso), 0) + 1 FROM integrales)"
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def dataset_hash(ppm: np.ndarray, X: np.ndarray) -> str:
+    """Huella (BLAKE2b) del eje ppm y de la matriz de espectros, leída por bloques de filas"""
+    h = hashlib.blake2b(digest_size=20)
+    ppm = np.ascontiguousarray(ppm, dtype=float)
+    h.update(repr((ppm.shape, X.shape)).encode())
+    h.update(ppm.tobytes())
+    for start in range(0, X.shape[0], HASH_BLOCK_ROWS):
+        h.update(np.ascontiguousarray(X[start:start + HASH_BLOCK_ROWS], dtype=float).tobytes())
+    return h.hexdigest()
+
+
+class IntegralCache:
+    """
+    Caché de integrales con límite de tamaño (se descartan las entradas menos usadas) y
+    contadores de aciertos y fallos.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS integrales ("
+                " dataset TEXT NOT NULL, x1 INTEGER NOT NULL, x2 INTEGER NOT NULL, modo TEXT NOT NULL,"
+                " valores BLOB NOT NULL, bytes INTEGER NOT NULL, acceso INTEGER NOT NULL,"
+                " PRIMARY KEY (dataset, x1, x2, modo))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_acceso ON integrales (acceso)")
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise IOError(f"Error al abrir la caché de integrales {path}: {str(e)}")
+
+    def get_many(self, dataset: str, regions: Sequence[Tuple[int, int]], mode: str = "suma") -> Dict[Tuple[int, int], np.ndarray]:
+        """
+        Busca varias regiones de un set de datos.
+
+        Retorna:
+        Diccionario {(x1, x2): vector de integrales} con las regiones encontradas
+        """
+        regiones = list(dict.fromkeys((int(x1), int(x2)) for x1, x2 in regions))
+        encontradas = {}
+        with self._lock:
+            try:
+                # SQLite limita el número de parámetros por consulta: se busca por bloques
+                for start in range(0, len(regiones), 400):
+                    bloque = regiones[start:start + 400]
+                    condicion = " OR ".join(["(x1 = ? AND x2 = ?)"] * len(bloque))
+                    filas = self._conn.execute(
+                        f"SELECT x1, x2, valores FROM integrales WHERE dataset = ? AND modo = ? AND ({condicion})",
+                        [dataset, mode] + [v for region in bloque for v in region]
+                    ).fetchall()
+                    for x1, x2, valores in filas:
+                        encontradas[(x1, x2)] = np.frombuffer(valores, dtype=np.float64).copy()
+                if encontradas:
+                    self._conn.executemany(
+                        f"UPDATE integrales SET acceso = {_NEXT_ACCESS} WHERE dataset = ? AND x1 = ? AND x2 = ? AND modo = ?",
+                        [(dataset, x1, x2, mode) for x1, x2 in encontradas]
+                    )
+                    self._conn.commit()
+            except sqlite3.Error:
+                # Base ocupada por otro proceso (p. ej. integración por lotes): se calcula todo
+                self._conn.rollback()
+                encontradas = {}
+            self.hits += len(encontradas)
+            self.misses += len(regiones) - len(encontradas)
+        return encontradas
+
+    def put_many(self, dataset: str, regions: Sequence[Tuple[int, int]], values: np.ndarray, mode: str = "suma") -> None:
+        """
+        Guarda las integrales de varias regiones.
+
+        Parámetros:
+        dataset -- Huella del set de datos (dataset_hash)
+        regions -- Pares de índices (x1, x2)
+        values -- Matriz (muestras x regiones) de integrales
+        mode -- Modo de integración
+        """
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            filas = []
+            for i, (x1, x2) in enumerate(regions):
+                datos = np.ascontiguousarray(values[:, i]).tobytes()
+                filas.append((dataset, int(x1), int(x2), mode, sqlite3.Binary(datos), len(datos)))
+            try:
+                self._conn.executemany(f"INSERT OR REPLACE INTO integrales VALUES (?, ?, ?, ?, ?, ?, {_NEXT_ACCESS})", filas)
+                self._evict()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                raise IOError(f"Error al guardar en la caché de integrales: {str(e)}")
+
+    def _evict(self) -> None:
+        """Descarta las entradas de acceso más antiguo hasta quedar bajo max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM integrales").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        exceso = total - self.max_bytes
+        liberado = 0
+        borrar = []
+        for rowid, bytes_ in self._conn.execute("SELECT rowid, bytes FROM integrales ORDER BY acceso"):
+            borrar.append((rowid,))
+            liberado += bytes_
+            if liberado >= exceso:
+                break
+        self._conn.executemany("DELETE FROM integrales WHERE rowid = ?", borrar)
+
+    def clear(self) -> None:
+        """Borra todas las entradas y reinicia los contadores"""
+        with self._lock:
+            self._conn.execute("DELETE FROM integrales")
+            self._conn.commit()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Aciertos, fallos, tasa de aciertos, entradas y tamaño (bytes) de la caché"""
+        with self._lock:
+            entradas, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM integrales"
+            ).fetchone()
+        consultas = self.hits + self.misses
+        return {
+            "aciertos": self.hits,
+            "fallos": self.misses,
+            "tasa_aciertos": self.hits / consultas if consultas else 0.0,
+            "entradas": int(entradas),
+            "bytes": int(total),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def default_cache() -> Optional[IntegralCache]:
+    """Caché compartida por las aplicaciones (None si está desactivada con ISQ_CACHE=0)"""
+    global _default
+    ruta = os.environ.get("ISQ_CACHE", "")
+    if ruta == "0":
+        return None
+    with _default_lock:
+        if _default is None:
+            ruta = ruta or os.path.join(os.path.expanduser("~"), ".isq-suite", "integrales.sqlite")
+            max_mb = float(os.environ.get("ISQ_CACHE_MB", DEFAULT_MAX_MB))
+            try:
+                _default = IntegralCache(ruta, int(max_mb * 1024 * 1024))
+            except IOError:
+                return None  # Sin caché (p. ej. carpeta sin permisos): se integra siempre
+        return _default
+
+
+def cached_integrals(
+        store: Optional[IntegralCache],
+        dataset: str,
+        regions: Sequence[Tuple[int, int]],
+        compute,
+        mode: str = "suma"
+) -> np.ndarray:
+    """
+    Integrales de las regiones, calculando con `compute(regiones_faltantes)` solo las que
+    no están en la caché.
+
+    Parámetros:
+    store -- Caché a consultar (None para calcular todo)
+    dataset -- Huella del set de datos
+    regions -- Pares de índices (x1, x2)
+    compute -- Función que recibe una lista de regiones y devuelve (muestras x regiones)
+    mode -- Modo de integración
+
+    Retorna:
+    Matriz (muestras x regiones) en el orden de `regions`
+    """
+    regiones: List[Tuple[int, int]] = [(int(x1), int(x2)) for x1, x2 in regions]
+    if store is None:
+        return compute(regiones)
+
+    encontradas = store.get_many(dataset, regiones, mode)
+    faltan = [r for r in dict.fromkeys(regiones) if r not in encontradas]
+    if faltan:
+        calculadas = compute(faltan)
+        try:
+            store.put_many(dataset, faltan, calculadas, mode)
+        except IOError:
+            pass  # La caché es opcional: un error al escribirla no impide integrar
+        encontradas.update({r: calculadas[:, i] for i, r in enumerate(faltan)})
+    return np.column_stack([encontradas[r] for r in regiones])
@@ -0,0 +1,129 @@
+"""
+Calibración del desplazamiento químico con un pico de referencia (TSP/DSS).
+
+En cada muestra se busca el máximo de la referencia dentro de una ventana, se refina su
+posición con una parábola por los tres puntos centrales y se desplaza el espectro una
+cantidad fraccionaria de puntos multiplicando su FFT por una rampa de fase. Todo se
+calcula por lotes de filas sobre la matriz completa.
+"""
+from typing import Optional, Tuple
+import numpy as np
+from src.suite.core.instrument import instrumented
+
+
+def fractional_index(ppm: np.ndarray, value: float) -> float:
+    """
+    Devuelve la posición (fraccionaria) de un desplazamiento químico en el eje ppm.
+    """
+    idx = np.arange(len(ppm), dtype=float)
+    if ppm[0] > ppm[-1]:
+        return float(np.interp(value, ppm[::-1], idx[::-1]))
+    return float(np.interp(value, ppm, idx))
+
+
+def find_reference_peaks(
+        X: np.ndarray,
+        ppm: np.ndarray,
+        window: Tuple[float, float] = (-0.2, 0.2)
+) -> np.ndarray:
+    """
+    Localiza el pico de referencia de cada muestra con precisión sub-punto.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    ppm -- Vector ppm
+    window -- Rango ppm (mínimo, máximo) donde buscar el pico
+
+    Retorna:
+    Posición fraccionaria del pico (en índices del eje) para cada muestra
+    """
+    mask = (ppm >= min(window)) & (ppm <= max(window))
+    idx = np.flatnonzero(mask)
+    if idx.size < 3:
+        raise ValueError("La ventana de búsqueda de la referencia contiene menos de 3 puntos")
+
+    a, b = idx[0], idx[-1] + 1
+    region = X[:, a:b]
+    local = np.argmax(region, axis=1)
+
+    # Interpolación parabólica con los vecinos del máximo (sin salir de la ventana)
+    centro = np.clip(local, 1, region.shape[1] - 2)
+    filas = np.arange(region.shape[0])
+    y0 = region[filas, centro - 1]
+    y1 = region[filas, centro]
+    y2 = region[filas, centro + 1]
+    denom = y0 - 2.0 * y1 + y2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.where(denom < 0, 0.5 * (y0 - y2) / denom, 0.0)
+
+    return a + centro + np.clip(delta, -0.5, 0.5)
+
+
+def fractional_shift(X: np.ndarray, shifts: np.ndarray, chunk_size: int = 256) -> np.ndarray:
+    """
+    Desplaza cada fila una cantidad fraccionaria de puntos con una rampa de fase en la FFT.
+
+    La fila i resultante cumple salida[n] = X[i, n - shifts[i]]. Antes de la FFT se rellenan
+    los bordes repitiendo el último valor para que el desplazamiento no dé la vuelta.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    shifts -- Desplazamiento de cada muestra en puntos (puede ser fraccionario)
+    chunk_size -- Número de filas transformadas a la vez (limita la memoria)
+
+    Retorna:
+    Matriz desplazada con la misma forma que X
+    """
+    shifts = np.asarray(shifts, dtype=float)
+    n_rows, n_points = X.shape
+    if shifts.shape != (n_rows,):
+        raise ValueError("Se necesita un desplazamiento por muestra")
+
+    pad = int(np.ceil(np.max(np.abs(shifts)))) + 1 if n_rows else 1
+    nfft = 1 << int(np.ceil(np.log2(n_points + 2 * pad)))
+    freqs = np.fft.rfftfreq(nfft)
+
+    out = np.empty((n_rows, n_points), dtype=float)
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        bloque = np.asarray(X[start:stop], dtype=float)
+        relleno = np.pad(bloque, ((0, 0), (pad, nfft - n_points - pad)), mode="edge")
+        rampa = np.exp(-2j * np.pi * shifts[start:stop, None] * freqs[None, :])
+        desplazado = np.fft.irfft(np.fft.rfft(relleno, axis=1) * rampa, nfft, axis=1)
+        out[start:stop] = desplazado[:, pad:pad + n_points]
+    return out
+
+
+@instrumented("calibracion")
+def calibrate(
+        X: np.ndarray,
+        ppm: np.ndarray,
+        target_ppm: float = 0.0,
+        window: Optional[Tuple[float, float]] = None,
+        chunk_size: int = 256
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lleva el pico de referencia de todas las muestras a target_ppm.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    ppm -- Vector ppm (se asume equiespaciado)
+    target_ppm -- Desplazamiento químico de la referencia (0.0 para TSP/DSS)
+    window -- Rango ppm donde buscar el pico (por defecto target_ppm ± 0.2)
+    chunk_size -- Filas por lote de FFT
+
+    Retorna:
+    X_calibrada -- Matriz calibrada
+    shifts_ppm -- Corrección aplicada a cada muestra, en ppm
+    """
+    if X.size == 0:
+        raise ValueError("La matriz de entrada está vacía")
+    ppm = np.asarray(ppm, dtype=float)
+    if window is None:
+        window = (target_ppm - 0.2, target_ppm + 0.2)
+
+    posiciones = find_reference_peaks(X, ppm, window)
+    shifts = fractional_index(ppm, target_ppm) - posiciones
+    paso = (ppm[-1] - ppm[0]) / (len(ppm) - 1)
+
+    return fractional_shift(X, shifts, chunk_size), shifts * paso
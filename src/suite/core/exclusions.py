@@ -0,0 +1,72 @@
+"""
+Regiones excluidas de las áreas totales (agua, disolvente, referencia, etc.).
+
+Una exclusión es un par (ppm_a, ppm_b), en cualquier orden: se excluyen los puntos del eje
+con desplazamiento entre ambos valores. Las mismas exclusiones se usan para las integrales
+totales y relativas de iNMR y para la normalización por área total (norm.py).
+
+En texto se escriben separadas por punto y coma, p. ej. "4.70 - 4.90; -0.10 - 0.10".
+"""
+from typing import List, Sequence, Tuple
+import numpy as np
+import re
+
+Exclusion = Tuple[float, float]
+
+# Exclusiones habituales: (nombre, (ppm_a, ppm_b))
+COMMON_EXCLUSIONS = (
+    ("Agua", (4.70, 4.90)),
+    ("TSP/DSS", (-0.10, 0.10)),
+    ("DMSO", (2.45, 2.55)),
+    ("Metanol", (3.30, 3.36)),
+    ("Cloroformo", (7.20, 7.32)),
+)
+
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)"
+_RANGE = re.compile(rf"\s*({_NUMBER})\s*(?:-|a|:)\s*({_NUMBER})\s*")
+
+
+def parse_exclusions(texto: str) -> List[Exclusion]:
+    """
+    Lee exclusiones escritas como "inicio - fin; inicio - fin" (también "inicio a fin").
+
+    Retorna:
+    Lista de pares (ppm_a, ppm_b)
+    """
+    exclusiones = []
+    for parte in texto.split(";"):
+        if not parte.strip():
+            continue
+        rango = _RANGE.fullmatch(parte.replace(",", "."))
+        if rango is None:
+            raise ValueError(f"Exclusión no válida: '{parte.strip()}' (use 'inicio - fin')")
+        exclusiones.append((float(rango.group(1)), float(rango.group(2))))
+    return exclusiones
+
+
+def format_exclusions(exclusiones: Sequence[Exclusion]) -> str:
+    """Texto de las exclusiones en el formato de parse_exclusions"""
+    return "; ".join(f"{a:.2f} - {b:.2f}" for a, b in exclusiones)
+
+
+def exclusion_regions(ppm: np.ndarray, exclusiones: Sequence[Exclusion]) -> List[Tuple[int, int]]:
+    """
+    Convierte exclusiones en ppm a regiones de índices (x1, x2), ambos incluidos, ordenadas
+    y sin solaparse (las que comparten puntos se unen), para restarlas de una integral total.
+    Las exclusiones sin puntos en el eje se ignoran.
+    """
+    ppm = np.asarray(ppm, dtype=float)
+    regiones = []
+    for a, b in exclusiones:
+        dentro = np.flatnonzero((ppm >= min(a, b)) & (ppm <= max(a, b)))
+        if len(dentro):
+            regiones.append((int(dentro[0]), int(dentro[-1])))
+
+    unidas = []
+    for x1, x2 in sorted(regiones):
+        if unidas and x1 <= unidas[-1][1]:
+            unidas[-1] = (unidas[-1][0], max(unidas[-1][1], x2))
+        else:
+            unidas.append((x1, x2))
+    return unidas
+
@@ -1,9 +1,11 @@
 from typing import Tuple, Optional, List
+from src.suite.core.instrument import instrumented, stage
 import pandas as pd
 import numpy as np
 import os
 
 
+@instrumented("load_nmr_data")
 def load_nmr_data(file_path: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
     """
     Carga datos de espectros NMR desde un archivo CSV con estructura específica.
@@ -23,12 +25,14 @@ def load_nmr_data(file_path: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
     """
     try:
         # Leer el archivo manteniendo los encabezados y el índice
-        df = pd.read_csv(file_path, header=0, index_col=None)
+        with stage("load_nmr_data.parse"):
+            df = pd.read_csv(file_path, header=0, index_col=None)
 
         # Extraer componentes
-        ppm = df.iloc[1:, 0].values.astype(float)
-        sample_names = df.columns[1:].tolist()
-        spectra = df.iloc[1:, 1:].values.astype(float).T
+        with stage("load_nmr_data.transpose", shape=list(df.shape)):
+            ppm = df.iloc[1:, 0].values.astype(float)
+            sample_names = df.columns[1:].tolist()
+            spectra = df.iloc[1:, 1:].values.astype(float).T
 
         return ppm, spectra, sample_names
 
@@ -36,6 +40,7 @@ def load_nmr_data(file_path: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         raise IOError(f"Error al cargar el archivo {file_path}: {str(e)}")
 
 
+@instrumented("save_processed_data")
 def save_processed_data(
         output_path: str,
         ppm: np.ndarray,
@@ -54,22 +59,25 @@ def save_processed_data(
     original_file_path -- Ruta opcional al archivo original (para mantener metadatos)
     """
     try:
-        # Transponer los datos procesados para que coincidan con la estructura de salida
-        # (puntos ppm x muestras)
-        data_to_save = processed_data.T
+        with stage("save_processed_data.build", shape=list(processed_data.shape)):
+            # Transponer los datos procesados para que coincidan con la estructura de salida
+            # (puntos ppm x muestras)
+            data_to_save = processed_data.T
 
-        # Crear una lista de listas para los datos
-        # Primera fila: vacío + nombres de muestra
-        data_list = [[''] + sample_names]
+            # Crear una lista de listas para los datos
+            # Primera fila: vacío + nombres de muestra
+            data_list = [[''] + sample_names]
 
-        # Para cada punto ppm, crear una fila: [ppm] + [valores para cada muestra]
-        for i in range(len(ppm)):
-            row = [ppm[i]] + data_to_save[i].tolist()
-            data_list.append(row)
+            # Para cada punto ppm, crear una fila: [ppm] + [valores para cada muestra]
+            for i in range(len(ppm)):
+                row = [ppm[i]] + data_to_save[i].tolist()
+                data_list.append(row)
 
-        # Convertir a DataFrame y guardar
-        df_output = pd.DataFrame(data_list)
-        df_output.to_csv(output_path, index=False, header=False)
+            # Convertir a DataFrame
+            df_output = pd.DataFrame(data_list)
+
+        with stage("save_processed_data.write"):
+            df_output.to_csv(output_path, index=False, header=False)
 
         print(f"Datos procesados guardados en: {output_path}")
 
@@ -123,3 +131,29 @@ def generate_output_filename(input_path: str, suffix: str = "_processed") -> str
     base_name, ext = os.path.splitext(file_name)
     new_name = base_name + suffix + ext
     return os.path.join(dir_name, new_name)
+
+
+def load_groups(file_path: str, sample_names: List[str]) -> List[str]:
+    """
+    Carga el grupo de cada muestra desde un archivo CSV de dos columnas (muestra, grupo).
+
+    Parámetros:
+    file_path -- Ruta al archivo CSV (con encabezado)
+    sample_names -- Nombres de las muestras, en el orden de la matriz
+
+    Retorna:
+    Lista con el grupo de cada muestra, en el mismo orden que sample_names
+    """
+    try:
+        df = pd.read_csv(file_path, header=0, index_col=None, dtype=str)
+    except Exception as e:
+        raise IOError(f"Error al cargar el archivo {file_path}: {str(e)}")
+
+    if df.shape[1] < 2:
+        raise ValueError("El archivo de grupos debe tener dos columnas: muestra y grupo")
+    grupos = dict(zip(df.iloc[:, 0].str.strip(), df.iloc[:, 1].str.strip()))
+    faltantes = [str(n) for n in sample_names if str(n) not in grupos]
+    if faltantes:
+        raise ValueError(f"Muestras sin grupo asignado: {', '.join(faltantes[:10])}"
+                         + (" ..." if len(faltantes) > 10 else ""))
+    return [grupos[str(n)] for n in sample_names]
@@ -0,0 +1,181 @@
+"""
+Instrumentación liviana por etapas: tiempo real, tiempo de CPU y pico de memoria.
+
+Está desactivada por defecto; mientras lo esté, `stage` e `instrumented` solo agregan
+una comprobación de una variable global. Se activa con la variable de entorno
+ISQ_PROFILE=1 (opcionalmente ISQ_PROFILE_FILE=ruta.jsonl) o llamando a `enable()`.
+
+Cada etapa registrada se emite como una línea JSON con la forma:
+    {"stage": "load_file.parse", "parent": "load_file", "wall_s": 0.41, "cpu_s": 0.40,
+     "peak_bytes": 123456, "start": 1700000000.0, "pid": 1234, ...}
+"""
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from collections import deque
+import tracemalloc
+import threading
+import functools
+import json
+import time
+import sys
+import os
+
+_enabled = False
+_sink = None  # Archivo abierto donde se escriben las líneas JSON
+_records = deque(maxlen=10000)  # Registros recientes, para el resumen en las aplicaciones
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(output: Optional[str] = None) -> None:
+    """
+    Activa la instrumentación.
+
+    Parámetros:
+    output -- Ruta de un archivo .jsonl donde agregar los registros; si es None se
+              escriben en stderr
+    """
+    global _enabled, _sink
+    if _sink is not None and _sink is not sys.stderr:
+        _sink.close()
+    _sink = open(output, "a", encoding="utf-8") if output else sys.stderr
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+
+def disable() -> None:
+    """Desactiva la instrumentación y detiene el seguimiento de memoria"""
+    global _enabled, _sink
+    _enabled = False
+    if _sink is not None and _sink is not sys.stderr:
+        _sink.close()
+    _sink = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _emit(record: dict) -> None:
+    with _lock:
+        _records.append(record)
+        if _sink is not None:
+            _sink.write(json.dumps(record) + "\n")
+            _sink.flush()
+
+
+@contextmanager
+def stage(name: str, **info):
+    """
+    Mide una etapa. Las etapas pueden anidarse; el pico de memoria de una etapa
+    incluye el de sus subetapas.
+
+    Parámetros:
+    name -- Nombre de la etapa (p. ej. 'load_file.parse')
+    info -- Datos adicionales que se agregan al registro (tamaños, método, etc.)
+    """
+    if not _enabled:
+        yield
+        return
+
+    stack = _stack()
+    frame = {"name": name, "child_peak": 0}
+    base, peak_previo = tracemalloc.get_traced_memory()
+    parent = None
+    if stack:
+        # Conservar el pico que alcanzó la etapa padre antes de reiniciar el contador
+        parent = stack[-1]["name"]
+        stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak_previo)
+    stack.append(frame)
+
+    tracemalloc.reset_peak()
+    start = time.time()
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        _, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        stack.pop()
+
+        # El pico absoluto de la etapa es el mayor entre el propio y el de sus subetapas
+        peak = max(peak, frame["child_peak"])
+        if stack:
+            stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak)
+
+        record = {
+            "stage": name,
+            "parent": parent,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "peak_bytes": max(0, peak - base),
+            "start": start,
+            "pid": os.getpid(),
+        }
+        record.update(info)
+        _emit(record)
+
+
+def instrumented(name: str):
+    """
+    Decorador que registra cada llamada a la función como una etapa.
+
+    Parámetros:
+    name -- Nombre de la etapa
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_records() -> List[dict]:
+    with _lock:
+        return list(_records)
+
+
+def clear_records() -> None:
+    with _lock:
+        _records.clear()
+
+
+def summary() -> List[Dict]:
+    """
+    Agrupa los registros por etapa.
+
+    Retorna:
+    Lista de diccionarios con: stage, llamadas, wall_s (total), cpu_s (total),
+    wall_max_s y peak_bytes (máximo), en el orden en que aparecieron las etapas
+    """
+    agrupado: Dict[str, Dict] = {}
+    for r in get_records():
+        s = agrupado.setdefault(r["stage"], {
+            "stage": r["stage"], "llamadas": 0, "wall_s": 0.0, "cpu_s": 0.0,
+            "wall_max_s": 0.0, "peak_bytes": 0,
+        })
+        s["llamadas"] += 1
+        s["wall_s"] += r["wall_s"]
+        s["cpu_s"] += r["cpu_s"]
+        s["wall_max_s"] = max(s["wall_max_s"], r["wall_s"])
+        s["peak_bytes"] = max(s["peak_bytes"], r["peak_bytes"])
+    return list(agrupado.values())
+
+
+if os.environ.get("ISQ_PROFILE", "") not in ("", "0"):
+    enable(os.environ.get("ISQ_PROFILE_FILE"))
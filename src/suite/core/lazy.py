@@ -0,0 +1,45 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Módulo que se importa recién cuando se accede a uno de sus atributos.
+
+    Permite que las aplicaciones muestren su ventana antes de cargar bibliotecas
+    pesadas (pandas, matplotlib, tksheet...), cuyo costo de importación se paga
+    la primera vez que realmente se usan.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_lazy_name"])
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        estado = "cargado" if self.__dict__["_lazy_module"] is not None else "sin cargar"
+        return f"<LazyModule '{self.__dict__['_lazy_name']}' ({estado})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Devuelve un módulo diferido que se importa en su primer uso.
+
+    Parámetros:
+    name -- Nombre completo del módulo (p. ej. 'matplotlib.backends.backend_tkagg')
+
+    Retorna:
+    Objeto LazyModule que se comporta como el módulo una vez cargado
+    """
+    return LazyModule(name)
@@ -0,0 +1,297 @@
+"""
+Biblioteca local de espectros de referencia y búsqueda por similitud.
+
+Los espectros se guardan remuestreados (por buckets) a una rejilla ppm común, en una
+carpeta .isqlib con:
+    biblioteca.json   -- versión, nombres de los compuestos y bordes de los buckets
+    espectros.npy     -- matriz (compuestos x buckets) en float32
+    indice.npy        -- cada fila dividida por su norma (índice para el coseno)
+    factor.npy        -- |r| / |r - media(r)| de cada fila (para pasar del índice a la
+                         correlación)
+Los arreglos se abren con np.load(mmap_mode="r"), así que una biblioteca de miles de
+compuestos no se carga entera en memoria.
+
+Para una consulta q sobre todo el espectro:
+    coseno(q, r)      = q/|q| · indice_r
+    correlacion(q, r) = qc/|qc| · indice_r · factor_r   (qc = q - media(q))
+porque qc suma cero y por lo tanto qc · r = qc · (r - media(r)). Las búsquedas en una
+ventana ppm normalizan sobre la marcha solo las columnas de la ventana. En ambos casos la
+biblioteca se recorre por bloques de filas, con una multiplicación de matrices por bloque
+para todas las consultas a la vez.
+"""
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import json
+import os
+from src.suite.core.instrument import instrumented
+
+LIBRARY_VERSION = 1
+LIBRARY_EXTENSION = ".isqlib"
+METRICS = ("coseno", "correlacion")
+
+# Número máximo de valores de la biblioteca leídos por bloque (compuestos x buckets)
+MAX_BLOCK_ELEMENTS = 16_000_000
+
+
+def bucket_edges(ppm_min: float, ppm_max: float, width: float) -> np.ndarray:
+    """Bordes de buckets de ancho `width` que cubren [ppm_min, ppm_max], en orden creciente"""
+    if width <= 0:
+        raise ValueError("El ancho de bucket debe ser positivo")
+    inicio, fin = min(ppm_min, ppm_max), max(ppm_min, ppm_max)
+    n = max(1, int(np.ceil((fin - inicio) / width)))
+    return inicio + width * np.arange(n + 1)
+
+
+def bucket_spectra(ppm: np.ndarray, X: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Promedia las intensidades de cada espectro dentro de cada bucket.
+
+    Parámetros:
+    ppm -- Vector ppm de los espectros (en cualquier orden)
+    X -- Matriz de espectros (muestras x puntos ppm) o un espectro (1D)
+    edges -- Bordes crecientes de los buckets
+
+    Retorna:
+    Matriz (muestras x buckets); los buckets sin puntos quedan en 0
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    ppm = np.asarray(ppm, dtype=float)
+    n_buckets = len(edges) - 1
+    cubeta = np.searchsorted(edges, ppm, side="right") - 1
+    cubeta[ppm == edges[-1]] = n_buckets - 1  # El borde final pertenece al último bucket
+    dentro = (cubeta >= 0) & (cubeta < n_buckets)
+    cubeta = cubeta[dentro]
+
+    conteo = np.bincount(cubeta, minlength=n_buckets).astype(float)
+    sumas = np.zeros((X.shape[0], n_buckets))
+    for i, fila in enumerate(X[:, dentro]):
+        sumas[i] = np.bincount(cubeta, weights=fila, minlength=n_buckets)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(conteo > 0, sumas / conteo, 0.0)
+
+
+def normalized_rows(B: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Índice normalizado de una matriz de espectros.
+
+    Retorna:
+    indice -- Filas divididas por su norma (0 si la norma es 0)
+    factor -- |r| / |r - media(r)| de cada fila (0 si la fila es constante)
+    """
+    B = np.asarray(B, dtype=float)
+    norma = np.linalg.norm(B, axis=1)
+    norma_centrada = np.linalg.norm(B - B.mean(axis=1, keepdims=True), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indice = np.where(norma[:, None] > 0, B / norma[:, None], 0.0)
+        factor = np.where(norma_centrada > 0, norma / norma_centrada, 0.0)
+    return indice, factor
+
+
+def _normalize_queries(Q: np.ndarray, metric: str) -> np.ndarray:
+    if metric == "correlacion":
+        Q = Q - Q.mean(axis=1, keepdims=True)
+    norma = np.linalg.norm(Q, axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(norma > 0, Q / norma, 0.0)
+
+
+def _write_arrays(path: str, header: dict, espectros: np.ndarray) -> None:
+    """Escribe los arreglos y el encabezado; cada archivo se reemplaza de forma atómica"""
+    indice, factor = normalized_rows(espectros)
+    arreglos = {
+        "espectros.npy": espectros.astype(np.float32),
+        "indice.npy": indice.astype(np.float32),
+        "factor.npy": factor.astype(np.float32),
+    }
+    for nombre, arr in arreglos.items():
+        tmp = os.path.join(path, nombre + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, os.path.join(path, nombre))
+    tmp = os.path.join(path, "biblioteca.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(path, "biblioteca.json"))
+
+
+class SpectralLibrary:
+    """
+    Biblioteca de espectros de referencia abierta en modo lectura (arreglos mapeados).
+    """
+
+    def __init__(self, path: str):
+        try:
+            with open(os.path.join(path, "biblioteca.json"), encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("version") != LIBRARY_VERSION:
+                raise ValueError(f"Versión de biblioteca no soportada: {header.get('version')}")
+            self.path = path
+            self.names: List[str] = header["nombres"]
+            self.edges = np.asarray(header["bordes"], dtype=float)
+            self.spectra = np.load(os.path.join(path, "espectros.npy"), mmap_mode="r")
+            self.index = np.load(os.path.join(path, "indice.npy"), mmap_mode="r")
+            self.factor = np.load(os.path.join(path, "factor.npy"), mmap_mode="r")
+        except Exception as e:
+            raise IOError(f"Error al abrir la biblioteca {path}: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Centro de cada bucket de la rejilla común"""
+        return (self.edges[:-1] + self.edges[1:]) / 2.0
+
+    def window_columns(self, window: Tuple[float, float]) -> np.ndarray:
+        """Índices de los buckets cuyo centro cae dentro de la ventana ppm"""
+        centros = self.centers
+        columnas = np.flatnonzero((centros >= min(window)) & (centros <= max(window)))
+        if len(columnas) < 2:
+            raise ValueError("La ventana contiene menos de 2 buckets de la biblioteca")
+        return columnas
+
+    @instrumented("busqueda_biblioteca")
+    def search(
+            self,
+            ppm: np.ndarray,
+            queries: np.ndarray,
+            k: int = 10,
+            metric: str = "coseno",
+            window: Optional[Tuple[float, float]] = None,
+            chunk_rows: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca los k compuestos más parecidos a cada espectro de consulta.
+
+        Parámetros:
+        ppm -- Vector ppm de las consultas
+        queries -- Espectro de consulta (1D) o matriz de consultas (consultas x puntos ppm)
+        k -- Número de resultados por consulta
+        metric -- 'coseno' o 'correlacion'
+        window -- Ventana (ppm_a, ppm_b) a comparar; None para todo el espectro
+        chunk_rows -- Compuestos por bloque (por defecto, según MAX_BLOCK_ELEMENTS)
+
+        Retorna:
+        indices -- Matriz (consultas x k) de índices de compuestos, del más parecido al menos
+        scores -- Matriz (consultas x k) de similitudes
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Métrica no reconocida: {metric}")
+        if len(self) == 0:
+            raise ValueError("La biblioteca está vacía")
+
+        Q = bucket_spectra(ppm, queries, self.edges)
+        columnas = self.window_columns(window) if window is not None else None
+        if columnas is not None:
+            Q = Q[:, columnas]
+        Qn = _normalize_queries(Q, metric)
+
+        k = max(1, min(int(k), len(self)))
+        n_cols = Q.shape[1]
+        if chunk_rows is None:
+            chunk_rows = MAX_BLOCK_ELEMENTS // max(1, n_cols)
+        chunk_rows = max(1, int(chunk_rows))
+
+        mejores_idx = np.empty((Q.shape[0], 0), dtype=int)
+        mejores = np.empty((Q.shape[0], 0))
+        for start in range(0, len(self), chunk_rows):
+            stop = min(start + chunk_rows, len(self))
+            if columnas is None:
+                scores = np.asarray(self.index[start:stop], dtype=float) @ Qn.T
+                if metric == "correlacion":
+                    scores *= np.asarray(self.factor[start:stop], dtype=float)[:, None]
+            else:
+                bloque = np.asarray(self.spectra[start:stop][:, columnas], dtype=float)
+                scores = _normalize_queries(bloque, metric) @ Qn.T
+
+            # Se conservan solo los k mejores acumulados hasta ahora
+            mejores_idx = np.hstack([mejores_idx, np.broadcast_to(np.arange(start, stop), scores.T.shape)])
+            mejores = np.hstack([mejores, scores.T])
+            if mejores.shape[1] > k:
+                sel = np.argpartition(-mejores, k - 1, axis=1)[:, :k]
+                mejores_idx = np.take_along_axis(mejores_idx, sel, axis=1)
+                mejores = np.take_along_axis(mejores, sel, axis=1)
+
+        orden = np.argsort(-mejores, axis=1)
+        return np.take_along_axis(mejores_idx, orden, axis=1), np.take_along_axis(mejores, orden, axis=1)
+
+    def search_names(self, ppm, query, **options) -> List[Tuple[str, float]]:
+        """Como search para un único espectro, devolviendo pares (nombre, similitud)"""
+        indices, scores = self.search(ppm, np.asarray(query, dtype=float)[None, :], **options)
+        return [(self.names[i], float(s)) for i, s in zip(indices[0], scores[0])]
+
+
+def create_library(
+        path: str,
+        ppm: np.ndarray,
+        X: np.ndarray,
+        names: Sequence[str],
+        bucket_width: float = 0.01,
+        ppm_range: Optional[Tuple[float, float]] = None
+) -> SpectralLibrary:
+    """
+    Crea una biblioteca nueva a partir de espectros de referencia.
+
+    Parámetros:
+    path -- Carpeta de la biblioteca (se crea si no existe)
+    ppm -- Vector ppm de los espectros
+    X -- Matriz de espectros de referencia (compuestos x puntos ppm)
+    names -- Nombre de cada compuesto
+    bucket_width -- Ancho de los buckets de la rejilla común (ppm)
+    ppm_range -- Rango de la rejilla; por defecto, el de ppm
+    """
+    return build_library(path, [(ppm, X, names)], bucket_width, ppm_range)
+
+
+@instrumented("crear_biblioteca")
+def build_library(
+        path: str,
+        sources: Sequence[Tuple[np.ndarray, np.ndarray, Sequence[str]]],
+        bucket_width: float = 0.01,
+        ppm_range: Optional[Tuple[float, float]] = None
+) -> SpectralLibrary:
+    """
+    Crea una biblioteca a partir de varios conjuntos de espectros, cada uno con su propio
+    vector ppm; todos se llevan a la misma rejilla de buckets.
+
+    Parámetros:
+    path -- Carpeta de la biblioteca (se crea si no existe)
+    sources -- Lista de tuplas (ppm, X, nombres), p. ej. las de handler.load_nmr_data
+    bucket_width -- Ancho de los buckets de la rejilla común (ppm)
+    ppm_range -- Rango de la rejilla; por defecto, el que cubren todos los conjuntos
+    """
+    if not sources:
+        raise ValueError("No hay espectros de referencia")
+    for ppm, X, names in sources:
+        if len(names) != np.atleast_2d(X).shape[0]:
+            raise ValueError("La cantidad de espectros no coincide con la de nombres")
+    if ppm_range is None:
+        ppm_range = (min(float(np.min(s[0])) for s in sources), max(float(np.max(s[0])) for s in sources))
+    edges = bucket_edges(ppm_range[0], ppm_range[1], bucket_width)
+
+    espectros = np.vstack([bucket_spectra(ppm, X, edges) for ppm, X, _ in sources])
+    nombres = [str(n) for _, _, names in sources for n in names]
+    try:
+        os.makedirs(path, exist_ok=True)
+        _write_arrays(path, {"version": LIBRARY_VERSION, "nombres": nombres, "bordes": edges.tolist()}, espectros)
+    except Exception as e:
+        raise IOError(f"Error al crear la biblioteca {path}: {str(e)}")
+    return SpectralLibrary(path)
+
+
+@instrumented("agregar_biblioteca")
+def add_to_library(path: str, ppm: np.ndarray, X: np.ndarray, names: Sequence[str]) -> SpectralLibrary:
+    """Agrega espectros de referencia a una biblioteca existente, en su misma rejilla"""
+    biblioteca = SpectralLibrary(path)
+    nuevos = bucket_spectra(ppm, X, biblioteca.edges)
+    if len(names) != nuevos.shape[0]:
+        raise ValueError("La cantidad de espectros no coincide con la de nombres")
+    espectros = np.vstack([np.asarray(biblioteca.spectra, dtype=float), nuevos])
+    header = {"version": LIBRARY_VERSION, "nombres": biblioteca.names + [str(n) for n in names],
+              "bordes": biblioteca.edges.tolist()}
+    del biblioteca  # Libera los mapas antes de reemplazar los archivos
+    try:
+        _write_arrays(path, header, espectros)
+    except Exception as e:
+        raise IOError(f"Error al actualizar la biblioteca {path}: {str(e)}")
+    return SpectralLibrary(path)
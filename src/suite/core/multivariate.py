@@ -0,0 +1,257 @@
+"""
+Análisis multivariante de la matriz procesada: PCA, PLS-DA y OPLS-DA.
+
+La PCA usa SVD aleatorizada (sklearn.utils.extmath.randomized_svd), que solo calcula las
+primeras componentes: con pocas muestras y decenas de miles de puntos ppm cuesta unas
+pocas multiplicaciones de la matriz por bloques delgados, sin formar la matriz de
+covarianza de puntos x puntos.
+
+PLS-DA ajusta un PLSRegression contra la codificación 0/1 de los grupos; OPLS-DA (solo
+dos grupos) filtra primero las componentes ortogonales con pyopls y ajusta un PLS de una
+componente sobre el resultado. La matriz se supone ya escalada por sNMR, así que ningún
+modelo vuelve a escalar las columnas.
+
+La validación cruzada reparte los pliegues entre procesos; la matriz se coloca una sola
+vez en memoria compartida (ver core/parallel.py) y cada proceso recibe solo los índices
+de entrenamiento y prueba.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from sklearn.cross_decomposition import PLSRegression
+from sklearn.utils.extmath import randomized_svd
+import numpy as np
+from src.suite.core.instrument import instrumented
+from src.suite.core.parallel import MIN_PARALLEL_SIZE, SharedArray, default_jobs
+
+METHODS = ("PCA", "PLS-DA", "OPLS-DA")
+
+
+def encode_groups(groups: Sequence) -> Tuple[List[str], np.ndarray]:
+    """
+    Codifica los grupos de las muestras para los modelos discriminantes.
+
+    Retorna:
+    clases -- Nombres de los grupos, ordenados
+    Y -- Matriz (muestras x clases) de 0/1; con dos grupos, una sola columna (1 = segundo grupo)
+    """
+    etiquetas = np.asarray([str(g) for g in groups])
+    clases = sorted(set(etiquetas.tolist()))
+    if len(clases) < 2:
+        raise ValueError("Se necesitan al menos dos grupos")
+    Y = (etiquetas[:, None] == np.asarray(clases)[None, :]).astype(float)
+    if len(clases) == 2:
+        Y = Y[:, 1:]
+    return clases, Y
+
+
+def decode_predictions(Y_pred: np.ndarray) -> np.ndarray:
+    """Índice de la clase predicha para cada muestra a partir de la respuesta del modelo"""
+    if Y_pred.shape[1] == 1:
+        return (Y_pred[:, 0] > 0.5).astype(int)
+    return np.argmax(Y_pred, axis=1)
+
+
+@instrumented("pca")
+def fit_pca(X: np.ndarray, n_components: int = 2, seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """
+    PCA de la matriz centrada con SVD aleatorizada.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    n_components -- Número de componentes
+    seed -- Semilla de la SVD aleatorizada
+
+    Retorna:
+    Diccionario con 'scores' (muestras x comp.), 'loadings' (puntos x comp.) y
+    'varianza' (fracción de la varianza total explicada por cada componente)
+    """
+    X = np.asarray(X, dtype=float)
+    n_components = int(n_components)
+    if not 1 <= n_components <= min(X.shape):
+        raise ValueError(f"El número de componentes debe estar entre 1 y {min(X.shape)}")
+
+    Xc = X - X.mean(axis=0)
+    U, s, Vt = randomized_svd(Xc, n_components, random_state=seed)
+    total = float(np.einsum("ij,ij->", Xc, Xc))
+    return {
+        "scores": U * s,
+        "loadings": Vt.T,
+        "varianza": s ** 2 / total if total > 0 else np.zeros_like(s),
+    }
+
+
+def _fit_plsda(X: np.ndarray, Y: np.ndarray, n_components: int) -> PLSRegression:
+    return PLSRegression(n_components=n_components, scale=False).fit(X, Y)
+
+
+def _fit_oplsda(X: np.ndarray, Y: np.ndarray, n_orthogonal: int):
+    """Filtro OPLS más un PLS de una componente sobre la parte predictiva"""
+    from pyopls import OPLS
+
+    opls = OPLS(n_components=n_orthogonal, scale=False).fit(X, Y)
+    pls = PLSRegression(n_components=1, scale=False).fit(opls.transform(X), Y)
+    return opls, pls
+
+
+def check_model_args(X: np.ndarray, Y: np.ndarray, method: str, n_components: int) -> None:
+    if method not in METHODS[1:]:
+        raise ValueError(f"Método discriminante no reconocido: {method}")
+    if method == "OPLS-DA" and Y.shape[1] != 1:
+        raise ValueError("OPLS-DA solo admite dos grupos")
+    if not 1 <= int(n_components) < X.shape[0]:
+        raise ValueError(f"El número de componentes debe estar entre 1 y {X.shape[0] - 1}")
+
+
+@instrumented("modelo_discriminante")
+def fit_discriminant(
+        X: np.ndarray,
+        groups: Sequence,
+        method: str = "PLS-DA",
+        n_components: int = 2
+) -> Dict[str, object]:
+    """
+    Ajusta un modelo PLS-DA u OPLS-DA.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    groups -- Grupo de cada muestra
+    method -- 'PLS-DA' u 'OPLS-DA'
+    n_components -- Componentes PLS (PLS-DA) o componentes ortogonales (OPLS-DA)
+
+    Retorna:
+    Diccionario con 'clases', 'scores' y 'loadings' (dos columnas: en OPLS-DA, la
+    predictiva y la primera ortogonal), 'r2y' y el modelo ajustado en 'modelo'
+    """
+    X = np.asarray(X, dtype=float)
+    clases, Y = encode_groups(groups)
+    check_model_args(X, Y, method, n_components)
+
+    if method == "PLS-DA":
+        pls = _fit_plsda(X, Y, int(n_components))
+        scores, loadings = pls.x_scores_, pls.x_loadings_
+        Y_ajustada = pls.predict(X)
+        modelo = pls
+    else:
+        opls, pls = _fit_oplsda(X, Y, int(n_components))
+        scores = np.column_stack([pls.x_scores_[:, 0], opls.T_ortho_[:, 0]])
+        loadings = np.column_stack([pls.x_loadings_[:, 0], opls.P_ortho_[:, 0]])
+        Y_ajustada = pls.predict(opls.transform(X))
+        modelo = (opls, pls)
+
+    return {
+        "clases": clases,
+        "scores": scores,
+        "loadings": loadings,
+        "r2y": 1.0 - press(Y, Y_ajustada) / total_ss(Y),
+        "modelo": modelo,
+    }
+
+
+def press(Y: np.ndarray, Y_pred: np.ndarray) -> float:
+    return float(np.sum((Y - Y_pred.reshape(Y.shape)) ** 2))
+
+
+def total_ss(Y: np.ndarray) -> float:
+    return float(np.sum((Y - Y.mean(axis=0)) ** 2))
+
+
+def predict_fold(
+        X: np.ndarray,
+        Y: np.ndarray,
+        train: np.ndarray,
+        test: np.ndarray,
+        method: str,
+        n_components: int
+) -> np.ndarray:
+    """Ajusta el modelo con las muestras de entrenamiento y predice las de prueba"""
+    if method == "PLS-DA":
+        return _fit_plsda(X[train], Y[train], n_components).predict(X[test])
+    opls, pls = _fit_oplsda(X[train], Y[train], n_components)
+    return pls.predict(opls.transform(X[test]))
+
+
+def _run_fold(spec, Y, train, test, method, n_components):
+    """Ejecuta un pliegue de la validación cruzada (en el proceso hijo)"""
+    compartida = SharedArray.attach(spec)
+    try:
+        return predict_fold(compartida.array, Y, train, test, method, n_components)
+    finally:
+        compartida.close()
+
+
+def stratified_folds(labels: np.ndarray, n_folds: int) -> List[np.ndarray]:
+    """
+    Reparte las muestras en pliegues manteniendo la proporción de cada grupo.
+
+    Las muestras de cada grupo se asignan a los pliegues de forma alternada, así que el
+    resultado es determinista.
+    """
+    pliegue = np.empty(len(labels), dtype=int)
+    desplazamiento = 0
+    for clase in np.unique(labels):
+        idx = np.flatnonzero(labels == clase)
+        pliegue[idx] = (np.arange(len(idx)) + desplazamiento) % n_folds
+        desplazamiento += len(idx)
+    return [np.flatnonzero(pliegue == k) for k in range(n_folds) if np.any(pliegue == k)]
+
+
+@instrumented("validacion_cruzada")
+def cross_validate(
+        X: np.ndarray,
+        groups: Sequence,
+        method: str = "PLS-DA",
+        n_components: int = 2,
+        n_folds: int = 7,
+        n_jobs: Optional[int] = None,
+        min_size: int = MIN_PARALLEL_SIZE
+) -> Dict[str, object]:
+    """
+    Validación cruzada estratificada de un modelo PLS-DA u OPLS-DA.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    groups -- Grupo de cada muestra
+    method -- 'PLS-DA' u 'OPLS-DA'
+    n_components -- Componentes del modelo (ver fit_discriminant)
+    n_folds -- Número de pliegues
+    n_jobs -- Número de procesos (por defecto todos los núcleos; 1 = sin procesos)
+    min_size -- Número de elementos de X por debajo del cual no se lanzan procesos
+
+    Retorna:
+    Diccionario con 'q2', 'exactitud' (fracción de muestras bien clasificadas) y
+    'prediccion' (clase predicha de cada muestra)
+    """
+    X = np.asarray(X, dtype=float)
+    clases, Y = encode_groups(groups)
+    check_model_args(X, Y, method, n_components)
+    etiquetas = np.asarray([str(g) for g in groups])
+    pliegues = stratified_folds(etiquetas, max(2, min(int(n_folds), X.shape[0])))
+    if max(len(p) for p in pliegues) >= X.shape[0] - int(n_components):
+        raise ValueError("Hay muy pocas muestras para la validación cruzada")
+
+    todos = np.arange(X.shape[0])
+    tareas = [(np.setdiff1d(todos, prueba), prueba) for prueba in pliegues]
+    n_jobs = default_jobs() if n_jobs is None else max(1, int(n_jobs))
+
+    if n_jobs == 1 or len(tareas) < 2 or X.size < min_size:
+        predicciones = [predict_fold(X, Y, train, test, method, int(n_components)) for train, test in tareas]
+    else:
+        with SharedArray.from_array(np.ascontiguousarray(X)) as compartida:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tareas))) as pool:
+                futures = [
+                    pool.submit(_run_fold, compartida.spec, Y, train, test, method, int(n_components))
+                    for train, test in tareas
+                ]
+                predicciones = [future.result() for future in futures]
+
+    Y_pred = np.empty_like(Y)
+    for (_, prueba), pred in zip(tareas, predicciones):
+        Y_pred[prueba] = pred.reshape(len(prueba), -1)
+
+    prediccion = decode_predictions(Y_pred)
+    real = np.searchsorted(clases, etiquetas)
+    return {
+        "q2": 1.0 - press(Y, Y_pred) / total_ss(Y),
+        "exactitud": float(np.mean(prediccion == real)),
+        "prediccion": [clases[i] for i in prediccion],
+    }
@@ -0,0 +1,108 @@
+"""
+Estimación del ruido y de los límites de detección y cuantificación.
+
+El ruido de cada muestra se estima en una ventana sin señal (desviación estándar tras
+quitar la tendencia lineal) o, si no se indica ventana, con la MAD de las primeras
+diferencias de todo el espectro, que es poco sensible a los picos.
+
+Para una región de n puntos, la integral es una suma de n valores con ruido σ, de modo
+que su desviación estándar es σ·√n. Con ella se definen
+    LOD = 3.3·σ·√n    y    LOQ = 10·σ·√n
+y la relación señal/ruido de la región es la altura máxima dividida por σ. Si las
+integrales se escalan por el paso ppm (reglas 'trapezoidal' y 'simpson'), LOD y LOQ se
+multiplican por ese mismo paso.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from src.suite.core.instrument import instrumented
+
+LOD_FACTOR = 3.3
+LOQ_FACTOR = 10.0
+
+
+def noise_mad(X: np.ndarray) -> np.ndarray:
+    """
+    Ruido de cada muestra a partir de la MAD de las primeras diferencias.
+
+    Retorna:
+    Vector con la desviación estándar estimada del ruido de cada muestra
+    """
+    d = np.diff(np.asarray(X, dtype=float), axis=1)
+    mad = np.median(np.abs(d - np.median(d, axis=1, keepdims=True)), axis=1)
+    return 1.4826 * mad / np.sqrt(2.0)
+
+
+def noise_from_window(X: np.ndarray, ppm: np.ndarray, ppm_min: float, ppm_max: float) -> np.ndarray:
+    """
+    Ruido de cada muestra en una ventana sin señal, quitando una tendencia lineal.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    ppm -- Vector ppm
+    ppm_min, ppm_max -- Límites de la ventana sin señal
+
+    Retorna:
+    Vector con la desviación estándar del ruido de cada muestra
+    """
+    mask = (ppm >= min(ppm_min, ppm_max)) & (ppm <= max(ppm_min, ppm_max))
+    if mask.sum() < 3:
+        raise ValueError("La ventana de ruido contiene menos de 3 puntos")
+
+    ventana = np.asarray(X[:, mask], dtype=float)
+    x = np.arange(ventana.shape[1], dtype=float)
+    coef = np.polyfit(x, ventana.T, 1)  # Una recta por muestra, en una sola llamada
+    residuos = ventana - (np.outer(coef[0], x) + coef[1][:, None])
+    return np.std(residuos, axis=1, ddof=2)
+
+
+def estimate_noise(
+        X: np.ndarray,
+        ppm: Optional[np.ndarray] = None,
+        window: Optional[Tuple[float, float]] = None
+) -> np.ndarray:
+    """Ruido por muestra: en la ventana indicada o, si no hay, por MAD"""
+    if window is None:
+        return noise_mad(X)
+    if ppm is None:
+        raise ValueError("Se necesita el vector ppm para usar una ventana de ruido")
+    return noise_from_window(X, ppm, *window)
+
+
+@instrumented("calidad_senal")
+def region_quality(
+        X: np.ndarray,
+        regions: Sequence[Tuple[int, int]],
+        ppm: Optional[np.ndarray] = None,
+        window: Optional[Tuple[float, float]] = None,
+        step: float = 1.0
+) -> Dict[str, np.ndarray]:
+    """
+    Calcula ruido, SNR, LOD y LOQ para cada muestra y región.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    regions -- Pares de índices (x1, x2), ambos incluidos
+    ppm -- Vector ppm (necesario si se usa una ventana de ruido)
+    window -- Ventana sin señal (ppm_min, ppm_max); None para usar la MAD
+    step -- Paso ppm de la regla de integración (integration.rule_step; 1 para 'suma')
+
+    Retorna:
+    Diccionario con 'ruido' (muestras), 'snr', 'lod' y 'loq' (muestras x regiones)
+    """
+    sigma = estimate_noise(X, ppm, window)
+    bordes = np.sort(np.asarray(regions, dtype=int).reshape(-1, 2), axis=1)
+
+    alturas = np.empty((X.shape[0], len(bordes)))
+    for j, (a, b) in enumerate(bordes):
+        alturas[:, j] = np.max(X[:, a:b + 1], axis=1)
+
+    sigma_integral = sigma[:, None] * (step * np.sqrt(bordes[:, 1] - bordes[:, 0] + 1))[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        snr = alturas / sigma[:, None]
+
+    return {
+        "ruido": sigma,
+        "snr": snr,
+        "lod": LOD_FACTOR * sigma_integral,
+        "loq": LOQ_FACTOR * sigma_integral,
+    }
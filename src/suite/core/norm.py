@@ -1,22 +1,39 @@
+from typing import Optional, Sequence, Tuple
+from src.suite.core.instrument import instrumented
+from src.suite.core.integration import IntegralIndex
+from src.suite.core.exclusions import exclusion_regions
 import numpy as np
 
 
-def total_area_normalization(X: np.ndarray, scale_to: float = 100.0) -> np.ndarray:
+def total_area_normalization(
+        X: np.ndarray,
+        scale_to: float = 100.0,
+        ppm: Optional[np.ndarray] = None,
+        exclusiones: Sequence[Tuple[float, float]] = ()
+) -> np.ndarray:
     """
     Normaliza cada espectro por el área total bajo la curva y escala a un valor específico.
 
     Parámetros:
     X -- Matriz de espectros con forma (n_muestras, n_puntos)
     scale_to -- Valor al que se escalará el área total (por defecto 100)
+    ppm -- Vector de desplazamientos químicos (requerido si hay exclusiones)
+    exclusiones -- Regiones (ppm_a, ppm_b) que no cuentan en el área total (agua, disolvente...)
 
     Retorna:
-    Matriz normalizada donde cada espectro suma `scale_to`
+    Matriz normalizada donde cada espectro, sin las regiones excluidas, suma `scale_to`
     """
     if X.size == 0:
         raise ValueError("La matriz de entrada está vacía")
 
-    # Calcular suma por muestra (eje 1)
-    row_sums = np.sum(X, axis=1)
+    # Área total por muestra menos las regiones excluidas, todas de la integral acumulada
+    regiones = [(0, X.shape[1] - 1)]
+    if len(exclusiones) > 0:
+        if ppm is None or len(ppm) != X.shape[1]:
+            raise ValueError("Se requiere el vector ppm para excluir regiones del área total")
+        regiones += exclusion_regions(ppm, exclusiones)
+    valores = IntegralIndex(X).integrate(regiones)
+    row_sums = valores[:, 0] - valores[:, 1:].sum(axis=1)
 
     # Evitar división por cero (reemplazar ceros por un valor pequeño)
     row_sums[row_sums == 0] = 1e-10
@@ -25,12 +42,14 @@ def total_area_normalization(X: np.ndarray, scale_to: float = 100.0) -> np.ndarr
     return (X / row_sums[:, np.newaxis]) * scale_to
 
 
-def pqn_normalization(X: np.ndarray) -> np.ndarray:
+def pqn_normalization(X: np.ndarray, reference: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Implementa la Normalización Probabilística de Cocientes (PQN).
 
     Parámetros:
     X -- Matriz de espectros con forma (n_muestras, n_puntos)
+    reference -- Máscara booleana de las muestras usadas para el espectro de referencia
+                 (por defecto, todas)
 
     Retorna:
     Matriz normalizada usando el método PQN
@@ -39,7 +58,7 @@ def pqn_normalization(X: np.ndarray) -> np.ndarray:
         raise ValueError("La matriz de entrada está vacía")
 
     # Calcular espectro de referencia (mediana de todas las muestras)
-    referencia = np.median(X, axis=0)
+    referencia = np.median(X if reference is None else X[reference], axis=0)
 
     # Evitar ceros en la referencia
     referencia[referencia == 0] = 1e-10
@@ -94,7 +113,7 @@ def internal_standard_normalization(
     ppm -- Vector de desplazamientos químicos
     ppm_min -- Límite inferior de la región de referencia
     ppm_max -- Límite superior de la región de referencia
-    metodo_integral -- Método para calcular el área ('suma' o 'trapezoidal')
+    metodo_integral -- Regla para calcular el área ('suma', 'trapezoidal' o 'simpson')
 
     Retorna:
     Matriz normalizada por el área de referencia
@@ -112,8 +131,9 @@ def internal_standard_normalization(
     if not np.any(mascara):
         raise ValueError(f"No hay puntos en el rango [{ppm_min}, {ppm_max}] ppm")
 
-    # Calcular área de referencia para cada muestra
-    areas_ref = np.sum(X[:, mascara], axis=1)
+    # Calcular área de referencia para cada muestra (solo se leen las columnas de la región)
+    columnas = np.flatnonzero(mascara)
+    areas_ref = region_integrals(X, [(columnas[0], columnas[-1])], ppm, metodo_integral)[:, 0]
 
     # Manejar áreas cero o negativas
     areas_ref[areas_ref <= 0] = 1e-10
@@ -121,10 +141,12 @@ def internal_standard_normalization(
     return X / areas_ref[:, np.newaxis]
 
 
+@instrumented("normalize")
 def normalize(
         X: np.ndarray,
         method: str = 'pqn',
         ppm: np.ndarray = None,
+        reference: Optional[np.ndarray] = None,
         **kwargs
 ) -> np.ndarray:
     """
@@ -133,7 +155,8 @@ def normalize(
     Parámetros:
     X -- Matriz de espectros
     method -- Método a usar: 'total_area', 'pqn', 'vector', 'internal_standard'
-    ppm -- Vector ppm (requerido solo para internal_standard)
+    ppm -- Vector ppm (requerido para internal_standard y para total_area con exclusiones)
+    reference -- Máscara de las muestras usadas para la referencia de PQN (p. ej. sin las atípicas)
     kwargs -- Argumentos adicionales específicos del método
 
     Retorna:
@@ -142,9 +165,9 @@ def normalize(
     method = method.lower()
 
     if method == 'total_area':
-        return total_area_normalization(X, **kwargs)
+        return total_area_normalization(X, ppm=ppm, **kwargs)
     elif method == 'pqn':
-        return pqn_normalization(X)
+        return pqn_normalization(X, reference)
     elif method == 'vector':
         return vector_normalization(X)
     elif method == 'internal_standard':
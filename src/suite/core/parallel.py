@@ -0,0 +1,156 @@
+"""
+Utilidades para repartir el trabajo por bloques de filas entre procesos.
+
+La matriz de entrada y la de salida se colocan una sola vez en memoria compartida
+(multiprocessing.shared_memory); cada proceso recibe solo el nombre del bloque y el
+rango de filas que le toca, de modo que la matriz no se copia ni se serializa.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+import os
+
+# Por debajo de este número de elementos no compensa lanzar procesos
+MIN_PARALLEL_SIZE = 2_000_000
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Abre un bloque existente sin hacerse responsable de liberarlo.
+
+    Los procesos del pool comparten el resource_tracker del proceso principal, donde el
+    bloque ya está registrado, así que en versiones anteriores a 3.13 basta con no
+    anular ese registro (hacerlo borraría el del creador).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedArray:
+    """
+    Arreglo de NumPy respaldado por un bloque de memoria compartida.
+
+    Quien crea el bloque es responsable de liberarlo (close + unlink); puede usarse
+    como context manager.
+    """
+
+    def __init__(self, shape, dtype=np.float64, name: Optional[str] = None):
+        dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        else:
+            self.shm = _open_untracked(name)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+
+    @classmethod
+    def from_array(cls, X: np.ndarray) -> "SharedArray":
+        """Crea un bloque compartido con una copia de X"""
+        shared = cls(X.shape, X.dtype)
+        shared.array[...] = X
+        return shared
+
+    @property
+    def spec(self) -> Tuple[str, tuple, str]:
+        """Descripción serializable para volver a abrir el bloque desde otro proceso"""
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    @classmethod
+    def attach(cls, spec: Tuple[str, tuple, str]) -> "SharedArray":
+        name, shape, dtype = spec
+        return cls(shape, dtype, name=name)
+
+    def close(self) -> None:
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def row_blocks(n_rows: int, n_blocks: int) -> List[Tuple[int, int]]:
+    """Divide n_rows filas en hasta n_blocks rangos contiguos (inicio, fin)"""
+    n_blocks = max(1, min(n_blocks, n_rows))
+    bordes = np.linspace(0, n_rows, n_blocks + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bordes[:-1], bordes[1:]) if b > a]
+
+
+def _run_block(worker, in_spec, out_spec, start, stop, params):
+    """Ejecuta el trabajador sobre un bloque de filas (en el proceso hijo)"""
+    entrada = SharedArray.attach(in_spec)
+    salida = SharedArray.attach(out_spec)
+    try:
+        worker(entrada.array[start:stop], salida.array[start:stop], start, stop, **params)
+    finally:
+        entrada.close()
+        salida.close()
+
+
+def map_row_blocks(
+        worker: Callable,
+        X: np.ndarray,
+        out_shape: Optional[tuple] = None,
+        out_dtype=np.float64,
+        n_jobs: Optional[int] = None,
+        min_size: int = MIN_PARALLEL_SIZE,
+        **params
+) -> np.ndarray:
+    """
+    Aplica `worker` por bloques de filas, en paralelo si la matriz es grande.
+
+    El trabajador debe ser una función de nivel de módulo con la firma
+        worker(X_bloque, salida_bloque, inicio, fin, **params)
+    y escribir su resultado en `salida_bloque` (mismas filas que `X_bloque`).
+
+    Parámetros:
+    worker -- Función que procesa un bloque de filas
+    X -- Matriz de entrada (muestras x puntos), o un SharedArray ya creado
+    out_shape -- Forma de la salida (por defecto, la de X)
+    out_dtype -- Tipo de la salida
+    n_jobs -- Número de procesos (por defecto, todos los núcleos; 1 = sin procesos)
+    min_size -- Número de elementos de X por debajo del cual no se lanzan procesos
+    params -- Argumentos adicionales para el trabajador (deben ser serializables)
+
+    Retorna:
+    Matriz de salida
+    """
+    shared_in = X if isinstance(X, SharedArray) else None
+    X_arr = shared_in.array if shared_in is not None else X
+    n_rows = X_arr.shape[0]
+    out_shape = out_shape or X_arr.shape
+    n_jobs = default_jobs() if n_jobs is None else max(1, int(n_jobs))
+
+    if n_jobs == 1 or n_rows < 2 or X_arr.size < min_size:
+        out = np.empty(out_shape, dtype=out_dtype)
+        worker(X_arr, out, 0, n_rows, **params)
+        return out
+
+    propio = shared_in is None
+    entrada = SharedArray.from_array(np.ascontiguousarray(X_arr)) if propio else shared_in
+    salida = SharedArray(out_shape, out_dtype)
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [
+                pool.submit(_run_block, worker, entrada.spec, salida.spec, start, stop, params)
+                for start, stop in row_blocks(n_rows, n_jobs * 4)
+            ]
+            for future in futures:
+                future.result()
+        return salida.array.copy()
+    finally:
+        salida.close()
+        if propio:
+            entrada.close()
@@ -0,0 +1,154 @@
+"""
+Detección automática de picos y propuesta de regiones de integración.
+
+Los picos se detectan sobre un espectro representativo (promedio o un cuantil de las
+muestras) con scipy.signal.find_peaks, filtrando por prominencia. Cada región se extiende
+desde el pico hasta el valle más bajo de cada lado, sin pasar del pico vecino; los picos
+que no quedan separados por un valle profundo (multipletes) se fusionan en una sola región.
+"""
+from typing import List, Optional, Tuple, Union
+from scipy.signal import find_peaks, peak_widths
+import numpy as np
+from src.suite.core.instrument import instrumented
+
+
+def reference_spectrum(X: np.ndarray, mode: Union[str, float] = "mean") -> np.ndarray:
+    """
+    Espectro sobre el que se buscan los picos.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    mode -- 'mean', 'median' o un cuantil entre 0 y 1 (p. ej. 0.9 para ver picos que solo
+            aparecen en parte de las muestras)
+    """
+    if mode == "mean":
+        return np.mean(X, axis=0)
+    if mode == "median":
+        return np.median(X, axis=0)
+    q = float(mode)
+    if not 0 <= q <= 1:
+        raise ValueError("El cuantil debe estar entre 0 y 1")
+    return np.quantile(X, q, axis=0)
+
+
+def noise_level(y: np.ndarray) -> float:
+    """Estimación robusta del ruido: MAD de las primeras diferencias"""
+    d = np.diff(y)
+    return float(1.4826 * np.median(np.abs(d - np.median(d))) / np.sqrt(2.0))
+
+
+def pick_peaks(
+        y: np.ndarray,
+        prominence: Optional[float] = None,
+        snr: float = 10.0,
+        min_distance: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Detecta los picos de un espectro.
+
+    Parámetros:
+    y -- Espectro (1D)
+    prominence -- Prominencia mínima; si es None se usa snr veces el nivel de ruido
+    snr -- Múltiplo del ruido usado cuando no se indica la prominencia
+    min_distance -- Distancia mínima entre picos, en puntos
+
+    Retorna:
+    peaks -- Índices de los picos
+    widths -- Ancho a media altura de cada pico, en puntos
+    """
+    if prominence is None:
+        prominence = snr * max(noise_level(y), np.finfo(float).tiny)
+    peaks, _ = find_peaks(y, prominence=prominence, distance=max(1, int(min_distance)))
+    if len(peaks) == 0:
+        return peaks, np.zeros(0)
+    widths = peak_widths(y, peaks, rel_height=0.5)[0]
+    return peaks, widths
+
+
+def snap_to_minima(
+        y: np.ndarray,
+        peaks: np.ndarray,
+        widths: np.ndarray,
+        extent: float = 3.0
+) -> np.ndarray:
+    """
+    Calcula los límites de cada pico ajustados al valle más bajo de cada lado.
+
+    La búsqueda llega como máximo a `extent` anchos del pico y nunca pasa del pico vecino.
+
+    Retorna:
+    Matriz (picos x 2) con los índices (inicio, fin) de cada región
+    """
+    n = len(y)
+    alcance = np.maximum(1, np.ceil(extent * widths)).astype(int)
+    tope_izq = np.maximum(np.concatenate([[0], peaks[:-1]]), peaks - alcance)
+    tope_der = np.minimum(np.concatenate([peaks[1:], [n - 1]]), peaks + alcance)
+
+    bordes = np.empty((len(peaks), 2), dtype=int)
+    for i, p in enumerate(peaks):
+        bordes[i, 0] = tope_izq[i] + int(np.argmin(y[tope_izq[i]:p + 1]))
+        bordes[i, 1] = p + int(np.argmin(y[p:tope_der[i] + 1]))
+    return bordes
+
+
+def merge_unresolved(
+        y: np.ndarray,
+        peaks: np.ndarray,
+        bordes: np.ndarray,
+        merge_ratio: float = 0.5
+) -> List[Tuple[int, int]]:
+    """
+    Fusiona regiones contiguas cuyo valle común supera merge_ratio de la altura del
+    pico más bajo (señales no resueltas, p. ej. multipletes).
+    """
+    if len(peaks) == 0:
+        return []
+
+    regiones = [[int(bordes[0, 0]), int(bordes[0, 1])]]
+    altura_min = [y[peaks[0]]]
+    for i in range(1, len(peaks)):
+        valle = y[bordes[i, 0]]
+        contiguas = bordes[i, 0] <= regiones[-1][1]
+        if contiguas and valle > merge_ratio * min(altura_min[-1], y[peaks[i]]):
+            regiones[-1][1] = int(bordes[i, 1])
+            altura_min[-1] = min(altura_min[-1], y[peaks[i]])
+        else:
+            # El punto del valle queda en la región anterior (bordes incluidos)
+            regiones.append([int(max(bordes[i, 0], regiones[-1][1] + 1)), int(bordes[i, 1])])
+            altura_min.append(y[peaks[i]])
+    return [(a, b) for a, b in regiones if b > a]
+
+
+@instrumented("deteccion_picos")
+def propose_regions(
+        X: np.ndarray,
+        mode: Union[str, float] = "mean",
+        prominence: Optional[float] = None,
+        snr: float = 10.0,
+        merge_ratio: float = 0.5,
+        extent: float = 3.0
+) -> List[Tuple[int, int]]:
+    """
+    Propone regiones de integración a partir de los picos del espectro representativo.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm) o un espectro (1D)
+    mode -- Espectro de referencia: 'mean', 'median' o un cuantil (ver reference_spectrum)
+    prominence -- Prominencia mínima (None = automática a partir del ruido)
+    snr -- Múltiplo del ruido para la prominencia automática
+    merge_ratio -- Umbral de fusión de picos no resueltos (0 = no fusionar)
+    extent -- Alcance máximo de cada región, en anchos de pico
+
+    Retorna:
+    Lista de pares de índices (inicio, fin), ordenada por índice
+    """
+    X = np.asarray(X, dtype=float)
+    y = X if X.ndim == 1 else reference_spectrum(X, mode)
+
+    peaks, widths = pick_peaks(y, prominence, snr)
+    if len(peaks) == 0:
+        return []
+    bordes = snap_to_minima(y, peaks, widths, extent)
+    if merge_ratio <= 0:
+        return [(int(a), int(b)) for a, b in bordes if b > a]
+    return merge_unresolved(y, peaks, bordes, merge_ratio)
@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.suite.core.trnsf import transform
+from src.suite.core.norm import normalize
+from src.suite.core.scaling import scale
+from src.suite.core.baseline import baseline_correct
+from src.suite.core.lazy import lazy_import
+
+qc = lazy_import("src.suite.core.qc")
+
+# Orden fijo de las etapas del procesamiento de sNMR. El control de calidad va antes de la
+# normalización y el escalado para que las muestras atípicas no afecten a sus estadísticas.
+STAGES = ("linea_base", "transformacion", "control_calidad", "normalizacion", "escalado")
+
+
+def apply_stage(
+        stage: str,
+        X: np.ndarray,
+        ppm: np.ndarray,
+        method: Optional[str],
+        params: Optional[dict] = None,
+        reference: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Aplica una etapa del procesamiento.
+
+    Parámetros:
+    stage -- Nombre de la etapa (ver STAGES)
+    X -- Matriz de entrada (muestras x puntos ppm)
+    ppm -- Vector ppm correspondiente a las columnas de X
+    method -- Método de la etapa, o None para no aplicar nada
+    params -- Argumentos adicionales del método
+    reference -- Máscara de las muestras usadas para las estadísticas de la normalización
+                 y el escalado (ver qc.quality_control)
+
+    Retorna:
+    Matriz resultante (X sin cambios si method es None)
+    """
+    params = dict(params or {})
+    if method is None:
+        return X
+
+    if stage == "linea_base":
+        return baseline_correct(X, method=method, **params)
+    elif stage == "transformacion":
+        return transform(X, method=method, **params)
+    elif stage == "control_calidad":
+        return qc.quality_control(X, method=method, **params)[0]
+    elif stage == "normalizacion":
+        return normalize(X, method=method, ppm=ppm, reference=reference, **params)
+    elif stage == "escalado":
+        return scale(X, method=method, reference=reference, **params)
+    else:
+        raise ValueError(f"Etapa no reconocida: {stage}")
+
+
+def run_pipeline(
+        X: np.ndarray,
+        ppm: np.ndarray,
+        config: Dict[str, Tuple[Optional[str], dict]],
+        report: Optional[dict] = None
+) -> np.ndarray:
+    """
+    Aplica todas las etapas configuradas, en orden, sobre la matriz completa.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    ppm -- Vector ppm
+    config -- Diccionario {etapa: (método, parámetros)}; las etapas ausentes no se aplican
+    report -- Diccionario opcional donde se guarda el informe del control de calidad
+              (clave 'control_calidad', ver qc.quality_control)
+
+    Retorna:
+    Matriz procesada (sin las muestras excluidas por el control de calidad)
+    """
+    referencia = None
+    for stage in STAGES:
+        method, params = config.get(stage, (None, {}))
+        if stage == "control_calidad" and method is not None:
+            X, informe = qc.quality_control(X, method=method, **params)
+            referencia = informe["referencia"]
+            if report is not None:
+                report[stage] = informe
+            continue
+        X = apply_stage(stage, X, ppm, method, params, reference=referencia)
+    return X
+
+
+def select_preview_subset(
+        X: np.ndarray,
+        n_samples: int = 8,
+        max_points: int = 2048
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Elige un subconjunto representativo de muestras y un eje ppm diezmado.
+
+    Las muestras se ordenan por área total y se toman a rangos equiespaciados, de modo
+    que el subconjunto incluye la de menor área, la mediana y la de mayor área. El eje
+    ppm se diezma tomando un punto cada `paso` para no superar `max_points`.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    n_samples -- Número máximo de muestras de la vista previa
+    max_points -- Número máximo de puntos ppm de la vista previa
+
+    Retorna:
+    sample_idx -- Índices de las muestras elegidas
+    point_idx -- Índices de los puntos ppm elegidos
+    """
+    if X.size == 0:
+        raise ValueError("La matriz de entrada está vacía")
+
+    n_total, n_points = X.shape
+    orden = np.argsort(np.nansum(X, axis=1))
+    if n_total <= n_samples:
+        sample_idx = np.sort(orden)
+    else:
+        rangos = np.round(np.linspace(0, n_total - 1, n_samples)).astype(int)
+        sample_idx = np.sort(orden[rangos])
+
+    paso = max(1, int(np.ceil(n_points / max_points)))
+    point_idx = np.arange(0, n_points, paso)
+
+    return sample_idx, point_idx
+
+
+class IncrementalPipeline:
+    """
+    Procesamiento por etapas que guarda el resultado de cada una.
+
+    Al cambiar la configuración de una etapa solo se recalculan esa etapa y las
+    siguientes; las anteriores se reutilizan desde la caché.
+
+    Si X es un eje ppm diezmado (un punto cada `point_step`), el λ de la línea base se
+    divide por point_step**4 para que la penalización de segundas diferencias tenga la
+    misma rigidez que sobre el eje completo.
+
+    El informe del último control de calidad calculado queda en `qc_report`.
+    """
+
+    def __init__(self, X: np.ndarray, ppm: np.ndarray, point_step: int = 1):
+        self.X = X
+        self.ppm = ppm
+        self.point_step = max(1, int(point_step))
+        self._config: Dict[str, Tuple[Optional[str], dict]] = {stage: (None, {}) for stage in STAGES}
+        self._cache: Dict[str, np.ndarray] = {}
+        self.last_recomputed: List[str] = []
+        self.qc_report: Optional[dict] = None
+
+    def configure(self, stage: str, method: Optional[str], params: Optional[dict] = None) -> bool:
+        """
+        Cambia el método de una etapa. Devuelve True si la configuración cambió.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Etapa no reconocida: {stage}")
+
+        nueva = (method, dict(params or {}))
+        if self._config[stage] == nueva:
+            return False
+
+        self._config[stage] = nueva
+        self._invalidate_from(stage)
+        return True
+
+    def configure_all(self, config: Dict[str, Tuple[Optional[str], dict]]) -> None:
+        for stage in STAGES:
+            method, params = config.get(stage, (None, {}))
+            self.configure(stage, method, params)
+
+    def _invalidate_from(self, stage: str) -> None:
+        for s in STAGES[STAGES.index(stage):]:
+            self._cache.pop(s, None)
+
+    def run(self) -> np.ndarray:
+        """Devuelve el resultado de la última etapa recalculando solo lo necesario"""
+        self.last_recomputed = []
+        X = self.X
+        referencia = None
+        for stage in STAGES:
+            if stage not in self._cache:
+                method, params = self._config[stage]
+                if stage == "linea_base" and "lam" in params and self.point_step > 1:
+                    params = dict(params, lam=params["lam"] / self.point_step ** 4)
+                if stage == "control_calidad":
+                    self.qc_report = None
+                    if method is not None:
+                        X, self.qc_report = qc.quality_control(X, method=method, **params)
+                else:
+                    X = apply_stage(stage, X, self.ppm, method, params, reference=referencia)
+                self._cache[stage] = X
+                self.last_recomputed.append(stage)
+            else:
+                X = self._cache[stage]
+            if stage == "control_calidad" and self.qc_report is not None:
+                referencia = self.qc_report["referencia"]
+        return X
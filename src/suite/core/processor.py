@@ -1,63 +1,635 @@
-import pandas as pd
-import numpy as np
+from src.suite.core.instrument import instrumented, stage
+from src.suite.core.lazy import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+baseline = lazy_import("src.suite.core.baseline")
+align = lazy_import("src.suite.core.align")
+calibration = lazy_import("src.suite.core.calibration")
+deconv = lazy_import("src.suite.core.deconv")
+integration = lazy_import("src.suite.core.integration")
+peaks = lazy_import("src.suite.core.peaks")
+noise = lazy_import("src.suite.core.noise")
+uncertainty = lazy_import("src.suite.core.uncertainty")
+stocsy = lazy_import("src.suite.core.stocsy")
+resample = lazy_import("src.suite.core.resample")
+integral_cache = lazy_import("src.suite.core.cache")
+exclusions = lazy_import("src.suite.core.exclusions")
+templates = lazy_import("src.suite.core.templates")
+session_io = lazy_import("src.suite.core.session")
 
 
 class RMNProcessor:
     def __init__(self):
         self.df = None
-        self.integrales_df = pd.DataFrame()
+        self.integrales_df = None  # Se crea vacío en el primer acceso (evita importar pandas al inicio)
         self.val_x = None
         self.val_y = None
         self.muestras = None
         self.prom_y = None
-        self.integrales_totales = None  # Nuevo: almacenará integrales totales por muestra
+        self._totales = None  # Integrales totales por muestra, sin las exclusiones (integrales_totales)
+        self.regiones = []  # Regiones integradas como pares de índices (x1, x2)
+        self.deconvoluciones = []  # Regiones deconvolucionadas como (x1, x2, n_picos, forma)
+        self.columnas_deconv = {}  # Columna de área -> región (x1, x2) de la que proviene
+        self.pasos_deconv = {}  # Columna de área -> |Δppm| local en el centro del pico
+        self.calidad = None  # Ruido, SNR, LOD y LOQ por muestra y región (calculate_quality)
+        self._indice = None  # Suma acumulada de val_y para integrar regiones (get_integral_index)
+        self._huella = None  # Hash de val_x y val_y para la caché de integrales (get_dataset_hash)
+        self._integrador = None  # Backend de integración por lotes (get_integrator)
+        self.n_jobs = None  # Procesos para integrar matrices grandes (None = todos los núcleos)
+        self.info_regiones = {}  # Columna -> nombre, protones y metabolito (plantillas de regiones)
+        self.usar_cache = True  # Consultar la caché persistente de integrales (cache.default_cache)
+        self.metodo_integral = "suma"  # Regla de integración de las regiones (integration.RULES)
+        self.exclusiones = []  # Regiones (ppm_a, ppm_b) fuera de las integrales totales (agua, disolvente...)
+
+    @property
+    def integrales_totales(self):
+        """Integral total de cada muestra sin las regiones excluidas, calculada una sola vez"""
+        if self._totales is None and self.val_y is not None:
+            self._totales = self.calculate_totals()
+        return self._totales
+
+    @property
+    def integrales_df(self):
+        if self._integrales_df is None:
+            self._integrales_df = pd.DataFrame()
+        return self._integrales_df
 
+    @integrales_df.setter
+    def integrales_df(self, value):
+        self._integrales_df = value
+
+    @instrumented("load_file")
     def load_file(self, ruta):
         extension = ruta.split('.')[-1].lower()
 
-        if extension == 'csv':
-            df = pd.read_csv(ruta, header=None, low_memory=False)
-        elif extension == 'txt':
-            df = pd.read_csv(ruta, delimiter=',', header=None, low_memory=False)
-        else:
-            raise ValueError("Formato no soportado. Use archivos .csv o .txt")
+        with stage("load_file.parse"):
+            if extension == 'csv':
+                df = pd.read_csv(ruta, header=None, low_memory=False)
+            elif extension == 'txt':
+                df = pd.read_csv(ruta, delimiter=',', header=None, low_memory=False)
+            else:
+                raise ValueError("Formato no soportado. Use archivos .csv o .txt")
+
+        # Las regiones, integrales y deconvoluciones son del set de datos anterior
+        self.reset()
 
-        self.df = df.T
-        self._process_data()
+        with stage("load_file.transpose", shape=list(df.shape)):
+            self.df = df.T
+
+        with stage("load_file.process"):
+            self._process_data()
         return self.df
 
+    def load_arrays(self, val_x, val_y, muestras):
+        """Carga un set de datos ya procesado en memoria (sin volver a leer el archivo)"""
+        self.reset()
+        self.val_x = np.asarray(val_x, dtype=float)
+        self.val_y = np.asarray(val_y, dtype=float)
+        self.muestras = list(muestras)
+        self.prom_y = np.mean(self.val_y, axis=0)
+
+    def update_spectra(self, val_y):
+        """
+        Reemplaza la matriz de espectros (misma forma) y recalcula el espectro promedio,
+        las integrales totales y las integrales de las regiones ya definidas.
+        """
+        val_y = np.asarray(val_y, dtype=float)
+        if self.val_y is None or val_y.shape != self.val_y.shape:
+            raise ValueError("La nueva matriz no coincide con los datos cargados")
+
+        self.val_y = val_y
+        self._discard_indexes()
+        self.prom_y = np.mean(self.val_y, axis=0)
+
+        regiones = list(self.regiones)
+        deconvoluciones = list(self.deconvoluciones)
+        self.integrales_df = None
+        self.regiones = []
+        self.deconvoluciones = []
+        self.columnas_deconv = {}
+        self.pasos_deconv = {}
+        self.calidad = None
+        self.calculate_integrals(regiones)
+        for x1, x2, n_picos, forma in deconvoluciones:
+            self.deconvolve_region(x1, x2, n_picos, forma)
+
+    def resample_axis(self, target, method='linear'):
+        """
+        Remuestrea todas las muestras a otro eje ppm y vuelve a integrar las regiones
+        (y deconvoluciones) ya definidas en sus mismos desplazamientos químicos.
+
+        Parámetros:
+        target -- Eje ppm de destino
+        method -- 'linear', 'cubic' o 'area'
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        target = np.asarray(target, dtype=float)
+        val_y = resample.resample(self.val_y, self.val_x, target, method)
+
+        regiones = self.get_regiones_ppm()
+        deconvoluciones = [(self.val_x[x1], self.val_x[x2], n_picos, forma)
+                           for x1, x2, n_picos, forma in self.deconvoluciones]
+        self.val_x = target
+        self.val_y = val_y
+        self._discard_indexes()
+        self.prom_y = np.mean(self.val_y, axis=0)
+
+        self.integrales_df = None
+        self.regiones = []
+        self.deconvoluciones = []
+        self.columnas_deconv = {}
+        self.pasos_deconv = {}
+        self.calidad = None
+        self.calculate_integrals([(self.ppm_to_index(a), self.ppm_to_index(b)) for a, b in regiones])
+        for a, b, n_picos, forma in deconvoluciones:
+            self.deconvolve_region(self.ppm_to_index(a), self.ppm_to_index(b), n_picos, forma)
+
+    def append_arrays(self, val_x, val_y, muestras, method='linear'):
+        """
+        Agrega muestras adquiridas con otro eje ppm, remuestreadas al eje actual, y vuelve
+        a integrar las regiones ya definidas.
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        _, val_y, muestras = resample.combine(
+            [(self.val_x, self.val_y, self.muestras), (np.asarray(val_x, dtype=float), val_y, list(muestras))],
+            target=self.val_x, method=method
+        )
+        self.muestras = muestras
+        self.val_y = val_y  # Cambia el número de filas: update_spectra recalcula el resto
+        self.update_spectra(val_y)
+
+    def correct_baseline(self, method='als', lam=1e5, p=0.01):
+        """Corrige la línea base de todas las muestras (ALS o arPLS)"""
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        self.update_spectra(baseline.baseline_correct(self.val_y, method, lam, p))
+
+    def align_spectra(self, target='mean', n_intervals=1, max_shift=None, usar_regiones=False):
+        """
+        Alinea las muestras al espectro promedio o mediano (por intervalos).
+
+        Si usar_regiones es True, cada región integrada es un intervalo de alineamiento;
+        en caso contrario el espectro se divide en n_intervals intervalos iguales.
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+
+        intervals = None
+        if usar_regiones:
+            if not self.regiones:
+                raise ValueError("No hay regiones integradas para usar como intervalos")
+            intervals = [(x1, x2 + 1) for x1, x2 in self.regiones]
+
+        self.update_spectra(align.align_spectra(self.val_y, target, intervals, n_intervals, max_shift))
+
+    def calibrate_reference(self, target_ppm=0.0, ventana=0.2):
+        """
+        Calibra el eje de todas las muestras con el pico de referencia (TSP/DSS).
+
+        Parámetros:
+        target_ppm -- Desplazamiento químico asignado a la referencia
+        ventana -- Semiancho (ppm) de la ventana de búsqueda alrededor de target_ppm
+
+        Retorna:
+        Serie con la corrección aplicada a cada muestra, en ppm
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        calibrado, correcciones = calibration.calibrate(
+            self.val_y, self.val_x, target_ppm, (target_ppm - ventana, target_ppm + ventana)
+        )
+        self.update_spectra(calibrado)
+        return pd.Series(correcciones, index=self.muestras, name="Corrección (ppm)")
+
     def _process_data(self):
         if self.df is not None:
             self.val_x = self.df.iloc[0, 1:].values.astype(float)
             self.val_y = self.df.iloc[1:, 1:].values.astype(float)
+            self._discard_indexes()
             self.muestras = self.df.iloc[1:, 0].tolist()
             self.prom_y = np.mean(self.val_y, axis=0)
-            # Calcular integrales totales para cada muestra
-            self.integrales_totales = np.sum(self.val_y, axis=1)
 
+    @instrumented("integracion")
     def calculate_integral(self, x1, x2):
         x1, x2 = sorted([x1, x2])
-        region_df = self.val_y[:, x1:x2 + 1]
 
-        # Calcular integrales
-        integral_values = np.sum(region_df, axis=1)
+        # Calcular integrales con la regla elegida (caché y backend de integración por lotes)
+        integral_values = self._integrate([(x1, x2)])[:, 0]
 
         # Actualizar DataFrame de integrales
-        col_name = f"{self.val_x[x1]:.4f} - {self.val_x[x2]:.4f}"
+        col_name = self.region_name(x1, x2)
+        if col_name not in self.integrales_df.columns:
+            self.regiones.append((x1, x2))
         self.integrales_df[col_name] = integral_values
         self.integrales_df.index = self.muestras
 
-        # Datos para visualización
+        return self.region_plot_data(x1, x2)
+
+    def region_plot_data(self, x1, x2):
+        """Datos para dibujar la curva integral de una región ya definida"""
+        x1, x2 = sorted([x1, x2])
         y_integral = np.cumsum(self.prom_y[x1:x2 + 1])
         if len(y_integral) > 0 and max(y_integral) > 0:
-            y_integral = (y_integral / max(y_integral)) * np.max(region_df, axis=0).max()
+            y_integral = (y_integral / max(y_integral)) * self.val_y[:, x1:x2 + 1].max()
         else:
             y_integral = np.zeros_like(y_integral)
 
         return self.val_x[x1], self.val_x[x2], self.val_x[x1:x2 + 1], y_integral
 
+    def region_name(self, x1, x2):
+        """Nombre de la columna de integrales_df para la región (x1, x2)"""
+        return f"{self.val_x[x1]:.4f} - {self.val_x[x2]:.4f}"
+
+    def _discard_indexes(self):
+        """Descarta la suma acumulada, la huella, los totales y el backend de integración de los datos anteriores"""
+        self._indice = None
+        self._huella = None
+        self._totales = None
+        if self._integrador is not None:
+            if isinstance(self._integrador, integration.SharedIntegrator):
+                self._integrador.close()
+            self._integrador = None
+
+    def get_integrator(self):
+        """
+        Backend para integrar lotes de regiones: en memoria compartida y en paralelo si la
+        matriz es grande (integration.make_integrator), o la suma acumulada si no.
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        if self._integrador is None:
+            if self._indice is not None:
+                self._integrador = self._indice  # Ya calculada: integrar con ella es inmediato
+            else:
+                self._integrador = integration.make_integrator(self.val_y, self.n_jobs, x=self.val_x,
+                                                               rule=self.metodo_integral)
+                if isinstance(self._integrador, integration.IntegralIndex):
+                    self._indice = self._integrador
+        return self._integrador
+
+    def get_integral_index(self):
+        """Índice de integración (integral acumulada) de los datos actuales, creado una sola vez"""
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        if self._indice is None:
+            self._indice = integration.IntegralIndex(self.val_y, self.val_x, self.metodo_integral)
+        return self._indice
+
+    def set_integration_method(self, metodo):
+        """
+        Cambia la regla de integración ('suma', 'trapezoidal' o 'simpson') y vuelve a
+        integrar las regiones ya definidas. Las integrales cambian de unidades, así que los
+        factores K calculados con la regla anterior dejan de valer. Las áreas de las
+        deconvoluciones se pasan a las mismas unidades (paso ppm local de cada pico).
+        """
+        if metodo not in integration.RULES:
+            raise ValueError(f"Regla de integración no reconocida: {metodo}")
+        if metodo == self.metodo_integral:
+            return
+        anterior, self.metodo_integral = self.metodo_integral, metodo
+        if self.val_y is None:
+            return
+
+        # La huella de los datos no cambia; sí la integral acumulada y el backend
+        huella = self._huella
+        self._discard_indexes()
+        self._huella = huella
+        self.calidad = None
+        if self.regiones:
+            self.calculate_integrals(self.regiones)
+        for col, paso in self.pasos_deconv.items():
+            if col in self.integrales_df.columns:
+                self.integrales_df[col] *= self._deconv_scale(paso) / self._deconv_scale(paso, anterior)
+
+    def release_file(self, path):
+        """
+        Cambia por copias en memoria val_x y val_y si están mapeados desde `path` (una
+        sesión abierta), para poder sobrescribir ese archivo. Los datos no cambian, así que
+        la huella y los índices de integración siguen valiendo.
+        """
+        self.val_x = session_io.in_memory(self.val_x, path)
+        self.val_y = session_io.in_memory(self.val_y, path)
+
+    def get_dataset_hash(self):
+        """Huella de los datos actuales (eje y espectros), calculada una sola vez"""
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        if self._huella is None:
+            self._huella = integral_cache.dataset_hash(self.val_x, self.val_y)
+        return self._huella
+
+    def get_cache(self):
+        """Caché de integrales a consultar, o None si no se usa"""
+        return integral_cache.default_cache() if self.usar_cache else None
+
+    def _integrate(self, regiones):
+        """Matriz (muestras x regiones) de integrales, consultando primero la caché"""
+        almacen = self.get_cache()
+        return integral_cache.cached_integrals(
+            almacen, self.get_dataset_hash() if almacen is not None else "", regiones,
+            lambda faltan: self.get_integrator().integrate(faltan), mode=self.metodo_integral
+        )
+
+    def set_exclusions(self, exclusiones):
+        """
+        Cambia las regiones (ppm_a, ppm_b) excluidas de las integrales totales y, por lo
+        tanto, de las integrales relativas.
+        """
+        self.exclusiones = [tuple(sorted((float(a), float(b)))) for a, b in exclusiones]
+        self._totales = None
+
+    def calculate_totals(self):
+        """
+        Integral total de cada muestra menos las regiones excluidas, con la regla de
+        integración actual: todo el espectro y cada exclusión son regiones del índice de
+        integración, así que cada total cuesta O(muestras) sin copiar la matriz.
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        regiones = [(0, self.val_y.shape[1] - 1)] + exclusions.exclusion_regions(self.val_x, self.exclusiones)
+        valores = self._integrate(regiones)
+        return valores[:, 0] - valores[:, 1:].sum(axis=1)
+
+    def calculate_integrals(self, regiones):
+        """
+        Integra varias regiones en una sola pasada (integral acumulada, con la regla
+        metodo_integral) y las agrega a integrales_df.
+
+        Parámetros:
+        regiones -- Lista de pares de índices (x1, x2)
+
+        Retorna:
+        Lista con los nombres de las columnas calculadas
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        regiones = [tuple(sorted((int(x1), int(x2)))) for x1, x2 in regiones]
+        if not regiones:
+            return []
+
+        valores = self._integrate(regiones)
+        nombres = [self.region_name(x1, x2) for x1, x2 in regiones]
+
+        nuevas = pd.DataFrame(valores, index=self.muestras, columns=nombres)
+        nuevas = nuevas.loc[:, ~nuevas.columns.duplicated()]
+        if self.integrales_df.columns.empty:
+            self.integrales_df = nuevas
+        else:
+            # Las columnas ya presentes se actualizan en su lugar (se conserva el orden);
+            # solo las nuevas se agregan al final
+            agregar = nuevas.columns.difference(self.integrales_df.columns, sort=False)
+            for col in nuevas.columns.difference(agregar, sort=False):
+                self.integrales_df[col] = nuevas[col].values
+            if len(agregar):
+                self.integrales_df = pd.concat([self.integrales_df, nuevas[agregar]], axis=1)
+
+        for region, nombre in zip(regiones, nombres):
+            if region not in self.regiones and nombre in nuevas.columns:
+                self.regiones.append(region)
+        return list(nuevas.columns)
+
+    def apply_template(self, plantilla):
+        """
+        Integra las regiones de una plantilla (templates.read_template) y guarda su nombre,
+        protones y metabolito.
+
+        Retorna:
+        Lista con los nombres de las columnas calculadas
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        plantilla = templates.normalize_template(plantilla)
+        regiones = templates.template_regions(plantilla, self.val_x)
+
+        info = {}
+        for region, fila in zip(regiones, plantilla.to_dict("records")):
+            columna = self.region_name(*region)
+            if columna in info:
+                raise ValueError(f"Las regiones {info[columna]['nombre']} y {fila['nombre']} "
+                                 f"coinciden en el eje de estos datos")
+            info[columna] = {"nombre": fila["nombre"], "protones": fila["protones"],
+                             "metabolito": fila["metabolito"]}
+        columnas = self.calculate_integrals(regiones)
+        self.info_regiones.update(info)
+        return columnas
+
+    def get_template(self):
+        """Plantilla con las regiones integradas actuales (y sus datos, si vienen de una plantilla)"""
+        if not self.regiones:
+            raise ValueError("No hay regiones integradas")
+        return templates.template_from_regions(
+            self.get_regiones_ppm(),
+            [self.info_regiones.get(self.region_name(x1, x2), {}) for x1, x2 in self.regiones]
+        )
+
+    def get_template_integrals(self):
+        """Integrales de las regiones que vienen de una plantilla, con los nombres de la plantilla"""
+        columnas = [self.region_name(x1, x2) for x1, x2 in self.regiones]
+        columnas = [c for c in columnas if c in self.info_regiones]
+        return self.integrales_df[columnas].rename(
+            columns={c: self.info_regiones[c]["nombre"] for c in columnas}
+        )
+
+    def replace_regions(self, regiones):
+        """
+        Reemplaza todas las regiones integradas por las indicadas (p. ej. tras editarlas).
+        Las columnas de deconvolución se conservan.
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        anteriores = [self.region_name(x1, x2) for x1, x2 in self.regiones]
+        self.integrales_df = self.integrales_df.drop(columns=anteriores, errors="ignore")
+        self.regiones = []
+        self.calidad = None
+        return self.calculate_integrals(regiones)
+
+    def propose_regions(self, modo='mean', prominencia=None, snr=10.0, fusion=0.5):
+        """
+        Propone regiones de integración a partir de los picos del espectro de referencia.
+
+        Parámetros:
+        modo -- 'mean', 'median' o un cuantil entre 0 y 1
+        prominencia -- Prominencia mínima (None = automática, snr veces el ruido)
+        snr -- Múltiplo del ruido para la prominencia automática
+        fusion -- Umbral para fusionar picos no resueltos (0 = no fusionar)
+
+        Retorna:
+        Lista de pares de índices (x1, x2)
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        y = self.prom_y if modo == 'mean' else self.val_y
+        return peaks.propose_regions(y, modo, prominencia, snr, fusion)
+
+    def deconvolve_region(self, x1, x2, n_picos, forma='lorentziana'):
+        """
+        Ajusta una suma de picos a la región en todas las muestras y agrega el área de
+        cada pico como una columna más de integrales_df.
+
+        Retorna:
+        Lista con los nombres de las columnas agregadas
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        x1, x2 = sorted([x1, x2])
+
+        areas, params = deconv.deconvolve(self.val_y, x1, x2, n_picos, forma)
+        centros = deconv.peak_centers(params, forma, n_picos, x1)
+        # Índice fraccionario -> ppm interpolando en el eje (vale también con paso no uniforme)
+        indices = np.arange(len(self.val_x))
+        centros_ppm = np.interp(centros, indices, self.val_x)
+        # Las áreas se ajustan en intensidad·punto; con las reglas que escalan por Δppm se
+        # multiplican por el paso local en el centro de cada pico
+        pasos = np.interp(centros, indices, np.abs(np.gradient(self.val_x)))
+
+        columnas = []
+        for i, centro in enumerate(centros_ppm):
+            col_name = f"{centro:.4f} ({forma} {i + 1}/{n_picos})"
+            self.integrales_df[col_name] = areas[:, i] * self._deconv_scale(pasos[i])
+            self.columnas_deconv[col_name] = (x1, x2)
+            self.pasos_deconv[col_name] = float(pasos[i])
+            columnas.append(col_name)
+        self.integrales_df.index = self.muestras
+
+        if (x1, x2, n_picos, forma) not in self.deconvoluciones:
+            self.deconvoluciones.append((x1, x2, n_picos, forma))
+        return columnas
+
+    def _deconv_scale(self, paso, metodo=None):
+        """Factor que lleva un área en intensidad·punto a las unidades de la regla de integración"""
+        metodo = self.metodo_integral if metodo is None else metodo
+        return 1.0 if metodo == "suma" else paso
+
+    def get_column_regions(self):
+        """Devuelve {columna de integrales_df: (x1, x2)} para regiones y áreas deconvolucionadas"""
+        columnas = {self.region_name(x1, x2): (x1, x2) for x1, x2 in self.regiones}
+        columnas.update(self.columnas_deconv)
+        return {col: region for col, region in columnas.items() if col in self.integrales_df.columns}
+
+    def calculate_quality(self, ventana=None):
+        """
+        Calcula el ruido de cada muestra y las matrices de SNR, LOD y LOQ de cada región.
+
+        Parámetros:
+        ventana -- Ventana sin señal (ppm_min, ppm_max); None para estimar el ruido por MAD
+
+        Retorna:
+        Diccionario con 'ruido' (Series) y 'snr', 'lod', 'loq' (DataFrames muestras x columnas)
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        columnas = self.get_column_regions()
+        if not columnas:
+            raise ValueError("No hay integrales calculadas")
+
+        resultado = noise.region_quality(self.val_y, list(columnas.values()), self.val_x, ventana,
+                                         step=integration.rule_step(self.val_x, self.metodo_integral))
+        self.calidad = {"ruido": pd.Series(resultado["ruido"], index=self.muestras, name="Ruido")}
+        for clave in ("snr", "lod", "loq"):
+            self.calidad[clave] = pd.DataFrame(resultado[clave], index=self.muestras, columns=list(columnas))
+        return self.calidad
+
+    def get_below_loq(self):
+        """Matriz booleana (muestras x columnas) con True donde la integral es menor que el LOQ"""
+        if self.calidad is None:
+            return None
+        loq = self.calidad["loq"]
+        return self.integrales_df[loq.columns].abs() < loq
+
+    def concentration_uncertainty(self, protones, k=None, estandar=None, **opciones):
+        """
+        Estima por Monte Carlo la incertidumbre de las concentraciones de cada región.
+
+        Parámetros:
+        protones -- Diccionario {columna de región: número de protones}
+        k -- Factor K único o Series {muestra: K} (si no se indica el estándar interno)
+        estandar -- Diccionario con 'inicio', 'fin' (ppm), 'concentracion' y 'protones' del
+                    estándar interno; si se indica, K se recalcula en cada simulación
+        opciones -- u_protons, u_concentration, u_k, edge_jitter, n_draws, level, seed
+                    (ver uncertainty.monte_carlo_concentrations)
+
+        Retorna:
+        Diccionario de DataFrames (muestras x regiones): 'media', 'sd', 'inferior', 'superior'
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        columnas = [self.region_name(x1, x2) for x1, x2 in self.regiones]
+        if not columnas:
+            raise ValueError("No hay regiones integradas")
+
+        # El ruido ya estimado (calculate_quality) tiene prioridad sobre la MAD
+        if self.calidad is not None:
+            sigma = self.calidad["ruido"].values
+        else:
+            sigma = noise.noise_mad(self.val_y)
+
+        argumentos = dict(opciones)
+        if estandar is not None:
+            argumentos.update(
+                std_region=(self.ppm_to_index(estandar["inicio"]), self.ppm_to_index(estandar["fin"])),
+                std_concentration=estandar["concentracion"],
+                std_protons=estandar["protones"],
+            )
+        elif isinstance(k, dict) or isinstance(k, pd.Series):
+            argumentos["k"] = pd.Series(k).reindex(self.muestras).values.astype(float)
+        else:
+            argumentos["k"] = k
+
+        resultado = uncertainty.monte_carlo_concentrations(
+            self.val_y, self.regiones, [protones.get(col, 1.0) for col in columnas], sigma,
+            index=self.get_integral_index(), **argumentos
+        )
+        return {clave: pd.DataFrame(valores, index=self.muestras, columns=columnas)
+                for clave, valores in resultado.items()}
+
+    def stocsy(self, ppm_conductores):
+        """
+        Calcula STOCSY para uno o varios puntos conductores en una sola pasada.
+
+        Parámetros:
+        ppm_conductores -- Desplazamientos químicos de los puntos conductores
+
+        Retorna:
+        Diccionario con 'conductores' (índices) y 'covarianza', 'correlacion'
+        (conductores x puntos ppm)
+        """
+        if self.val_y is None:
+            raise ValueError("No hay datos cargados")
+        conductores = [self.ppm_to_index(p) for p in ppm_conductores]
+        resultado = stocsy.stocsy(self.val_y, conductores)
+        resultado["conductores"] = conductores
+        return resultado
+
+    def search_library(self, biblioteca, ventana=None, k=10, metrica="coseno"):
+        """
+        Busca en una biblioteca espectral los compuestos más parecidos al espectro promedio.
+
+        Parámetros:
+        biblioteca -- library.SpectralLibrary abierta
+        ventana -- Región (ppm_inicio, ppm_fin) a comparar; None para todo el espectro
+        k -- Número de resultados
+        metrica -- 'coseno' o 'correlacion'
+
+        Retorna:
+        Lista de pares (compuesto, similitud), del más parecido al menos
+        """
+        if self.prom_y is None:
+            raise ValueError("No hay datos cargados")
+        return biblioteca.search_names(self.val_x, self.prom_y, k=k, metric=metrica, window=ventana)
+
+    def ppm_to_index(self, ppm):
+        """Devuelve el índice del punto más cercano a un desplazamiento químico"""
+        return int(np.argmin(np.abs(self.val_x - ppm)))
+
+    def get_regiones_ppm(self):
+        """Devuelve las regiones integradas como pares (ppm_inicio, ppm_fin)"""
+        return [(float(self.val_x[x1]), float(self.val_x[x2])) for x1, x2 in self.regiones]
+
     def get_plot_data(self):
-        if self.df is None:
+        if self.val_x is None:
             return None
         return {
             'val_x': self.val_x,
@@ -71,26 +643,30 @@ class RMNProcessor:
 
     def reset(self):
         self.df = None
-        self.integrales_df = pd.DataFrame()
+        self.integrales_df = None
         self.val_x = None
         self.val_y = None
         self.muestras = None
         self.prom_y = None
-        self.integrales_totales = None
+        self.regiones = []
+        self.deconvoluciones = []
+        self.columnas_deconv = {}
+        self.pasos_deconv = {}
+        self.calidad = None
+        self.info_regiones = {}
+        self._discard_indexes()
 
     def calcular_integrales_relativas(self):
-        """Calcula las integrales relativas respecto al total de cada muestra"""
+        """Calcula las integrales relativas respecto al total de cada muestra (sin las exclusiones)"""
         if self.integrales_df.empty or self.integrales_totales is None:
             return pd.DataFrame()
 
-        # Crear copia del DataFrame de integrales
-        relativas_df = self.integrales_df.copy()
-
-        # Calcular valores relativos (cada integral / integral total de su muestra)
-        for col in relativas_df.columns:
-            relativas_df[col] = relativas_df[col] / self.integrales_totales
+        # Cada integral / integral total de su muestra, todas las columnas a la vez
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relativas = self.integrales_df.to_numpy(dtype=float) / self.integrales_totales[:, None]
+        relativas_df = pd.DataFrame(relativas, index=self.integrales_df.index, columns=self.integrales_df.columns)
 
-        # Redondear a 4 decimales
+        # Redondear a 9 decimales
         return relativas_df.round(9)
 
     def get_integrales_totales(self):
@@ -0,0 +1,184 @@
+"""
+Control de calidad multivariante: detección de muestras atípicas con T² de Hotelling y
+DModX sobre un modelo PCA robusto.
+
+El modelo se ajusta sobre un subconjunto de muestras (todas si son pocas), centrado en la
+mediana, y se reajusta quitando las muestras cuyo T² o SPE se aleja más de ROBUST_CUTOFF
+desviaciones robustas (mediana y MAD) del resto, hasta que el conjunto de ajuste deja de
+cambiar. Así una muestra con mal shimming o contaminada no arrastra las componentes ni
+los límites, que se calculan solo con las muestras conservadas.
+
+Después se puntúan todas las muestras por bloques de filas (la matriz puede ser un
+np.memmap):
+- T² = Σ t_a² / λ_a, con λ_a la varianza de los scores del conjunto de ajuste; límite
+  con la distribución F.
+- DModX = desviación estándar residual de la muestra relativa a la del conjunto de
+  ajuste; límite con la aproximación de Box (SPE ~ g·χ²_h).
+"""
+from typing import Dict, Optional, Sequence, Tuple
+from scipy import stats
+from sklearn.utils.extmath import randomized_svd
+import numpy as np
+import pandas as pd
+from src.suite.core.instrument import instrumented
+
+METHODS = ("marcar", "excluir")
+
+# Número máximo de valores leídos por bloque al puntuar las muestras
+MAX_BLOCK_ELEMENTS = 8_000_000
+
+# Distancia robusta (en MAD) a partir de la cual una muestra no se usa para ajustar el modelo
+ROBUST_CUTOFF = 3.0
+
+
+def fit_pca_model(X: np.ndarray, n_components: int, seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """PCA centrada en la mediana de X (SVD aleatorizada)"""
+    centro = np.median(X, axis=0)
+    U, s, Vt = randomized_svd(X - centro, n_components, random_state=seed)
+    scores = U * s
+    return {"centro": centro, "loadings": Vt.T, "lambdas": np.var(scores, axis=0, ddof=1)}
+
+
+def project(X: np.ndarray, modelo: Dict[str, np.ndarray]):
+    """Scores y suma de cuadrados residual (SPE) de cada fila de X"""
+    Xc = np.asarray(X, dtype=float) - modelo["centro"]
+    scores = Xc @ modelo["loadings"]
+    spe = np.einsum("ij,ij->i", Xc, Xc) - np.einsum("ij,ij->i", scores, scores)
+    return scores, np.maximum(spe, 0.0)
+
+
+def robust_core(t2: np.ndarray, spe: np.ndarray, cutoff: float = ROBUST_CUTOFF) -> np.ndarray:
+    """Muestras cuyo √T² y log(SPE) quedan a menos de `cutoff` desviaciones robustas de la mediana"""
+    conservar = np.ones(len(t2), dtype=bool)
+    for valores in (np.sqrt(t2), np.log(np.maximum(spe, np.finfo(float).tiny))):
+        mediana = np.median(valores)
+        mad = 1.4826 * np.median(np.abs(valores - mediana))
+        if mad > 0:
+            conservar &= (valores - mediana) / mad <= cutoff
+    return conservar
+
+
+def control_limits(spe_ajuste: np.ndarray, n_fit: int, n_components: int, n_points: int,
+                   confidence: float) -> Dict[str, float]:
+    """Límites de T² (distribución F) y DModX (aproximación de Box) y escala s0 de DModX"""
+    k = n_components
+    t2_lim = k * (n_fit ** 2 - 1) / (n_fit * (n_fit - k)) * stats.f.ppf(confidence, k, n_fit - k)
+    media, varianza = float(np.mean(spe_ajuste)), float(np.var(spe_ajuste, ddof=1))
+    if media <= 0 or varianza <= 0:
+        spe_lim = media
+    else:
+        g, h = varianza / (2.0 * media), 2.0 * media ** 2 / varianza
+        spe_lim = g * stats.chi2.ppf(confidence, h)
+    grados = max(1, n_points - k)
+    s0 = np.sqrt(media / grados) if media > 0 else 1.0
+    return {"t2": float(t2_lim), "dmodx": float(np.sqrt(spe_lim / grados) / s0), "s0": float(s0)}
+
+
+@instrumented("control_calidad")
+def detect_outliers(
+        X: np.ndarray,
+        n_components: int = 2,
+        confidence: float = 0.99,
+        max_fit_samples: int = 500,
+        max_iter: int = 5,
+        seed: Optional[int] = 0
+) -> Dict[str, object]:
+    """
+    Ajusta la PCA robusta y calcula T² y DModX de todas las muestras.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm); puede ser un np.memmap
+    n_components -- Componentes del modelo PCA
+    confidence -- Nivel de confianza de los límites (p. ej. 0.99)
+    max_fit_samples -- Número máximo de muestras usadas para ajustar el modelo
+    max_iter -- Número máximo de reajustes quitando atípicas
+    seed -- Semilla del submuestreo y de la SVD
+
+    Retorna:
+    Diccionario con 't2', 'dmodx', 'atipicas' (vector booleano por muestra) y los límites
+    't2_lim' y 'dmodx_lim'
+    """
+    n_samples, n_points = X.shape
+    n_components = int(n_components)
+    if not 0 < confidence < 1:
+        raise ValueError("El nivel de confianza debe estar entre 0 y 1")
+    if not 1 <= n_components <= n_samples - 3:
+        raise ValueError(f"El número de componentes debe estar entre 1 y {n_samples - 3}")
+
+    rng = np.random.default_rng(seed)
+    if n_samples > max_fit_samples:
+        ajuste = np.sort(rng.choice(n_samples, max_fit_samples, replace=False))
+    else:
+        ajuste = np.arange(n_samples)
+    X_ajuste = np.asarray(X[ajuste], dtype=float)
+
+    # Reajuste sin las muestras alejadas del conjunto de ajuste
+    usadas = np.ones(len(ajuste), dtype=bool)
+    for _ in range(max_iter):
+        modelo = fit_pca_model(X_ajuste[usadas], n_components, seed)
+        scores, spe = project(X_ajuste, modelo)
+        t2 = np.sum(scores ** 2 / modelo["lambdas"], axis=1)
+        nuevas = robust_core(t2, spe)
+        if np.array_equal(nuevas, usadas) or nuevas.sum() <= n_components + 2:
+            break
+        usadas = nuevas
+    limites = control_limits(spe[usadas], int(usadas.sum()), n_components, n_points, confidence)
+
+    # Puntuación de todas las muestras por bloques
+    t2 = np.empty(n_samples)
+    dmodx = np.empty(n_samples)
+    bloque = max(1, MAX_BLOCK_ELEMENTS // max(1, n_points))
+    for start in range(0, n_samples, bloque):
+        stop = min(start + bloque, n_samples)
+        scores, spe = project(X[start:stop], modelo)
+        t2[start:stop] = np.sum(scores ** 2 / modelo["lambdas"], axis=1)
+        dmodx[start:stop] = np.sqrt(spe / max(1, n_points - n_components)) / limites["s0"]
+
+    return {
+        "t2": t2,
+        "dmodx": dmodx,
+        "t2_lim": limites["t2"],
+        "dmodx_lim": limites["dmodx"],
+        "atipicas": (t2 > limites["t2"]) | (dmodx > limites["dmodx"]),
+    }
+
+
+def quality_control(X: np.ndarray, method: str = "marcar", **params) -> Tuple[np.ndarray, Dict[str, object]]:
+    """
+    Etapa de control de calidad del procesamiento.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    method -- 'marcar' (las atípicas se conservan pero no cuentan para la referencia de PQN
+              ni para las estadísticas del escalado) o 'excluir' (se quitan de la matriz)
+    params -- Argumentos de detect_outliers
+
+    Retorna:
+    X -- Matriz resultante (sin las atípicas si method es 'excluir')
+    informe -- Resultado de detect_outliers más 'conservadas' (índices de las filas de la
+               matriz original que siguen en X) y 'referencia' (máscara de las filas de X
+               que se usan en las etapas siguientes, o None si son todas)
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método de control de calidad no reconocido: {method}")
+
+    informe = detect_outliers(X, **params)
+    atipicas = informe["atipicas"]
+    if method == "excluir":
+        informe["conservadas"] = np.flatnonzero(~atipicas)
+        informe["referencia"] = None
+        return X[informe["conservadas"]], informe
+
+    informe["conservadas"] = np.arange(X.shape[0])
+    informe["referencia"] = ~atipicas if atipicas.any() else None
+    return X, informe
+
+
+def report_table(informe: Dict[str, object], sample_names: Sequence[str]) -> pd.DataFrame:
+    """Tabla del control de calidad: T², DModX y si cada muestra es atípica"""
+    return pd.DataFrame({
+        "Muestra": list(sample_names),
+        "T2": informe["t2"],
+        "DModX": informe["dmodx"],
+        "Atipica": informe["atipicas"],
+    })
@@ -0,0 +1,254 @@
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+import warnings
+from src.suite.core.integration import IntegralIndex, region_integrals
+
+# Estándar interno: (ppm_inicio, ppm_fin, concentración, número de protones)
+Standard = Tuple[float, float, float, float]
+
+
+def region_indices(ppm: np.ndarray, start: float, end: float) -> Tuple[int, int]:
+    """
+    Devuelve los índices (ordenados) de los puntos más cercanos a los límites de una región.
+
+    Parámetros:
+    ppm -- Vector de desplazamientos químicos
+    start -- Límite inicial de la región (ppm)
+    end -- Límite final de la región (ppm)
+
+    Retorna:
+    Tupla (idx_inicio, idx_fin) con idx_inicio <= idx_fin
+    """
+    idx_start = int(np.argmin(np.abs(ppm - start)))
+    idx_end = int(np.argmin(np.abs(ppm - end)))
+    if idx_start > idx_end:
+        idx_start, idx_end = idx_end, idx_start
+    return idx_start, idx_end
+
+
+def external_k_factor(
+        ppm: np.ndarray,
+        spectrum: np.ndarray,
+        start: float,
+        end: float,
+        protons: float,
+        concentration: float,
+        rule: str = "suma"
+) -> Tuple[float, float]:
+    """
+    Calcula el factor K a partir de un espectro de estándar externo.
+
+    K = Concentración / (Integral / Número de protones)
+
+    Parámetros:
+    ppm -- Vector de desplazamientos químicos
+    spectrum -- Espectro de referencia (1D)
+    start, end -- Límites del pico del estándar (ppm)
+    protons -- Número de protones del pico
+    concentration -- Concentración del estándar
+    rule -- Regla de integración ('suma', 'trapezoidal' o 'simpson')
+
+    Retorna:
+    Tupla (integral, K)
+    """
+    if protons == 0:
+        raise ValueError("El número de protones no puede ser cero")
+
+    idx_start, idx_end = region_indices(ppm, start, end)
+    integral = float(region_integrals(np.asarray(spectrum, dtype=float)[None, :], [(idx_start, idx_end)],
+                                      ppm, rule)[0, 0])
+    if integral == 0:
+        raise ValueError("La integral del estándar es cero")
+
+    return integral, concentration / (integral / protons)
+
+
+def internal_k_factors(
+        ppm: np.ndarray,
+        X: np.ndarray,
+        start: float,
+        end: float,
+        concentration: float,
+        protons: float,
+        rule: str = "suma"
+) -> np.ndarray:
+    """
+    Calcula un factor K por muestra usando un estándar interno.
+
+    Parámetros:
+    ppm -- Vector de desplazamientos químicos
+    X -- Matriz de espectros (muestras x puntos ppm)
+    start, end -- Límites del pico del estándar (ppm)
+    concentration -- Concentración del estándar
+    protons -- Número de protones del pico del estándar
+    rule -- Regla de integración ('suma', 'trapezoidal' o 'simpson')
+
+    Retorna:
+    Vector de factores K (uno por muestra)
+    """
+    if protons <= 0:
+        raise ValueError("Número de protones debe ser positivo")
+
+    idx_start, idx_end = region_indices(ppm, start, end)
+    integrales_std = region_integrals(X, [(idx_start, idx_end)], ppm, rule)[:, 0]
+
+    with np.errstate(divide="ignore"):
+        return concentration / (integrales_std / protons)
+
+
+def internal_k_matrix(
+        ppm: np.ndarray,
+        X: Union[np.ndarray, IntegralIndex],
+        standards: Sequence[Standard],
+        rule: str = "suma"
+) -> np.ndarray:
+    """
+    Calcula el factor K de cada muestra con cada estándar interno en una sola pasada.
+
+    Parámetros:
+    ppm -- Vector de desplazamientos químicos
+    X -- Matriz de espectros (muestras x puntos ppm) o su IntegralIndex ya calculado
+    standards -- Lista de estándares (ppm_inicio, ppm_fin, concentración, protones); pueden
+                 ser varios compuestos o varios picos de un mismo compuesto
+    rule -- Regla de integración si X es una matriz (un IntegralIndex ya trae la suya)
+
+    Retorna:
+    Matriz de factores K (muestras x estándares)
+    """
+    if len(standards) == 0:
+        raise ValueError("Se necesita al menos un estándar interno")
+    standards = np.asarray(standards, dtype=float).reshape(-1, 4)
+    if np.any(standards[:, 3] <= 0):
+        raise ValueError("Número de protones debe ser positivo")
+
+    index = X if isinstance(X, IntegralIndex) else IntegralIndex(X, ppm, rule)
+    regiones = [region_indices(ppm, inicio, fin) for inicio, fin in standards[:, :2]]
+    integrales_std = index.integrate(regiones)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return standards[:, 2] * standards[:, 3] / integrales_std
+
+
+def consensus_k(
+        K: np.ndarray,
+        method: str = "mediana",
+        weights: Optional[np.ndarray] = None,
+        threshold: float = 3.5
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combina los K de varios estándares en un K por muestra, descartando valores atípicos.
+
+    En cada muestra se descartan los K cuyo z robusto, 0.6745·|K - mediana| / MAD, supera
+    `threshold` (solo si hay al menos 3 estándares válidos). Con los restantes se toma la
+    mediana o un promedio ponderado.
+
+    Parámetros:
+    K -- Matriz de factores K (muestras x estándares)
+    method -- 'mediana' o 'ponderada'
+    weights -- Pesos (muestras x estándares o uno por estándar); por defecto iguales
+    threshold -- Umbral del z robusto para descartar un estándar
+
+    Retorna:
+    k -- Vector con el K de consenso de cada muestra
+    usados -- Matriz booleana (muestras x estándares) con los K que entraron al consenso
+    """
+    K = np.atleast_2d(np.asarray(K, dtype=float))
+    validos = np.isfinite(K) & (K > 0)
+    Kv = np.where(validos, K, np.nan)
+
+    # Las muestras sin ningún K válido dan NaN (nanmedian avisa con RuntimeWarning)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mediana = np.nanmedian(Kv, axis=1, keepdims=True)
+        mad = np.nanmedian(np.abs(Kv - mediana), axis=1, keepdims=True)
+        z = np.where(mad > 0, 0.6745 * np.abs(Kv - mediana) / mad, 0.0)
+
+        suficientes = validos.sum(axis=1, keepdims=True) >= 3
+        usados = validos & ~(suficientes & (z > threshold))
+        Ku = np.where(usados, K, np.nan)
+
+        if method == "mediana":
+            k = np.nanmedian(Ku, axis=1)
+        elif method == "ponderada":
+            w = np.ones_like(K) if weights is None else np.broadcast_to(np.asarray(weights, dtype=float), K.shape)
+            w = np.where(usados, w, 0.0)
+            k = np.sum(w * np.nan_to_num(Ku), axis=1) / np.sum(w, axis=1)
+        else:
+            raise ValueError(f"Método de consenso no reconocido: {method}")
+
+    return k, usados
+
+
+def internal_k_consensus(
+        ppm: np.ndarray,
+        X: Union[np.ndarray, IntegralIndex],
+        standards: Sequence[Standard],
+        method: str = "mediana",
+        threshold: float = 3.5,
+        sigma: Optional[np.ndarray] = None,
+        rule: str = "suma"
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    K de consenso por muestra a partir de varios estándares internos.
+
+    Con el método 'ponderada', cada K pesa según la inversa de su varianza relativa,
+    (Integral / (σ·√n))², donde σ es el ruido de la muestra (si no se da, se supone igual
+    en todas) y n el número de puntos de la región del estándar.
+
+    Parámetros:
+    ppm -- Vector de desplazamientos químicos
+    X -- Matriz de espectros o su IntegralIndex
+    standards -- Lista de estándares (ppm_inicio, ppm_fin, concentración, protones)
+    method -- 'mediana' o 'ponderada'
+    threshold -- Umbral del z robusto para descartar un estándar
+    sigma -- Ruido de cada muestra (opcional, solo para 'ponderada')
+    rule -- Regla de integración si X es una matriz
+
+    Retorna:
+    k -- K de consenso por muestra
+    K -- Matriz (muestras x estándares) de K individuales
+    usados -- Matriz booleana de los K que entraron al consenso
+    """
+    index = X if isinstance(X, IntegralIndex) else IntegralIndex(X, ppm, rule)
+    K = internal_k_matrix(ppm, index, standards)
+
+    weights = None
+    if method == "ponderada":
+        standards = np.asarray(standards, dtype=float).reshape(-1, 4)
+        regiones = [region_indices(ppm, inicio, fin) for inicio, fin in standards[:, :2]]
+        n = np.array([fin - inicio + 1 for inicio, fin in regiones], dtype=float)
+        ruido = np.ones(K.shape[0]) if sigma is None else np.asarray(sigma, dtype=float)
+        weights = (index.integrate(regiones) / (ruido[:, None] * np.sqrt(n)[None, :])) ** 2
+
+    k, usados = consensus_k(K, method, weights, threshold)
+    return k, K, usados
+
+
+def quantify(
+        integrales: np.ndarray,
+        protones: np.ndarray,
+        k: Union[float, np.ndarray]
+) -> np.ndarray:
+    """
+    Convierte integrales en concentraciones.
+
+    C = (Integral / Número de protones) * K
+
+    Parámetros:
+    integrales -- Matriz de integrales (muestras x regiones)
+    protones -- Número de protones de cada región
+    k -- Factor K único (estándar externo) o vector con un K por muestra (estándar interno)
+
+    Retorna:
+    Matriz de concentraciones (muestras x regiones)
+    """
+    integrales = np.asarray(integrales, dtype=float)
+    protones = np.asarray(protones, dtype=float)
+    if np.any(protones == 0):
+        raise ValueError("El número de protones no puede ser cero")
+
+    k = np.asarray(k, dtype=float)
+    if k.ndim == 1:
+        k = k[:, np.newaxis]
+
+    return integrales / protones[np.newaxis, :] * k
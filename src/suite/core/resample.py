@@ -0,0 +1,210 @@
+"""
+Remuestreo de una matriz de espectros a otro eje ppm.
+
+Los pesos de interpolación solo dependen de los dos ejes, así que se calculan una vez como
+una matriz dispersa W (puntos origen x puntos destino) y el remuestreo de todas las
+muestras es el producto X @ W. Las matrices grandes (p. ej. np.memmap) se recorren por
+bloques de filas.
+
+Métodos:
+- 'linear': interpolación lineal entre los dos puntos vecinos.
+- 'cubic': convolución cúbica de Keys (a = -0.5) con los cuatro puntos vecinos; supone
+  un eje origen de paso (casi) constante, como el de los espectros digitalizados.
+- 'area': cada punto representa el intervalo que va hasta la mitad de sus vecinos y el
+  valor destino es el promedio de los valores origen ponderado por el solapamiento, lo
+  que conserva el área ∫ y dppm (útil al pasar a un eje más grueso).
+Los puntos destino fuera del rango del eje origen quedan en 0.
+"""
+from typing import List, Optional, Sequence, Tuple
+from scipy import sparse
+import numpy as np
+from src.suite.core.instrument import instrumented
+
+METHODS = ("linear", "cubic", "area")
+
+# Número máximo de valores de entrada leídos por bloque
+MAX_BLOCK_ELEMENTS = 8_000_000
+
+
+def _ascending(axis: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Eje en orden creciente y posición original de cada punto"""
+    axis = np.asarray(axis, dtype=float)
+    orden = np.argsort(axis, kind="stable")
+    valores = axis[orden]
+    if np.any(np.diff(valores) <= 0):
+        raise ValueError("El eje ppm tiene valores repetidos")
+    return valores, orden
+
+
+def _bin_edges(axis: np.ndarray) -> np.ndarray:
+    """Bordes de los intervalos de cada punto (eje creciente): mitades entre vecinos"""
+    medios = (axis[:-1] + axis[1:]) / 2.0
+    return np.concatenate([[axis[0] - (medios[0] - axis[0])], medios, [axis[-1] + (axis[-1] - medios[-1])]])
+
+
+def _linear_weights(s: np.ndarray, t: np.ndarray):
+    dentro = np.flatnonzero((t >= s[0]) & (t <= s[-1]))
+    j = np.clip(np.searchsorted(s, t[dentro], side="right") - 1, 0, len(s) - 2)
+    f = (t[dentro] - s[j]) / (s[j + 1] - s[j])
+    filas = np.concatenate([j, j + 1])
+    columnas = np.concatenate([dentro, dentro])
+    return filas, columnas, np.concatenate([1.0 - f, f])
+
+
+def _cubic_weights(s: np.ndarray, t: np.ndarray):
+    dentro = np.flatnonzero((t >= s[0]) & (t <= s[-1]))
+    j = np.clip(np.searchsorted(s, t[dentro], side="right") - 1, 0, len(s) - 2)
+    f = (t[dentro] - s[j]) / (s[j + 1] - s[j])
+    f2, f3 = f * f, f * f * f
+    pesos = [(-f3 + 2 * f2 - f) / 2, (3 * f3 - 5 * f2 + 2) / 2, (-3 * f3 + 4 * f2 + f) / 2, (f3 - f2) / 2]
+    # En los bordes los vecinos que faltan se sustituyen por el extremo (los pesos se suman)
+    filas = np.concatenate([np.clip(j + d, 0, len(s) - 1) for d in (-1, 0, 1, 2)])
+    return filas, np.tile(dentro, 4), np.concatenate(pesos)
+
+
+def _area_weights(s: np.ndarray, t: np.ndarray):
+    bs, bt = _bin_edges(s), _bin_edges(t)
+    # Intervalos origen [lo, hi] que se solapan con cada intervalo destino
+    lo = np.clip(np.searchsorted(bs, bt[:-1], side="right") - 1, 0, len(s) - 1)
+    hi = np.clip(np.searchsorted(bs, bt[1:], side="left") - 1, 0, len(s) - 1)
+    conteo = np.maximum(hi - lo + 1, 0)
+    columnas = np.repeat(np.arange(len(t)), conteo)
+    filas = np.repeat(lo, conteo) + (np.arange(conteo.sum()) - np.repeat(np.cumsum(conteo) - conteo, conteo))
+    solape = (np.minimum(bt[1:][columnas], bs[filas + 1]) - np.maximum(bt[:-1][columnas], bs[filas]))
+    pesos = np.maximum(solape, 0.0) / (bt[1:] - bt[:-1])[columnas]
+
+    # Fuera del rango origen no hay datos: se deja en 0 en lugar de diluir el promedio
+    fuera = (t < s[0]) | (t > s[-1])
+    pesos[fuera[columnas]] = 0.0
+    return filas, columnas, pesos
+
+
+@instrumented("pesos_remuestreo")
+def resample_weights(source: np.ndarray, target: np.ndarray, method: str = "linear") -> sparse.csr_matrix:
+    """
+    Matriz dispersa de pesos para remuestrear del eje `source` al eje `target`.
+
+    Parámetros:
+    source -- Eje ppm de los datos (creciente o decreciente)
+    target -- Eje ppm de destino (creciente o decreciente)
+    method -- 'linear', 'cubic' o 'area'
+
+    Retorna:
+    Matriz CSR (len(source) x len(target)); el remuestreo de X es X @ W
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método de remuestreo no reconocido: {method}")
+    s, orden_s = _ascending(source)
+    t, orden_t = _ascending(target)
+    if len(s) < 2 or (method == "cubic" and len(s) < 4):
+        raise ValueError("El eje origen tiene muy pocos puntos para remuestrear")
+
+    calcular = {"linear": _linear_weights, "cubic": _cubic_weights, "area": _area_weights}[method]
+    filas, columnas, pesos = calcular(s, t)
+    # Vuelta a las posiciones originales de ambos ejes; las entradas repetidas se suman
+    W = sparse.coo_matrix((pesos, (orden_s[filas], orden_t[columnas])), shape=(len(s), len(t)))
+    W = W.tocsr()
+    W.eliminate_zeros()
+    return W
+
+
+@instrumented("remuestreo")
+def resample(
+        X: np.ndarray,
+        source: np.ndarray,
+        target: np.ndarray,
+        method: str = "linear",
+        weights: Optional[sparse.spmatrix] = None,
+        out: Optional[np.ndarray] = None,
+        chunk_rows: Optional[int] = None
+) -> np.ndarray:
+    """
+    Remuestrea todas las muestras de X al eje `target`.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x len(source)); puede ser un np.memmap
+    source -- Eje ppm de X
+    target -- Eje ppm de destino
+    method -- 'linear', 'cubic' o 'area'
+    weights -- Pesos ya calculados con resample_weights (se reutilizan entre matrices)
+    out -- Matriz (muestras x len(target)) donde escribir el resultado (p. ej. un np.memmap)
+    chunk_rows -- Filas por bloque (por defecto, según MAX_BLOCK_ELEMENTS)
+
+    Retorna:
+    Matriz remuestreada (muestras x len(target))
+    """
+    X = X if X.ndim == 2 else np.atleast_2d(X)
+    if X.shape[1] != len(source):
+        raise ValueError("El número de columnas no coincide con el eje ppm")
+    W = weights if weights is not None else resample_weights(source, target, method)
+    if out is None:
+        out = np.empty((X.shape[0], W.shape[1]))
+
+    if chunk_rows is None:
+        chunk_rows = MAX_BLOCK_ELEMENTS // max(1, X.shape[1])
+    chunk_rows = max(1, int(chunk_rows))
+    # (Wᵀ Bᵀ)ᵀ: producto disperso por denso sin convertir W
+    Wt = W.T.tocsr()
+    for start in range(0, X.shape[0], chunk_rows):
+        stop = min(start + chunk_rows, X.shape[0])
+        out[start:stop] = (Wt @ np.asarray(X[start:stop], dtype=float).T).T
+    return out
+
+
+def common_axis(axes: Sequence[np.ndarray], n_points: Optional[int] = None) -> np.ndarray:
+    """
+    Eje decreciente que cubre el rango común a todos los ejes.
+
+    Parámetros:
+    axes -- Ejes ppm de los conjuntos de datos
+    n_points -- Puntos del eje; por defecto, los que da el paso más fino de los ejes
+
+    Retorna:
+    Eje ppm de destino (de mayor a menor, como en los espectros)
+    """
+    inicio = max(float(np.min(a)) for a in axes)
+    fin = min(float(np.max(a)) for a in axes)
+    if fin <= inicio:
+        raise ValueError("Los ejes ppm no tienen un rango en común")
+    if n_points is None:
+        paso = min(float(np.min(np.abs(np.diff(a)))) for a in axes)
+        n_points = int(round((fin - inicio) / paso)) + 1
+    return np.linspace(fin, inicio, int(n_points))
+
+
+def combine(
+        datasets: Sequence[Tuple[np.ndarray, np.ndarray, Sequence[str]]],
+        target: Optional[np.ndarray] = None,
+        method: str = "linear"
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Une varios conjuntos de espectros adquiridos con ejes distintos en una sola matriz.
+
+    Parámetros:
+    datasets -- Lista de tuplas (ppm, X, nombres), p. ej. las de handler.load_nmr_data
+    target -- Eje de destino; por defecto, common_axis de todos los ejes
+    method -- 'linear', 'cubic' o 'area'
+
+    Retorna:
+    ppm -- Eje común
+    data -- Matriz con todas las muestras remuestreadas
+    sample_names -- Nombres de las muestras en el mismo orden
+    """
+    if not datasets:
+        raise ValueError("No hay conjuntos de datos para combinar")
+    if target is None:
+        target = common_axis([ppm for ppm, _, _ in datasets])
+    target = np.asarray(target, dtype=float)
+
+    data = np.empty((sum(np.atleast_2d(X).shape[0] for _, X, _ in datasets), len(target)))
+    nombres = []
+    fila = 0
+    for ppm, X, names in datasets:
+        X = np.atleast_2d(X)
+        if np.array_equal(ppm, target):
+            data[fila:fila + X.shape[0]] = X
+        else:
+            resample(X, ppm, target, method, out=data[fila:fila + X.shape[0]])
+        fila += X.shape[0]
+        nombres.extend(names)
+    return target, data, nombres
@@ -1,13 +1,16 @@
 from typing import Tuple, Optional
+from src.suite.core.instrument import instrumented
 import numpy as np
 
 
-def autoscaling(X: np.ndarray) -> np.ndarray:
+def autoscaling(X: np.ndarray, reference: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Aplica autoescalado (z-score) a los datos.
 
     Parámetros:
     X -- Matriz de datos con forma (n_muestras, n_características)
+    reference -- Máscara booleana de las muestras usadas para calcular las estadísticas
+                 (por defecto, todas)
 
     Retorna:
     Matriz escalada donde cada característica tiene media 0 y desviación estándar 1
@@ -16,8 +19,9 @@ def autoscaling(X: np.ndarray) -> np.ndarray:
         raise ValueError("La matriz de entrada está vacía")
 
     # Calcular media y desviación estándar por característica
-    means = np.mean(X, axis=0)
-    stds = np.std(X, axis=0)
+    base = X if reference is None else X[reference]
+    means = np.mean(base, axis=0)
+    stds = np.std(base, axis=0)
 
     # Manejar desviaciones estándar cero
     stds[stds == 0] = 1.0
@@ -25,12 +29,14 @@ def autoscaling(X: np.ndarray) -> np.ndarray:
     return (X - means) / stds
 
 
-def pareto_scaling(X: np.ndarray) -> np.ndarray:
+def pareto_scaling(X: np.ndarray, reference: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Aplica escalado Pareto a los datos.
 
     Parámetros:
     X -- Matriz de datos con forma (n_muestras, n_características)
+    reference -- Máscara booleana de las muestras usadas para calcular las estadísticas
+                 (por defecto, todas)
 
     Retorna:
     Matriz escalada donde cada característica está centrada y dividida por sqrt(std)
@@ -38,8 +44,9 @@ def pareto_scaling(X: np.ndarray) -> np.ndarray:
     if X.size == 0:
         raise ValueError("La matriz de entrada está vacía")
 
-    means = np.mean(X, axis=0)
-    stds = np.std(X, axis=0)
+    base = X if reference is None else X[reference]
+    means = np.mean(base, axis=0)
+    stds = np.std(base, axis=0)
 
     # Manejar desviaciones estándar cero
     stds[stds == 0] = 1.0
@@ -49,7 +56,8 @@ def pareto_scaling(X: np.ndarray) -> np.ndarray:
 
 def range_scaling(
         X: np.ndarray,
-        feature_range: Tuple[float, float] = (0, 1)
+        feature_range: Tuple[float, float] = (0, 1),
+        reference: Optional[np.ndarray] = None
 ) -> np.ndarray:
     """
     Escala los datos a un rango específico.
@@ -57,6 +65,8 @@ def range_scaling(
     Parámetros:
     X -- Matriz de datos con forma (n_muestras, n_características)
     feature_range -- Tupla (min, max) del rango deseado (por defecto (0,1))
+    reference -- Máscara booleana de las muestras usadas para calcular las estadísticas
+                 (por defecto, todas)
 
     Retorna:
     Matriz escalada al rango especificado
@@ -64,8 +74,9 @@ def range_scaling(
     if X.size == 0:
         raise ValueError("La matriz de entrada está vacía")
 
-    min_vals = np.min(X, axis=0)
-    max_vals = np.max(X, axis=0)
+    base = X if reference is None else X[reference]
+    min_vals = np.min(base, axis=0)
+    max_vals = np.max(base, axis=0)
     data_range = max_vals - min_vals
 
     # Manejar rangos cero
@@ -80,12 +91,14 @@ def range_scaling(
     return X_scaled * target_range + min_target
 
 
-def mean_centering(X: np.ndarray) -> np.ndarray:
+def mean_centering(X: np.ndarray, reference: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Centra los datos restando la media.
 
     Parámetros:
     X -- Matriz de datos con forma (n_muestras, n_características)
+    reference -- Máscara booleana de las muestras usadas para calcular las estadísticas
+                 (por defecto, todas)
 
     Retorna:
     Matriz centrada (media 0)
@@ -93,13 +106,15 @@ def mean_centering(X: np.ndarray) -> np.ndarray:
     if X.size == 0:
         raise ValueError("La matriz de entrada está vacía")
 
-    means = np.mean(X, axis=0)
+    means = np.mean(X if reference is None else X[reference], axis=0)
     return X - means
 
 
+@instrumented("scale")
 def scale(
         X: np.ndarray,
         method: str = 'auto',
+        reference: Optional[np.ndarray] = None,
         **kwargs
 ) -> np.ndarray:
     """
@@ -108,6 +123,7 @@ def scale(
     Parámetros:
     X -- Matriz de datos
     method -- Método a usar: 'auto', 'pareto', 'range', 'center'
+    reference -- Máscara de las muestras usadas para las estadísticas (p. ej. sin las atípicas)
     kwargs -- Argumentos adicionales específicos del método
 
     Retorna:
@@ -116,12 +132,12 @@ def scale(
     method = method.lower()
 
     if method == 'auto':
-        return autoscaling(X)
+        return autoscaling(X, reference)
     elif method == 'pareto':
-        return pareto_scaling(X)
+        return pareto_scaling(X, reference)
     elif method == 'range':
-        return range_scaling(X, **kwargs)
+        return range_scaling(X, reference=reference, **kwargs)
     elif method == 'center':
-        return mean_centering(X)
+        return mean_centering(X, reference)
     else:
         raise ValueError(f"Método de escalado no reconocido: {method}")
\ No newline at end of file
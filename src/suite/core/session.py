@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional, Tuple
+from src.suite.core.instrument import instrumented
+import numpy as np
+import struct
+import json
+import gc
+import os
+
+# Estructura del archivo de sesión (.isq):
+#   [8 bytes]  firma ISQ_MAGIC
+#   [8 bytes]  largo del encabezado JSON (uint64, little-endian)
+#   [n bytes]  encabezado JSON (metadatos + descripción de cada arreglo), relleno con espacios
+#   [...]      arreglos binarios en orden C, cada uno alineado a ALIGNMENT bytes
+# Los arreglos se abren con np.memmap, por lo que abrir una sesión no copia la matriz.
+ISQ_MAGIC = b"ISQSES01"
+ISQ_VERSION = 1
+ALIGNMENT = 64
+SESSION_EXTENSION = ".isq"
+
+
+class NMRSession:
+    """
+    Estado compartible entre iNMR, sNMR y qNMR.
+
+    Atributos:
+    ppm -- Vector de desplazamientos químicos
+    data -- Matriz de espectros (muestras x puntos ppm), ya procesada si corresponde
+    sample_names -- Lista de nombres de muestras
+    regions -- Lista de regiones de integración como pares (ppm_inicio, ppm_fin)
+    k_values -- Factores K por muestra (estándar interno)
+    factor_k -- Factor K único (estándar externo)
+    metodo_integral -- Regla de integración con la que se calcularon las integrales y los K
+    exclusiones -- Regiones (ppm_a, ppm_b) excluidas de las integrales totales y relativas
+    pipeline -- Parámetros del procesamiento aplicado en sNMR
+    origen -- Archivo del que provienen los datos
+    """
+
+    def __init__(
+            self,
+            ppm: np.ndarray,
+            data: np.ndarray,
+            sample_names: List[str],
+            regions: Optional[List[Tuple[float, float]]] = None,
+            k_values: Optional[Dict[str, float]] = None,
+            factor_k: Optional[float] = None,
+            metodo_integral: str = "suma",
+            exclusiones: Optional[List[Tuple[float, float]]] = None,
+            pipeline: Optional[dict] = None,
+            origen: Optional[str] = None
+    ):
+        self.ppm = ppm
+        self.data = data
+        self.sample_names = list(sample_names)
+        self.regions = [tuple(r) for r in regions] if regions else []
+        self.k_values = dict(k_values) if k_values else {}
+        self.factor_k = factor_k
+        self.metodo_integral = metodo_integral
+        self.exclusiones = [tuple(e) for e in exclusiones] if exclusiones else []
+        self.pipeline = dict(pipeline) if pipeline else {}
+        self.origen = origen
+
+
+def mapped_file(arr) -> Optional[str]:
+    """Ruta absoluta del archivo del que `arr` (o el arreglo del que es vista) es un np.memmap"""
+    while isinstance(arr, np.ndarray):
+        if isinstance(arr, np.memmap) and arr.filename:
+            return os.path.abspath(arr.filename)
+        arr = arr.base
+    return None
+
+
+def in_memory(arr, path: str):
+    """
+    Copia en memoria de `arr` si está mapeado desde `path`; si no, el mismo arreglo.
+
+    Windows no permite reemplazar un archivo mapeado: antes de sobrescribir una sesión
+    abierta, quien la tiene mapeada debe cambiar sus arreglos por estas copias.
+    """
+    if arr is not None and mapped_file(arr) == os.path.abspath(path):
+        return np.array(arr)
+    return arr
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@instrumented("save_session")
+def save_session(path: str, session: NMRSession) -> None:
+    """
+    Guarda una sesión en formato binario .isq.
+
+    Parámetros:
+    path -- Ruta del archivo de salida
+    session -- Sesión a guardar
+
+    El archivo se escribe primero en un temporal y luego se reemplaza, para no dejar
+    sesiones a medio escribir. Para sobrescribir la sesión abierta, los arreglos mapeados
+    desde ella deben liberarse antes (in_memory); si alguno sigue abierto y el sistema no
+    permite reemplazar el archivo, se informa sin tocar la sesión original.
+    """
+    try:
+        arrays = {
+            "ppm": np.ascontiguousarray(in_memory(session.ppm, path), dtype="<f8"),
+            "data": np.ascontiguousarray(in_memory(session.data, path), dtype="<f8"),
+        }
+
+        if arrays["data"].ndim != 2 or arrays["data"].shape[1] != arrays["ppm"].shape[0]:
+            raise ValueError("La matriz de datos no coincide con el vector ppm")
+        if arrays["data"].shape[0] != len(session.sample_names):
+            raise ValueError("La cantidad de muestras no coincide con los nombres de muestra")
+
+        header = {
+            "version": ISQ_VERSION,
+            "sample_names": [str(n) for n in session.sample_names],
+            "regions": [[float(a), float(b)] for a, b in session.regions],
+            "k_values": {str(k): float(v) for k, v in session.k_values.items()},
+            "factor_k": None if session.factor_k is None else float(session.factor_k),
+            "metodo_integral": session.metodo_integral,
+            "exclusiones": [[float(a), float(b)] for a, b in session.exclusiones],
+            "pipeline": session.pipeline,
+            "origen": session.origen,
+            "arrays": {},
+        }
+
+        # Los desplazamientos dependen del largo del encabezado, que a su vez depende de
+        # los desplazamientos; se reserva un margen fijo y se recalcula una sola vez.
+        def build_header(data_start):
+            offset = data_start
+            for name, arr in arrays.items():
+                header["arrays"][name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+                offset = _aligned(offset + arr.nbytes)
+            return json.dumps(header).encode("utf-8")
+
+        prefix = len(ISQ_MAGIC) + 8
+        header_bytes = build_header(0)
+        data_start = _aligned(prefix + len(header_bytes) + 256)
+        header_bytes = build_header(data_start)
+        header_bytes = header_bytes.ljust(data_start - prefix, b" ")
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(ISQ_MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for name, arr in arrays.items():
+                f.seek(header["arrays"][name]["offset"])
+                arr.tofile(f)
+        del arrays
+        gc.collect()  # Cierra los mapas del archivo que ya no tienen referencias
+        try:
+            os.replace(tmp_path, path)
+        except PermissionError:
+            os.remove(tmp_path)
+            raise IOError("la sesión está abierta (mapeada en memoria) en otra ventana; "
+                          "ciérrela o guarde con otro nombre")
+
+    except Exception as e:
+        raise IOError(f"Error al guardar la sesión {path}: {str(e)}")
+
+
+@instrumented("load_session")
+def load_session(path: str, mmap: bool = True) -> NMRSession:
+    """
+    Abre una sesión .isq.
+
+    Parámetros:
+    path -- Ruta del archivo de sesión
+    mmap -- Si es True, la matriz se mapea en memoria (solo lectura) en lugar de leerse
+
+    Retorna:
+    NMRSession con los datos y metadatos guardados
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(ISQ_MAGIC)) != ISQ_MAGIC:
+                raise ValueError("El archivo no es una sesión ISQ válida")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        if header.get("version", 0) > ISQ_VERSION:
+            raise ValueError(f"Versión de sesión no soportada: {header.get('version')}")
+
+        arrays = {}
+        for name, info in header["arrays"].items():
+            shape = tuple(info["shape"])
+            if mmap:
+                arrays[name] = np.memmap(path, dtype=info["dtype"], mode="r",
+                                         offset=info["offset"], shape=shape)
+            else:
+                with open(path, "rb") as f:
+                    f.seek(info["offset"])
+                    count = int(np.prod(shape))
+                    arrays[name] = np.fromfile(f, dtype=info["dtype"], count=count).reshape(shape)
+
+        return NMRSession(
+            ppm=arrays["ppm"],
+            data=arrays["data"],
+            sample_names=header["sample_names"],
+            regions=header.get("regions"),
+            k_values=header.get("k_values"),
+            factor_k=header.get("factor_k"),
+            metodo_integral=header.get("metodo_integral", "suma"),
+            exclusiones=header.get("exclusiones"),
+            pipeline=header.get("pipeline"),
+            origen=header.get("origen"),
+        )
+
+    except Exception as e:
+        raise IOError(f"Error al abrir la sesión {path}: {str(e)}")
@@ -0,0 +1,63 @@
+from typing import Callable, List, Optional
+from src.suite.core.lazy import lazy_import
+
+session_io = lazy_import("src.suite.core.session")
+
+
+class SharedDataset:
+    """
+    Set de datos compartido en memoria entre las aplicaciones alojadas por el lanzador.
+
+    Las aplicaciones publican aquí la matriz que cargan o procesan, y las demás
+    ventanas pueden tomarla sin volver a leer el archivo. Los arreglos no se copian:
+    quien los consume debe tratarlos como de solo lectura.
+    """
+
+    def __init__(self):
+        self.ppm = None
+        self.data = None
+        self.sample_names = None
+        self.origen = None
+        self._listeners: List[Callable[["SharedDataset"], None]] = []
+
+    def publish(self, ppm, data, sample_names, origen: Optional[str] = None) -> None:
+        """
+        Publica un set de datos para el resto de las aplicaciones.
+
+        Parámetros:
+        ppm -- Vector de desplazamientos químicos
+        data -- Matriz de espectros (muestras x puntos ppm)
+        sample_names -- Lista de nombres de muestras
+        origen -- Descripción del origen de los datos (archivo, aplicación, etc.)
+        """
+        self.ppm = ppm
+        self.data = data
+        self.sample_names = list(sample_names)
+        self.origen = origen
+
+        for callback in list(self._listeners):
+            callback(self)
+
+    def release_file(self, path: str) -> None:
+        """Cambia por copias en memoria los arreglos mapeados desde `path` (sin avisar a nadie)"""
+        if self.data is not None:
+            self.ppm = session_io.in_memory(self.ppm, path)
+            self.data = session_io.in_memory(self.data, path)
+
+    def is_empty(self) -> bool:
+        return self.data is None
+
+    def subscribe(self, callback: Callable[["SharedDataset"], None]) -> None:
+        """Registra una función que se llamará cada vez que se publiquen datos nuevos"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[["SharedDataset"], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def clear(self) -> None:
+        self.ppm = None
+        self.data = None
+        self.sample_names = None
+        self.origen = None
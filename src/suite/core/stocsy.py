@@ -0,0 +1,76 @@
+"""
+STOCSY (statistical total correlation spectroscopy) por bloques de muestras.
+
+Para cada punto "conductor" d se calcula, a lo largo de las muestras, la covarianza y la
+correlación de Pearson de X[:, d] con todas las columnas de X. La matriz se recorre una
+sola vez por bloques de filas, de modo que puede ser un np.memmap (p. ej. la de una
+sesión .isq) sin cargarse entera en memoria. En cada bloque se acumulan:
+- la suma y la suma de cuadrados de cada columna,
+- el producto cruzado de las columnas conductoras con todas las demás, D^T · X, con
+  todos los conductores en una sola multiplicación de matrices.
+
+Para evitar la cancelación numérica de la fórmula de una pasada, los datos se desplazan
+antes por la media del primer bloque (la covarianza no cambia con el desplazamiento).
+"""
+from typing import Dict, Optional, Sequence
+import numpy as np
+from src.suite.core.instrument import instrumented
+
+# Número máximo de valores leídos por bloque (filas x puntos ppm)
+MAX_BLOCK_ELEMENTS = 8_000_000
+
+
+@instrumented("stocsy")
+def stocsy(
+        X: np.ndarray,
+        drivers: Sequence[int],
+        chunk_rows: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calcula la covarianza y la correlación de los puntos conductores con todo el espectro.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm); puede ser un np.memmap
+    drivers -- Índices de los puntos conductores
+    chunk_rows -- Filas leídas por bloque (por defecto, según MAX_BLOCK_ELEMENTS)
+
+    Retorna:
+    Diccionario con 'covarianza' y 'correlacion' (conductores x puntos ppm)
+    """
+    n_samples, n_points = X.shape
+    if n_samples < 2:
+        raise ValueError("Se necesitan al menos 2 muestras")
+    drivers = np.atleast_1d(np.asarray(drivers, dtype=int))
+    if drivers.size == 0:
+        raise ValueError("Indique al menos un punto conductor")
+    if drivers.min() < 0 or drivers.max() >= n_points:
+        raise ValueError("Punto conductor fuera del rango del espectro")
+
+    if chunk_rows is None:
+        chunk_rows = MAX_BLOCK_ELEMENTS // max(1, n_points)
+    chunk_rows = max(1, int(chunk_rows))
+
+    suma = np.zeros(n_points)
+    suma_cuadrados = np.zeros(n_points)
+    cruzado = np.zeros((len(drivers), n_points))
+    desplazamiento = None
+
+    for start in range(0, n_samples, chunk_rows):
+        bloque = np.asarray(X[start:start + chunk_rows], dtype=float)
+        if desplazamiento is None:
+            desplazamiento = bloque.mean(axis=0)
+        bloque = bloque - desplazamiento
+        suma += bloque.sum(axis=0)
+        suma_cuadrados += np.einsum("ij,ij->j", bloque, bloque)
+        cruzado += bloque[:, drivers].T @ bloque
+
+    media = suma / n_samples
+    covarianza = (cruzado - n_samples * np.outer(media[drivers], media)) / (n_samples - 1)
+    varianza = np.maximum((suma_cuadrados - n_samples * media ** 2) / (n_samples - 1), 0.0)
+    desviacion = np.sqrt(varianza)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlacion = covarianza / np.outer(desviacion[drivers], desviacion)
+    correlacion = np.clip(np.nan_to_num(correlacion, nan=0.0), -1.0, 1.0)
+
+    return {"covarianza": covarianza, "correlacion": correlacion}
@@ -0,0 +1,177 @@
+"""
+Plantillas de regiones de integración y su aplicación por lotes.
+
+Una plantilla es un CSV con una fila por región:
+    nombre,ppm_inicio,ppm_fin,protones,metabolito
+    Lactato CH3,1.35,1.30,3,Lactato
+Solo ppm_inicio y ppm_fin son obligatorias; el nombre por defecto es "inicio - fin", los
+protones 1 y el metabolito queda vacío. Como las regiones se guardan en ppm, la misma
+plantilla se aplica a archivos con ejes distintos.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from src.suite.core.instrument import instrumented
+from src.suite.core.parallel import default_jobs
+
+TEMPLATE_COLUMNS = ["nombre", "ppm_inicio", "ppm_fin", "protones", "metabolito"]
+
+
+def normalize_template(plantilla: pd.DataFrame) -> pd.DataFrame:
+    """Completa las columnas opcionales y valida una plantilla"""
+    plantilla = plantilla.copy()
+    plantilla.columns = [str(c).strip().lower() for c in plantilla.columns]
+    faltan = [c for c in ("ppm_inicio", "ppm_fin") if c not in plantilla.columns]
+    if faltan:
+        raise ValueError(f"Faltan columnas en la plantilla: {', '.join(faltan)}")
+    if plantilla.empty:
+        raise ValueError("La plantilla no tiene regiones")
+
+    plantilla["ppm_inicio"] = pd.to_numeric(plantilla["ppm_inicio"], errors="raise").astype(float)
+    plantilla["ppm_fin"] = pd.to_numeric(plantilla["ppm_fin"], errors="raise").astype(float)
+    por_defecto = plantilla["ppm_inicio"].map("{:.4f}".format) + " - " + plantilla["ppm_fin"].map("{:.4f}".format)
+    if "nombre" not in plantilla.columns:
+        plantilla["nombre"] = por_defecto
+    plantilla["nombre"] = plantilla["nombre"].where(plantilla["nombre"].notna(), por_defecto).astype(str).str.strip()
+    if "protones" not in plantilla.columns:
+        plantilla["protones"] = 1.0
+    plantilla["protones"] = pd.to_numeric(plantilla["protones"], errors="coerce").fillna(1.0)
+    if "metabolito" not in plantilla.columns:
+        plantilla["metabolito"] = ""
+    plantilla["metabolito"] = plantilla["metabolito"].fillna("").astype(str)
+
+    repetidos = plantilla["nombre"][plantilla["nombre"].duplicated()].unique().tolist()
+    if repetidos:
+        raise ValueError(f"Nombres de región repetidos en la plantilla: {', '.join(repetidos)}")
+    if (plantilla["protones"] <= 0).any():
+        raise ValueError("El número de protones debe ser positivo")
+    return plantilla[TEMPLATE_COLUMNS].reset_index(drop=True)
+
+
+def read_template(path: str) -> pd.DataFrame:
+    """Lee una plantilla de regiones (CSV)"""
+    try:
+        plantilla = pd.read_csv(path)
+    except Exception as e:
+        raise IOError(f"Error al leer la plantilla {path}: {str(e)}")
+    return normalize_template(plantilla)
+
+
+def write_template(path: str, plantilla: pd.DataFrame) -> None:
+    """Guarda una plantilla de regiones (CSV)"""
+    try:
+        normalize_template(plantilla).to_csv(path, index=False)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise IOError(f"Error al guardar la plantilla {path}: {str(e)}")
+
+
+def template_from_regions(
+        regiones: Sequence[Tuple[float, float]],
+        info: Optional[Sequence[Dict[str, object]]] = None
+) -> pd.DataFrame:
+    """
+    Construye una plantilla a partir de regiones en ppm.
+
+    Parámetros:
+    regiones -- Pares (ppm_inicio, ppm_fin)
+    info -- Para cada región, diccionario opcional con 'nombre', 'protones' y 'metabolito'
+    """
+    info = info or [{}] * len(regiones)
+    filas = [{"ppm_inicio": a, "ppm_fin": b,
+              "nombre": datos.get("nombre"), "protones": datos.get("protones", 1.0),
+              "metabolito": datos.get("metabolito", "")}
+             for (a, b), datos in zip(regiones, info)]
+    return normalize_template(pd.DataFrame(filas, columns=TEMPLATE_COLUMNS))
+
+
+def template_regions(plantilla: pd.DataFrame, ppm: np.ndarray) -> List[Tuple[int, int]]:
+    """Índices (x1, x2) de cada región de la plantilla en el eje ppm (punto más cercano)"""
+    ppm = np.asarray(ppm, dtype=float)
+    bajo, alto = min(ppm[0], ppm[-1]), max(ppm[0], ppm[-1])
+    regiones = []
+    for a, b in zip(plantilla["ppm_inicio"], plantilla["ppm_fin"]):
+        if max(a, b) < bajo or min(a, b) > alto:
+            raise ValueError(f"La región {a:.4f} - {b:.4f} está fuera del eje ppm")
+        x1, x2 = int(np.argmin(np.abs(ppm - a))), int(np.argmin(np.abs(ppm - b)))
+        regiones.append(tuple(sorted((x1, x2))))
+    return regiones
+
+
+def integrate_file(
+        path: str,
+        plantilla: pd.DataFrame,
+        n_jobs: Optional[int] = 1,
+        metodo_integral: str = "suma"
+) -> pd.DataFrame:
+    """
+    Integra las regiones de la plantilla en todas las muestras de un archivo, con la regla
+    de integración indicada ('suma', 'trapezoidal' o 'simpson').
+
+    Retorna:
+    DataFrame (muestras x regiones) con los nombres de la plantilla como columnas
+    """
+    from src.suite.core.processor import RMNProcessor
+
+    processor = RMNProcessor()
+    processor.n_jobs = n_jobs
+    processor.set_integration_method(metodo_integral)
+    processor.load_file(path)
+    processor.apply_template(plantilla)
+    return processor.get_template_integrals()
+
+
+def _integrate_file_task(path: str, plantilla: pd.DataFrame, metodo_integral: str = "suma"):
+    """Trabajo de batch_integrate en un proceso hijo: nunca lanza, devuelve el error"""
+    try:
+        return integrate_file(path, plantilla, metodo_integral=metodo_integral), None
+    except Exception as e:
+        return None, str(e)
+
+
+@instrumented("integracion_plantilla")
+def batch_integrate(
+        paths: Sequence[str],
+        plantilla: pd.DataFrame,
+        n_jobs: Optional[int] = None,
+        metodo_integral: str = "suma"
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """
+    Aplica una plantilla a varios archivos (un proceso por archivo) y une los resultados.
+
+    Parámetros:
+    paths -- Archivos de espectros (mismo formato que iNMR)
+    plantilla -- Plantilla de regiones (read_template)
+    n_jobs -- Número de procesos (por defecto, todos los núcleos; 1 = sin procesos)
+    metodo_integral -- Regla de integración ('suma', 'trapezoidal' o 'simpson')
+
+    Retorna:
+    tabla -- DataFrame con las columnas 'archivo', 'muestra' y una por región
+    errores -- {archivo: mensaje} de los archivos que no se pudieron integrar
+    """
+    plantilla = normalize_template(plantilla)
+    n_jobs = default_jobs() if n_jobs is None else max(1, int(n_jobs))
+    n_jobs = min(n_jobs, len(paths)) or 1
+
+    if n_jobs == 1:
+        resultados = [_integrate_file_task(path, plantilla, metodo_integral) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            resultados = list(pool.map(_integrate_file_task, paths, [plantilla] * len(paths),
+                                       [metodo_integral] * len(paths)))
+
+    tablas = []
+    errores = {}
+    for path, (tabla, error) in zip(paths, resultados):
+        if error is not None:
+            errores[path] = error
+            continue
+        tabla = tabla.rename_axis("muestra").reset_index()
+        tabla.insert(0, "archivo", path)
+        tablas.append(tabla)
+
+    columnas = ["archivo", "muestra"] + plantilla["nombre"].tolist()
+    tabla = pd.concat(tablas, ignore_index=True) if tablas else pd.DataFrame(columns=columnas)
+    return tabla[columnas], errores
@@ -1,3 +1,4 @@
+from src.suite.core.instrument import instrumented
 import numpy as np
 
 
@@ -95,6 +96,7 @@ def sqrt_transform(X: np.ndarray, epsilon: float = 1e-6) -> np.ndarray:
     return np.sqrt(X_shifted)
 
 
+@instrumented("transform")
 def transform(
         X: np.ndarray,
         method: str = 'glog',
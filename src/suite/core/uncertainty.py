@@ -0,0 +1,163 @@
+"""
+Propagación de incertidumbre a las concentraciones de qNMR por Monte Carlo.
+
+En cada simulación se perturban a la vez:
+- los bordes de las regiones (desplazamiento entero común a todas las muestras),
+- las integrales, con ruido gaussiano de desviación σ·√n (ver core/noise.py; con las
+  reglas que escalan por Δppm, σ·√n·Δppm),
+- el número de protones de cada región (incertidumbre relativa),
+- la concentración del estándar y, si no se conoce su región, el factor K (relativas).
+
+Las integrales perturbadas se obtienen de la integral acumulada de cada muestra, así que
+mover un borde no obliga a volver a sumar la región. Los términos sistemáticos se sortean
+una sola vez por simulación; luego las muestras se procesan por bloques, con todas las
+simulaciones del bloque generadas en una sola llamada al generador aleatorio.
+"""
+from typing import Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.suite.core.instrument import instrumented
+from src.suite.core.integration import IntegralIndex
+
+# Número máximo de valores simulados por bloque (muestras x simulaciones x regiones)
+MAX_BLOCK_ELEMENTS = 20_000_000
+
+
+def jittered_edges(
+        regions: np.ndarray,
+        n_points: int,
+        jitter: int,
+        n_draws: int,
+        rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sortea bordes desplazados hasta ±jitter puntos para cada simulación y región.
+
+    Retorna:
+    inicio, fin -- Matrices (simulaciones x regiones) de índices, fin incluido
+    """
+    a = np.broadcast_to(regions[:, 0], (n_draws, len(regions)))
+    b = np.broadcast_to(regions[:, 1], (n_draws, len(regions)))
+    if jitter > 0:
+        a = a + rng.integers(-jitter, jitter + 1, size=a.shape)
+        b = b + rng.integers(-jitter, jitter + 1, size=b.shape)
+    a = np.clip(a, 0, n_points - 1)
+    b = np.clip(b, a, n_points - 1)
+    return a, b
+
+
+@instrumented("incertidumbre")
+def monte_carlo_concentrations(
+        X: np.ndarray,
+        regions: Sequence[Tuple[int, int]],
+        protons: Sequence[float],
+        sigma: np.ndarray,
+        k: Union[float, np.ndarray, None] = None,
+        std_region: Optional[Tuple[int, int]] = None,
+        std_concentration: Optional[float] = None,
+        std_protons: Optional[float] = None,
+        u_protons: float = 0.0,
+        u_concentration: float = 0.0,
+        u_k: float = 0.0,
+        edge_jitter: int = 0,
+        n_draws: int = 1000,
+        level: float = 0.95,
+        seed: Optional[int] = None,
+        index: Optional[IntegralIndex] = None,
+        ppm: Optional[np.ndarray] = None,
+        rule: str = "suma"
+) -> Dict[str, np.ndarray]:
+    """
+    Simula la distribución de las concentraciones de todas las muestras y regiones.
+
+    C = Integral / protones * K, con K dado (k, incertidumbre relativa u_k) o calculado en
+    cada simulación a partir de la región del estándar interno:
+    K = concentración_std * protones_std / Integral_std.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm)
+    regions -- Pares de índices (x1, x2) de las regiones a cuantificar
+    protons -- Número de protones de cada región
+    sigma -- Ruido de cada muestra (desviación estándar por punto)
+    k -- Factor K único o uno por muestra (si no se indica std_region)
+    std_region -- Región (x1, x2) del estándar interno
+    std_concentration, std_protons -- Concentración y protones del estándar interno
+    u_protons -- Incertidumbre relativa del número de protones
+    u_concentration -- Incertidumbre relativa de la concentración del estándar
+    u_k -- Incertidumbre relativa de K cuando se da directamente
+    edge_jitter -- Desplazamiento máximo de los bordes, en puntos
+    n_draws -- Número de simulaciones
+    level -- Nivel de confianza del intervalo (p. ej. 0.95)
+    seed -- Semilla del generador aleatorio
+    index -- Índice de integración de X ya calculado (opcional; define la regla de integración)
+    ppm -- Vector de desplazamientos químicos (necesario para 'trapezoidal' y 'simpson')
+    rule -- Regla de integración si no se da index
+
+    Retorna:
+    Diccionario con matrices (muestras x regiones): 'media', 'sd', 'inferior', 'superior'
+    """
+    if X.size == 0:
+        raise ValueError("La matriz de entrada está vacía")
+    if n_draws < 2:
+        raise ValueError("Se necesitan al menos 2 simulaciones")
+    if not 0 < level < 1:
+        raise ValueError("El nivel de confianza debe estar entre 0 y 1")
+
+    n_samples, n_points = X.shape
+    regions = np.sort(np.asarray(regions, dtype=int).reshape(-1, 2), axis=1)
+    protons = np.asarray(protons, dtype=float)
+    if len(protons) != len(regions):
+        raise ValueError("Se necesita un número de protones por región")
+    if np.any(protons <= 0):
+        raise ValueError("El número de protones debe ser positivo")
+
+    interno = std_region is not None
+    if interno:
+        if std_concentration is None or not std_protons:
+            raise ValueError("Faltan la concentración o los protones del estándar interno")
+        regions = np.vstack([regions, np.sort(np.asarray(std_region, dtype=int))])
+    elif k is None:
+        raise ValueError("Se necesita un factor K o la región de un estándar interno")
+
+    rng = np.random.default_rng(seed)
+    sigma = np.asarray(sigma, dtype=float)
+
+    # Términos sistemáticos: comunes a todas las muestras de una misma simulación
+    inicio, fin = jittered_edges(regions, n_points, int(edge_jitter), n_draws, rng)
+    indice = index if index is not None else IntegralIndex(X, ppm, rule)
+    escala_ruido = indice.noise_scale(inicio, fin)  # (simulaciones x regiones)
+    n_regiones = len(protons)
+    protones_sim = protons * (1.0 + u_protons * rng.standard_normal((n_draws, n_regiones)))
+    if interno:
+        factor_sim = std_concentration * std_protons * (1.0 + u_concentration * rng.standard_normal(n_draws))
+    else:
+        k = np.broadcast_to(np.asarray(k, dtype=float), (n_samples,))
+        factor_sim = 1.0 + u_k * rng.standard_normal(n_draws)
+
+    alfa = (1.0 - level) / 2.0
+    salida = {clave: np.empty((n_samples, n_regiones)) for clave in ("media", "sd", "inferior", "superior")}
+
+    bloque = max(1, MAX_BLOCK_ELEMENTS // (n_draws * len(regions)))
+    for start in range(0, n_samples, bloque):
+        stop = min(start + bloque, n_samples)
+        acumulada = indice.cumsum[start:stop]
+
+        # Integrales con bordes desplazados y ruido (muestras x simulaciones x regiones)
+        integrales = acumulada[:, fin + 1] - acumulada[:, inicio + indice.start_offset]
+        integrales += (sigma[start:stop, None, None] * escala_ruido[None]
+                       * rng.standard_normal(integrales.shape))
+
+        if interno:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                k_sim = factor_sim[None, :] / integrales[:, :, -1]
+            integrales = integrales[:, :, :-1]
+        else:
+            k_sim = k[start:stop, None] * factor_sim[None, :]
+
+        conc = integrales / protones_sim[None] * k_sim[:, :, None]
+        salida["media"][start:stop] = np.nanmean(conc, axis=1)
+        salida["sd"][start:stop] = np.nanstd(conc, axis=1, ddof=1)
+        inferior, superior = np.nanquantile(conc, [alfa, 1.0 - alfa], axis=1)
+        salida["inferior"][start:stop] = inferior
+        salida["superior"][start:stop] = superior
+
+    return salida
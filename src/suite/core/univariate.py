@@ -0,0 +1,134 @@
+"""
+Estadística univariante por punto ppm (o bucket) entre dos grupos de muestras.
+
+Todas las pruebas se calculan columna a columna de forma vectorizada (las funciones de
+scipy.stats aceptan axis=0), recorriendo la matriz por bloques de columnas para acotar la
+memoria que usan los rangos de Mann-Whitney. Los valores p se corrigen por comparaciones
+múltiples con Benjamini-Hochberg sobre todos los puntos a la vez.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from scipy import stats
+import numpy as np
+import pandas as pd
+from src.suite.core.instrument import instrumented
+
+# Número máximo de valores procesados por bloque (muestras x columnas)
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+
+def split_groups(groups: Sequence, reference: Optional[str] = None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Separa las muestras en grupo de referencia y grupo de comparación.
+
+    Parámetros:
+    groups -- Grupo de cada muestra (exactamente dos grupos distintos)
+    reference -- Grupo de referencia (por defecto, el primero en orden alfabético)
+
+    Retorna:
+    clases -- [referencia, comparación]
+    idx_ref, idx_comp -- Índices de las muestras de cada grupo
+    """
+    etiquetas = np.asarray([str(g) for g in groups])
+    clases = sorted(set(etiquetas.tolist()))
+    if len(clases) != 2:
+        raise ValueError(f"Se necesitan exactamente dos grupos (hay {len(clases)})")
+    if reference is not None:
+        if str(reference) not in clases:
+            raise ValueError(f"Grupo de referencia no encontrado: {reference}")
+        clases.sort(key=lambda c: c != str(reference))
+    idx_ref = np.flatnonzero(etiquetas == clases[0])
+    idx_comp = np.flatnonzero(etiquetas == clases[1])
+    if min(len(idx_ref), len(idx_comp)) < 2:
+        raise ValueError("Cada grupo necesita al menos 2 muestras")
+    return clases, idx_ref, idx_comp
+
+
+def benjamini_hochberg(p: np.ndarray) -> np.ndarray:
+    """
+    Valores q de Benjamini-Hochberg (FDR). Los NaN se ignoran y se conservan.
+    """
+    p = np.asarray(p, dtype=float)
+    q = np.full_like(p, np.nan)
+    validos = np.flatnonzero(~np.isnan(p))
+    m = len(validos)
+    if m == 0:
+        return q
+    orden = validos[np.argsort(p[validos])]
+    ajustados = p[orden] * m / np.arange(1, m + 1)
+    ajustados = np.minimum.accumulate(ajustados[::-1])[::-1]  # Monotonía desde el final
+    q[orden] = np.minimum(ajustados, 1.0)
+    return q
+
+
+def log2_fold_change(media_ref: np.ndarray, media_comp: np.ndarray) -> np.ndarray:
+    """log2(media_comp / media_ref); NaN donde alguna media no es positiva (p. ej. datos centrados)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fc = np.log2(media_comp / media_ref)
+    fc[(media_ref <= 0) | (media_comp <= 0)] = np.nan
+    return fc
+
+
+@instrumented("estadistica_univariante")
+def univariate_tests(
+        X: np.ndarray,
+        groups: Sequence,
+        reference: Optional[str] = None,
+        chunk_cols: Optional[int] = None
+) -> Dict[str, object]:
+    """
+    Calcula t de Welch, Mann-Whitney, fold change y FDR en todos los puntos.
+
+    Parámetros:
+    X -- Matriz de espectros (muestras x puntos ppm o buckets)
+    groups -- Grupo de cada muestra
+    reference -- Grupo de referencia del fold change (ver split_groups)
+    chunk_cols -- Columnas por bloque (por defecto, según MAX_BLOCK_ELEMENTS)
+
+    Retorna:
+    Diccionario con 'clases' y vectores (uno por punto): 'media_ref', 'media_comp',
+    'log2fc', 't', 'p_t', 'q_t', 'u', 'p_u', 'q_u'
+    """
+    n_samples, n_points = X.shape
+    clases, idx_ref, idx_comp = split_groups(groups, reference)
+    if chunk_cols is None:
+        chunk_cols = MAX_BLOCK_ELEMENTS // max(1, n_samples)
+    chunk_cols = max(1, int(chunk_cols))
+
+    salida = {clave: np.empty(n_points) for clave in ("media_ref", "media_comp", "t", "p_t", "u", "p_u")}
+    for start in range(0, n_points, chunk_cols):
+        stop = min(start + chunk_cols, n_points)
+        bloque = np.asarray(X[:, start:stop], dtype=float)
+        ref, comp = bloque[idx_ref], bloque[idx_comp]
+
+        salida["media_ref"][start:stop] = ref.mean(axis=0)
+        salida["media_comp"][start:stop] = comp.mean(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = stats.ttest_ind(comp, ref, axis=0, equal_var=False)
+        salida["t"][start:stop] = t.statistic
+        salida["p_t"][start:stop] = t.pvalue
+        u = stats.mannwhitneyu(comp, ref, axis=0, alternative="two-sided", method="asymptotic")
+        salida["u"][start:stop] = u.statistic
+        salida["p_u"][start:stop] = u.pvalue
+
+    salida["log2fc"] = log2_fold_change(salida["media_ref"], salida["media_comp"])
+    salida["q_t"] = benjamini_hochberg(salida["p_t"])
+    salida["q_u"] = benjamini_hochberg(salida["p_u"])
+    salida["clases"] = clases
+    return salida
+
+
+def results_table(ppm: np.ndarray, resultado: Dict[str, object]) -> pd.DataFrame:
+    """Tabla de resultados (una fila por punto ppm) a partir de univariate_tests"""
+    ref, comp = resultado["clases"]
+    return pd.DataFrame({
+        "ppm": np.asarray(ppm, dtype=float),
+        f"Media {ref}": resultado["media_ref"],
+        f"Media {comp}": resultado["media_comp"],
+        "log2 FC": resultado["log2fc"],
+        "t": resultado["t"],
+        "p (t)": resultado["p_t"],
+        "q (t)": resultado["q_t"],
+        "U": resultado["u"],
+        "p (U)": resultado["p_u"],
+        "q (U)": resultado["q_u"],
+    })
@@ -0,0 +1,74 @@
+from tkinter import ttk, messagebox
+import tkinter as tk
+
+
+class ParameterDialog(tk.Toplevel):
+    """
+    Diálogo modal genérico para pedir parámetros.
+
+    Cada campo es una tupla (clave, etiqueta, valor_por_defecto). Si el valor por
+    defecto es una lista, el campo es un combobox con esas opciones (se preselecciona
+    la primera); si es int o float, el valor se convierte a ese tipo; en otro caso se
+    devuelve como texto. Tras cerrar, `result` contiene el diccionario de valores o
+    None si se canceló.
+    """
+
+    def __init__(self, parent, title, fields, icon_path=None):
+        super().__init__(parent)
+        self.title(title)
+        self.resizable(False, False)
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+        self.transient(parent)
+
+        self.fields = fields
+        self.vars = {}
+        self.result = None
+
+        main_frame = ttk.Frame(self)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        for row, (key, label, default) in enumerate(fields):
+            ttk.Label(main_frame, text=label).grid(row=row, column=0, padx=5, pady=5, sticky="w")
+            if isinstance(default, (list, tuple)):
+                var = tk.StringVar(value=default[0] if default else "")
+                widget = ttk.Combobox(main_frame, textvariable=var, values=list(default), state="readonly")
+            else:
+                var = tk.StringVar(value=str(default))
+                widget = ttk.Entry(main_frame, textvariable=var, width=15)
+            widget.grid(row=row, column=1, padx=5, pady=5, sticky="we")
+            self.vars[key] = var
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.grid(row=len(fields), column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(btn_frame, text="Aceptar", command=self.accept).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Cancelar", command=self.destroy).pack(side=tk.LEFT, padx=5)
+
+        self.bind("<Return>", lambda e: self.accept())
+        self.bind("<Escape>", lambda e: self.destroy())
+        self.grab_set()
+        self.wait_window(self)
+
+    def accept(self):
+        result = {}
+        for key, label, default in self.fields:
+            text = self.vars[key].get()
+            try:
+                if isinstance(default, bool) or isinstance(default, (list, tuple)):
+                    result[key] = text
+                elif isinstance(default, int):
+                    result[key] = int(text)
+                elif isinstance(default, float):
+                    result[key] = float(text)
+                else:
+                    result[key] = text
+            except ValueError:
+                messagebox.showerror("Error", f"Valor inválido para '{label}': {text}", parent=self)
+                return
+        self.result = result
+        self.destroy()
+
+
+def ask_parameters(parent, title, fields, icon_path=None):
+    """Muestra un ParameterDialog y devuelve el diccionario de valores (o None)"""
+    return ParameterDialog(parent, title, fields, icon_path).result
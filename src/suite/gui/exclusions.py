@@ -0,0 +1,96 @@
+from src.suite.core.lazy import lazy_import
+from tkinter import ttk, messagebox
+import tkinter as tk
+
+exclusions = lazy_import("src.suite.core.exclusions")
+
+
+class ExclusionsDialog(tk.Toplevel):
+    """
+    Diálogo modal para editar las regiones (ppm) excluidas de las integrales totales.
+
+    Tras cerrar, `result` contiene la lista de pares (ppm_a, ppm_b) o None si se canceló.
+    """
+
+    def __init__(self, parent, exclusiones, icon_path=None):
+        super().__init__(parent)
+        self.title("Exclusiones de las integrales totales")
+        self.resizable(False, False)
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+        self.transient(parent)
+
+        self.exclusiones = [tuple(e) for e in exclusiones]
+        self.result = None
+
+        main_frame = ttk.Frame(self)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Lista de exclusiones actuales
+        self.listbox = tk.Listbox(main_frame, height=8, width=30)
+        self.listbox.grid(row=0, column=0, columnspan=4, sticky="nsew")
+
+        # Nueva exclusión
+        self.inicio = tk.StringVar()
+        self.fin = tk.StringVar()
+        ttk.Label(main_frame, text="Desde").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ttk.Entry(main_frame, textvariable=self.inicio, width=8).grid(row=1, column=1, pady=5)
+        ttk.Label(main_frame, text="hasta").grid(row=1, column=2, padx=5, pady=5)
+        ttk.Entry(main_frame, textvariable=self.fin, width=8).grid(row=1, column=3, pady=5)
+
+        # Exclusiones habituales (agua, referencia, disolventes)
+        self.habitual = tk.StringVar()
+        self.nombres = [f"{nombre} ({a:.2f} - {b:.2f})" for nombre, (a, b) in exclusions.COMMON_EXCLUSIONS]
+        combo = ttk.Combobox(main_frame, textvariable=self.habitual, values=self.nombres, state="readonly")
+        combo.grid(row=2, column=0, columnspan=4, sticky="we", pady=5)
+        combo.bind("<<ComboboxSelected>>", self.select_common)
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.grid(row=3, column=0, columnspan=4, pady=(5, 0))
+        ttk.Button(btn_frame, text="Agregar", command=self.add).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Quitar", command=self.remove).pack(side=tk.LEFT, padx=5)
+
+        ok_frame = ttk.Frame(main_frame)
+        ok_frame.grid(row=4, column=0, columnspan=4, pady=(10, 0))
+        ttk.Button(ok_frame, text="Aceptar", command=self.accept).pack(side=tk.LEFT, padx=5)
+        ttk.Button(ok_frame, text="Cancelar", command=self.destroy).pack(side=tk.LEFT, padx=5)
+
+        self.refresh()
+        self.bind("<Escape>", lambda e: self.destroy())
+        self.grab_set()
+        self.wait_window(self)
+
+    def refresh(self):
+        self.listbox.delete(0, tk.END)
+        for a, b in self.exclusiones:
+            self.listbox.insert(tk.END, f"{a:.4f} - {b:.4f} ppm")
+
+    def select_common(self, event=None):
+        a, b = exclusions.COMMON_EXCLUSIONS[self.nombres.index(self.habitual.get())][1]
+        self.inicio.set(str(a))
+        self.fin.set(str(b))
+
+    def add(self):
+        try:
+            a, b = sorted((float(self.inicio.get()), float(self.fin.get())))
+        except ValueError:
+            messagebox.showerror("Error", "Ingrese valores numéricos válidos", parent=self)
+            return
+        if (a, b) not in self.exclusiones:
+            self.exclusiones.append((a, b))
+            self.exclusiones.sort()
+        self.refresh()
+
+    def remove(self):
+        for i in reversed(self.listbox.curselection()):
+            del self.exclusiones[i]
+        self.refresh()
+
+    def accept(self):
+        self.result = list(self.exclusiones)
+        self.destroy()
+
+
+def ask_exclusions(parent, exclusiones, icon_path=None):
+    """Muestra un ExclusionsDialog y devuelve la lista de exclusiones (o None)"""
+    return ExclusionsDialog(parent, exclusiones, icon_path).result
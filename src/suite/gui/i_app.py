@@ -1,17 +1,36 @@
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from src.suite.core.processor import RMNProcessor
+from src.suite.core.lazy import lazy_import
+from src.suite.gui.perf_panel import PerformancePanel
+from src.suite.gui.dialogs import ask_parameters
+from src.suite.gui.regions import RegionEditor
+from src.suite.gui.library import LibraryResultsWindow
+from src.suite.gui.exclusions import ask_exclusions
 from tkinter import ttk, messagebox, filedialog
-from matplotlib.ticker import MultipleLocator
-import matplotlib.pyplot as plt
 from pathlib import Path
 import tkinter as tk
-import pandas as pd
 import sys
 
+# Módulos pesados: se importan en su primer uso, después de mostrar la ventana
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg")
+mticker = lazy_import("matplotlib.ticker")
+mfigure = lazy_import("matplotlib.figure")
+mcollections = lazy_import("matplotlib.collections")
+mcolors = lazy_import("matplotlib.colors")
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+session_io = lazy_import("src.suite.core.session")
+templates = lazy_import("src.suite.core.templates")
+library = lazy_import("src.suite.core.library")
+handler = lazy_import("src.suite.core.handler")
+
+# Reglas de integración del menú: (etiqueta, regla de integration.RULES)
+REGLAS_INTEGRACION = (("Suma de puntos", "suma"), ("Trapecios (Δppm)", "trapezoidal"), ("Simpson (Δppm)", "simpson"))
+
 
 class MainApp:
-    def __init__(self):
-        self.raiz = tk.Tk()
+    def __init__(self, master=None, shared=None):
+        self.hosted = master is not None  # Ventana alojada por el lanzador
+        self.raiz = tk.Toplevel(master) if self.hosted else tk.Tk()
         self.raiz.title("iNMR")
         self.raiz.resizable(True, True)
         self.base_path = self.get_base_path()  # Obtener la ruta base del proyecto
@@ -19,15 +38,19 @@ class MainApp:
         self.raiz.iconbitmap(str(icon_path))
         self.raiz.geometry("854x480")
         self.processor = RMNProcessor()
+        self.shared = shared  # Set de datos compartido entre aplicaciones (opcional)
 
         # Variables para selección
         self.selected_columns = []
         self.selecting_points = False
+        self.stocsy_artists = []  # Trazas STOCSY dibujadas sobre el espectro
+        self.biblioteca = None  # Biblioteca espectral abierta (library.SpectralLibrary)
 
         self.create_menu()
         self.create_plot_frame()
         self.raiz.protocol("WM_DELETE_WINDOW", self.on_close)
-        self.raiz.mainloop()
+        if not self.hosted:
+            self.raiz.mainloop()
 
     def get_base_path(self):
         """Obtiene la ruta base del proyecto"""
@@ -64,6 +87,12 @@ class MainApp:
 
         archivo.add_command(label="Nuevo", command=self.nuevo, accelerator="Ctrl+N")
         archivo.add_command(label="Abrir", command=self.abrir, accelerator="Ctrl+O")
+        archivo.add_command(label="Abrir sesión", command=self.abrir_sesion)
+        archivo.add_command(label="Guardar sesión", command=self.guardar_sesion)
+        archivo.add_command(label="Importar plantilla de regiones...", command=self.importar_plantilla)
+        archivo.add_command(label="Exportar plantilla de regiones...", command=self.exportar_plantilla)
+        if self.shared is not None:
+            archivo.add_command(label="Usar datos compartidos", command=self.abrir_compartido)
         archivo.add_command(label="Guardar absolutas", command=self.guardar_absolutas, accelerator="Ctrl+G")
         archivo.add_command(label="Guardar relativas", command=self.guardar_relativas, accelerator="Ctrl+S")
         archivo.add_separator()
@@ -72,7 +101,26 @@ class MainApp:
         herramientas.add_command(label="Mostrar absolutas", command=self.mostrar_integrales, accelerator="m")
         herramientas.add_command(label="Mostrar relativas", command=self.mostrar_integrales_relativas, accelerator="r")
         herramientas.add_command(label="Mostrar totales", command=self.mostrar_totales, accelerator="t")
-
+        herramientas.add_command(label="Exclusiones de totales...", command=self.editar_exclusiones)
+        herramientas.add_separator()
+        herramientas.add_command(label="Detectar picos...", command=self.detectar_picos)
+        herramientas.add_command(label="Editar regiones...", command=self.editar_regiones)
+        herramientas.add_cascade(label="Regla de integración", menu=self.crear_menu_reglas(herramientas))
+        herramientas.add_separator()
+        herramientas.add_command(label="Corregir línea base...", command=self.corregir_linea_base)
+        herramientas.add_command(label="Alinear espectros...", command=self.alinear_espectros)
+        herramientas.add_command(label="Calibrar referencia...", command=self.calibrar_referencia)
+        herramientas.add_command(label="Remuestrear eje ppm...", command=self.remuestrear)
+        herramientas.add_command(label="Agregar espectros...", command=self.agregar_espectros)
+        herramientas.add_command(label="Deconvolucionar región...", command=self.deconvolucionar)
+        herramientas.add_separator()
+        herramientas.add_command(label="STOCSY...", command=self.stocsy)
+        herramientas.add_separator()
+        herramientas.add_command(label="Crear biblioteca...", command=self.crear_biblioteca)
+        herramientas.add_command(label="Abrir biblioteca...", command=self.abrir_biblioteca)
+        herramientas.add_command(label="Buscar en biblioteca...", command=self.buscar_en_biblioteca)
+
+        ayuda.add_command(label="Rendimiento...", command=self.mostrar_rendimiento)
         ayuda.add_command(label="Acerca de...", command=self.acerca, accelerator="")
 
         self.raiz.bind("<Control-n>", self.nuevo)
@@ -84,6 +132,38 @@ class MainApp:
         self.raiz.bind("<t>", self.mostrar_totales)
         self.raiz.bind("<Alt-F4>", self.salir)
 
+    def crear_menu_reglas(self, padre):
+        """Submenú para elegir la regla con la que se integran las regiones"""
+        self.regla_integral = tk.StringVar(value=self.processor.metodo_integral)
+        reglas = tk.Menu(padre, tearoff=0)
+        for etiqueta, regla in REGLAS_INTEGRACION:
+            reglas.add_radiobutton(label=etiqueta, value=regla, variable=self.regla_integral,
+                                   command=self.cambiar_regla_integral)
+        return reglas
+
+    def cambiar_regla_integral(self):
+        """Vuelve a integrar las regiones definidas con la regla elegida"""
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            self.processor.set_integration_method(self.regla_integral.get())
+        except Exception as e:
+            self.regla_integral.set(self.processor.metodo_integral)
+            messagebox.showerror("Error", f"No se pudo cambiar la regla de integración:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def editar_exclusiones(self, event=None):
+        """Edita las regiones (agua, disolvente...) que no cuentan en las integrales totales y relativas"""
+        exclusiones = ask_exclusions(self.raiz, self.processor.exclusiones,
+                                     self.get_resource_path("icons", "iNMR.ico"))
+        if exclusiones is None:
+            return
+        try:
+            self.processor.set_exclusions(exclusiones)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron aplicar las exclusiones:\n{str(e)}")
+
     def seleccionar(self, event=None):
         self.selecting_points = not self.selecting_points
         if not self.selecting_points:
@@ -118,14 +198,21 @@ class MainApp:
         lim_sup = plot_data['lim_sup']
 
         # Crear figura
-        fig, ax = plt.subplots(figsize=(8, 5))
+        fig = mfigure.Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
+        self.fig, self.ax = fig, ax
+        self.stocsy_artists = []
         fig.subplots_adjust(left=0.04, right=0.99, top=0.99, bottom=0.04)
         ax.plot(val_x, prom_y, linewidth=0.5, color='red')
         ax.grid(True, which="both", color="gray", linestyle=":", linewidth=0.5)
         ax.set_xlim(lim_inf, lim_sup)
-        ax.xaxis.set_minor_locator(MultipleLocator(1))
+        ax.xaxis.set_minor_locator(mticker.MultipleLocator(1))
         ax.invert_xaxis()
 
+        # Regiones ya integradas (p. ej. tras corregir la línea base)
+        for x1, x2 in self.processor.regiones:
+            self.dibujar_region(*self.processor.region_plot_data(x1, x2))
+
         # Eventos
         def on_key(event):
             if event.key == "z":
@@ -144,15 +231,11 @@ class MainApp:
 
                 if len(self.selected_columns) == 2:
                     # Calcular integral usando el procesador
-                    x1_val, x2_val, x_region, y_integral = self.processor.calculate_integral(
+                    region = self.processor.calculate_integral(
                         self.selected_columns[0], self.selected_columns[1]
                     )
-
-                    # Dibujar región
-                    offset = 0.3 * max(y_integral) if max(y_integral) > 0 else 0
-                    ax.plot(x_region[::-1], y_integral + offset, color='green', linewidth=0.5)
-                    ax.hlines(0, x1_val, x2_val, colors='green', linewidth=0.8)
-                    plt.draw()
+                    self.dibujar_region(*region)
+                    fig.canvas.draw_idle()
                     self.selected_columns.clear()
 
         def on_scroll(event):
@@ -164,21 +247,27 @@ class MainApp:
             new_y_min = (y_min - y_center) * zoom_factor + y_center
             new_y_max = (y_max - y_center) * zoom_factor + y_center
             ax.set_ylim(new_y_min, new_y_max)
-            plt.draw()
+            fig.canvas.draw_idle()
 
         fig.canvas.mpl_connect("scroll_event", on_scroll)
         fig.canvas.mpl_connect("key_press_event", on_key)
         fig.canvas.mpl_connect("button_press_event", on_click)
 
         # Integrar en Tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
+        canvas = backend_tkagg.FigureCanvasTkAgg(fig, master=self.plot_frame)
         canvas.draw()
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
-        toolbar = NavigationToolbar2Tk(canvas, self.plot_frame)
+        toolbar = backend_tkagg.NavigationToolbar2Tk(canvas, self.plot_frame)
         toolbar.update()
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
+    def dibujar_region(self, x1_val, x2_val, x_region, y_integral):
+        """Dibuja la curva integral y la base de una región sobre el espectro"""
+        offset = 0.3 * max(y_integral) if len(y_integral) > 0 and max(y_integral) > 0 else 0
+        self.ax.plot(x_region[::-1], y_integral + offset, color='green', linewidth=0.5)
+        self.ax.hlines(0, x1_val, x2_val, colors='green', linewidth=0.8)
+
     def abrir(self, event=None):
         """Abre un archivo de espectro"""
         file = filedialog.askopenfilename(
@@ -189,9 +278,464 @@ class MainApp:
             try:
                 self.processor.load_file(file)
                 self.plot_graph()
+                if self.shared is not None:
+                    self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                        self.processor.muestras, origen=file)
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo cargar el archivo:\n{str(e)}")
 
+    def abrir_compartido(self, event=None):
+        """Carga el set de datos compartido por otra aplicación de la suite"""
+        if self.shared is None or self.shared.is_empty():
+            messagebox.showinfo("Información", "No hay datos compartidos disponibles")
+            return
+        try:
+            self.processor.load_arrays(self.shared.ppm, self.shared.data, self.shared.sample_names)
+            self.plot_graph()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron usar los datos compartidos:\n{str(e)}")
+
+    def abrir_sesion(self, event=None):
+        """Abre una sesión .isq guardada por cualquiera de las aplicaciones de la suite"""
+        file = filedialog.askopenfilename(
+            title="Abrir sesión",
+            filetypes=[("Sesión ISQ", "*" + session_io.SESSION_EXTENSION)]
+        )
+        if not file:
+            return
+        try:
+            sesion = session_io.load_session(file)
+            self.processor.load_arrays(sesion.ppm, sesion.data, sesion.sample_names)
+            self.processor.set_integration_method(sesion.metodo_integral)
+            self.regla_integral.set(sesion.metodo_integral)
+            self.processor.set_exclusions(sesion.exclusiones)
+
+            # Recalcular las regiones guardadas (se dibujan junto con el espectro)
+            self.processor.calculate_integrals([
+                (self.processor.ppm_to_index(ppm_inicio), self.processor.ppm_to_index(ppm_fin))
+                for ppm_inicio, ppm_fin in sesion.regions
+            ])
+            self.plot_graph()
+
+            if self.shared is not None:
+                self.shared.publish(sesion.ppm, sesion.data, sesion.sample_names, origen=file)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo abrir la sesión:\n{str(e)}")
+
+    def importar_plantilla(self, event=None):
+        """Integra en los datos actuales las regiones de una plantilla"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+        file = filedialog.askopenfilename(
+            title="Importar plantilla de regiones",
+            filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if not file:
+            return
+        try:
+            columnas = self.processor.apply_template(templates.read_template(file))
+            self.plot_graph()
+            messagebox.showinfo("Plantilla", f"{len(columnas)} regiones integradas")
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo aplicar la plantilla:\n{str(e)}")
+
+    def exportar_plantilla(self, event=None):
+        """Guarda las regiones integradas como plantilla (ppm, nombre, protones y metabolito)"""
+        if not self.processor.regiones:
+            messagebox.showinfo("Información", "No hay regiones integradas")
+            return
+        destino = filedialog.asksaveasfilename(
+            title="Exportar plantilla de regiones",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if destino:
+            try:
+                templates.write_template(destino, self.processor.get_template())
+                messagebox.showinfo("Éxito", f"Plantilla guardada en:\n{destino}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo guardar la plantilla:\n{str(e)}")
+
+    def guardar_sesion(self, event=None):
+        """Guarda los datos y las regiones en una sesión .isq"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados para guardar")
+            return
+
+        destino = filedialog.asksaveasfilename(
+            title="Guardar sesión",
+            defaultextension=session_io.SESSION_EXTENSION,
+            filetypes=[("Sesión ISQ", "*" + session_io.SESSION_EXTENSION)]
+        )
+        if destino:
+            try:
+                # Si se sobrescribe la sesión abierta, dejar de usar sus mapas en memoria
+                self.processor.release_file(destino)
+                if self.shared is not None:
+                    self.shared.release_file(destino)
+                sesion = session_io.NMRSession(
+                    ppm=self.processor.val_x,
+                    data=self.processor.val_y,
+                    sample_names=self.processor.muestras,
+                    regions=self.processor.get_regiones_ppm(),
+                    metodo_integral=self.processor.metodo_integral,
+                    exclusiones=self.processor.exclusiones,
+                )
+                session_io.save_session(destino, sesion)
+                messagebox.showinfo("Éxito", f"Sesión guardada en:\n{destino}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo guardar la sesión:\n{str(e)}")
+
+    def detectar_picos(self, event=None):
+        """Propone regiones a partir de los picos detectados y las integra en una sola pasada"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        params = ask_parameters(self.raiz, "Detección de picos", [
+            ("espectro", "Espectro de referencia", ["Promedio", "Mediana", "Cuantil 90%"]),
+            ("prominencia", "Prominencia mínima (0 = automática)", 0.0),
+            ("snr", "Relación señal/ruido (automática)", 10.0),
+            ("fusion", "Fusión de picos no resueltos (0-1)", 0.5),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        modos = {"Promedio": "mean", "Mediana": "median", "Cuantil 90%": 0.9}
+        try:
+            regiones = self.processor.propose_regions(
+                modo=modos[params["espectro"]],
+                prominencia=params["prominencia"] or None,
+                snr=params["snr"],
+                fusion=params["fusion"]
+            )
+            if not regiones:
+                messagebox.showinfo("Información", "No se detectaron picos con esos parámetros")
+                return
+            self.processor.calculate_integrals(regiones)
+            self.plot_graph()
+            self.editar_regiones()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron detectar los picos:\n{str(e)}")
+
+    def editar_regiones(self, event=None):
+        """Abre el editor de regiones de integración"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+        RegionEditor(self.raiz, self.processor, on_apply=self.plot_graph, on_search=self.buscar_region,
+                     icon_path=self.get_resource_path("icons", "iNMR.ico"))
+
+    def corregir_linea_base(self, event=None):
+        """Corrige la línea base de todas las muestras y vuelve a graficar"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        params = ask_parameters(self.raiz, "Corrección de línea base", [
+            ("metodo", "Método", ["ALS", "arPLS"]),
+            ("lam", "Suavidad (λ)", 1e5),
+            ("p", "Asimetría p (solo ALS)", 0.01),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            self.processor.correct_baseline(params["metodo"].lower(), params["lam"], params["p"])
+            self.plot_graph()
+            if self.shared is not None:
+                self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                    self.processor.muestras, origen=self.shared.origen)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo corregir la línea base:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def alinear_espectros(self, event=None):
+        """Alinea las muestras por intervalos y vuelve a graficar"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        params = ask_parameters(self.raiz, "Alineamiento de espectros", [
+            ("objetivo", "Espectro objetivo", ["Media", "Mediana"]),
+            ("intervalos", "Intervalos", ["Regiones integradas", "Intervalos iguales"]),
+            ("n_intervalos", "Número de intervalos iguales", 50),
+            ("max_shift", "Desplazamiento máximo (puntos)", 50),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            self.processor.align_spectra(
+                target="mean" if params["objetivo"] == "Media" else "median",
+                n_intervals=params["n_intervalos"],
+                max_shift=params["max_shift"],
+                usar_regiones=params["intervalos"] == "Regiones integradas"
+            )
+            self.plot_graph()
+            if self.shared is not None:
+                self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                    self.processor.muestras, origen=self.shared.origen)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron alinear los espectros:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def calibrar_referencia(self, event=None):
+        """Calibra el desplazamiento químico con el pico de referencia y vuelve a graficar"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        params = ask_parameters(self.raiz, "Calibración con referencia", [
+            ("target_ppm", "Desplazamiento de la referencia (ppm)", 0.0),
+            ("ventana", "Ventana de búsqueda (± ppm)", 0.2),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            correcciones = self.processor.calibrate_reference(params["target_ppm"], params["ventana"])
+            self.plot_graph()
+            if self.shared is not None:
+                self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                    self.processor.muestras, origen=self.shared.origen)
+            messagebox.showinfo(
+                "Calibración",
+                f"Corrección aplicada: {correcciones.min():.4f} a {correcciones.max():.4f} ppm"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo calibrar la referencia:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def remuestrear(self, event=None):
+        """Lleva todas las muestras a un eje ppm nuevo y vuelve a graficar"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        val_x = self.processor.val_x
+        params = ask_parameters(self.raiz, "Remuestrear eje ppm", [
+            ("ppm_inicio", "Inicio del eje (ppm)", round(float(val_x[0]), 4)),
+            ("ppm_fin", "Fin del eje (ppm)", round(float(val_x[-1]), 4)),
+            ("n_puntos", "Número de puntos", len(val_x)),
+            ("metodo", "Método", ["Lineal", "Cúbico", "Conservar área"]),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        metodos = {"Lineal": "linear", "Cúbico": "cubic", "Conservar área": "area"}
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            self.processor.resample_axis(
+                np.linspace(params["ppm_inicio"], params["ppm_fin"], params["n_puntos"]),
+                metodos[params["metodo"]]
+            )
+            self.plot_graph()
+            if self.shared is not None:
+                self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                    self.processor.muestras, origen=self.shared.origen)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo remuestrear el eje:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def agregar_espectros(self, event=None):
+        """Agrega las muestras de otro archivo, remuestreadas al eje ppm actual"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        file = filedialog.askopenfilename(
+            title="Agregar espectros",
+            filetypes=[("Archivos de espectro", "*.csv;*.txt")]
+        )
+        if not file:
+            return
+        params = ask_parameters(self.raiz, "Agregar espectros", [
+            ("metodo", "Método de remuestreo", ["Lineal", "Cúbico", "Conservar área"]),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        metodos = {"Lineal": "linear", "Cúbico": "cubic", "Conservar área": "area"}
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            ppm, data, nombres = handler.load_nmr_data(file)
+            self.processor.append_arrays(ppm, data, nombres, metodos[params["metodo"]])
+            self.plot_graph()
+            if self.shared is not None:
+                self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                    self.processor.muestras, origen=self.shared.origen)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron agregar los espectros:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def deconvolucionar(self, event=None):
+        """Ajusta picos superpuestos en una región y agrega sus áreas a la tabla de integrales"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        # Por defecto, la última región seleccionada
+        inicio, fin = self.processor.get_regiones_ppm()[-1] if self.processor.regiones else (0.0, 0.0)
+        params = ask_parameters(self.raiz, "Deconvolución", [
+            ("ppm_inicio", "Inicio de la región (ppm)", round(inicio, 4)),
+            ("ppm_fin", "Fin de la región (ppm)", round(fin, 4)),
+            ("n_picos", "Número de picos", 2),
+            ("forma", "Forma de línea", ["lorentziana", "gaussiana", "pseudo-voigt"]),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            columnas = self.processor.deconvolve_region(
+                self.processor.ppm_to_index(params["ppm_inicio"]),
+                self.processor.ppm_to_index(params["ppm_fin"]),
+                params["n_picos"],
+                params["forma"]
+            )
+            messagebox.showinfo("Deconvolución", "Áreas agregadas:\n" + "\n".join(columnas))
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo deconvolucionar la región:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def stocsy(self, event=None):
+        """Calcula STOCSY para uno o varios puntos conductores y dibuja la traza de covarianza"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        params = ask_parameters(self.raiz, "STOCSY", [
+            ("conductores", "Puntos conductores (ppm, separados por comas)", ""),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+
+        try:
+            conductores = [float(v) for v in str(params["conductores"]).replace(";", ",").split(",") if v.strip()]
+            if not conductores:
+                raise ValueError("Indique al menos un punto conductor")
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            resultado = self.processor.stocsy(conductores)
+            self.dibujar_stocsy(resultado)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo calcular STOCSY:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def dibujar_stocsy(self, resultado):
+        """
+        Dibuja la covarianza de cada conductor sobre el espectro, coloreada por |r|.
+
+        La covarianza se escala a la altura del espectro promedio para compartir el eje.
+        """
+        for artista in self.stocsy_artists:
+            artista.remove()
+        self.stocsy_artists = []
+
+        val_x = self.processor.val_x
+        altura = float(np.max(np.abs(self.processor.prom_y))) or 1.0
+        norma = mcolors.Normalize(0.0, 1.0)
+        for conductor, cov, r in zip(resultado["conductores"], resultado["covarianza"], resultado["correlacion"]):
+            maximo = float(np.max(np.abs(cov))) or 1.0
+            puntos = np.column_stack([val_x, cov * altura / maximo])
+            segmentos = np.stack([puntos[:-1], puntos[1:]], axis=1)
+            traza = mcollections.LineCollection(segmentos, cmap="jet", norm=norma, linewidth=0.8)
+            traza.set_array(np.abs(r[:-1]))
+            self.ax.add_collection(traza)
+            self.stocsy_artists.append(traza)
+            self.stocsy_artists.append(self.ax.axvline(val_x[conductor], color="black", linestyle="--", linewidth=0.6))
+
+        cax = self.ax.inset_axes([0.93, 0.55, 0.012, 0.4])
+        self.fig.colorbar(self.stocsy_artists[0], cax=cax, label="|r|")
+        self.stocsy_artists.insert(0, cax)  # La barra de color se quita antes que su traza
+        self.fig.canvas.draw_idle()
+
+    def crear_biblioteca(self, event=None):
+        """Crea una biblioteca espectral a partir de uno o varios CSV de espectros de referencia"""
+        archivos = filedialog.askopenfilenames(
+            title="Espectros de referencia",
+            filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if not archivos:
+            return
+        params = ask_parameters(self.raiz, "Crear biblioteca", [
+            ("ancho", "Ancho de bucket (ppm)", 0.01),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+        destino = filedialog.askdirectory(title="Carpeta de la biblioteca", mustexist=False)
+        if not destino:
+            return
+        if not destino.endswith(library.LIBRARY_EXTENSION):
+            destino += library.LIBRARY_EXTENSION
+
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            self.biblioteca = library.build_library(
+                destino, [handler.load_nmr_data(archivo) for archivo in archivos], params["ancho"]
+            )
+            messagebox.showinfo("Éxito", f"Biblioteca con {len(self.biblioteca)} compuestos creada en:\n{destino}")
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo crear la biblioteca:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def abrir_biblioteca(self, event=None):
+        """Abre una biblioteca espectral existente"""
+        carpeta = filedialog.askdirectory(title="Abrir biblioteca", mustexist=True)
+        if not carpeta:
+            return False
+        try:
+            self.biblioteca = library.SpectralLibrary(carpeta)
+            return True
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo abrir la biblioteca:\n{str(e)}")
+            return False
+
+    def buscar_en_biblioteca(self, event=None):
+        """Busca una región del espectro promedio (por defecto, la última integrada) en la biblioteca"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+        inicio, fin = self.processor.get_regiones_ppm()[-1] if self.processor.regiones else (0.0, 0.0)
+        params = ask_parameters(self.raiz, "Buscar en biblioteca", [
+            ("ppm_inicio", "Inicio de la región (ppm, 0 y 0 = todo)", round(inicio, 4)),
+            ("ppm_fin", "Fin de la región (ppm)", round(fin, 4)),
+        ], self.get_resource_path("icons", "iNMR.ico"))
+        if params is None:
+            return
+        self.buscar_region(params["ppm_inicio"], params["ppm_fin"])
+
+    def buscar_region(self, ppm_inicio, ppm_fin, k=20):
+        """Muestra los k compuestos de la biblioteca más parecidos a la región indicada"""
+        if self.biblioteca is None and not self.abrir_biblioteca():
+            return
+        ventana = None if ppm_inicio == ppm_fin else (ppm_inicio, ppm_fin)
+        try:
+            resultados = self.processor.search_library(self.biblioteca, ventana, k)
+            LibraryResultsWindow(self.raiz, resultados, ventana, self.get_resource_path("icons", "iNMR.ico"))
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo buscar en la biblioteca:\n{str(e)}")
+
     def mostrar_integrales(self, event=None):
         """Muestra las integrales absolutas calculadas en una ventana"""
         integrales_df = self.processor.get_integrales()
@@ -301,14 +845,19 @@ class MainApp:
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudieron guardar las integrales:\n{str(e)}")
 
+    def mostrar_rendimiento(self, event=None):
+        """Muestra el resumen de tiempos y memoria por etapa"""
+        PerformancePanel(self.raiz, self.get_resource_path("icons", "iNMR.ico"))
+
     def acerca(self):
         """Muestra información acerca de la aplicación"""
         messagebox.showinfo("Acerca de", "iRMN - Herramienta de análisis de espectros\nVersión 1.0")
 
     def salir(self, event=None):
         """Cierra la aplicación"""
-        if messagebox.askokcancel("Salir", "¿Está seguro que desea salir?"):
-            self.raiz.quit()
+        if messagebox.askokcancel("Salir", "¿Está seguro que desea salir?", parent=self.raiz):
+            if not self.hosted:
+                self.raiz.quit()
             self.raiz.destroy()
 
     def on_close(self, event=None):
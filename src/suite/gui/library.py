@@ -0,0 +1,32 @@
+from tkinter import ttk
+import tkinter as tk
+
+
+class LibraryResultsWindow(tk.Toplevel):
+    """Compuestos de la biblioteca más parecidos a una región del espectro"""
+
+    def __init__(self, parent, resultados, ventana=None, icon_path=None):
+        super().__init__(parent)
+        titulo = "Biblioteca espectral"
+        if ventana is not None:
+            titulo += f" ({max(ventana):.3f} - {min(ventana):.3f} ppm)"
+        self.title(titulo)
+        self.geometry("420x320")
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree = ttk.Treeview(tree_frame, columns=("n", "compuesto", "similitud"), show="headings")
+        for col, text, width in (("n", "#", 40), ("compuesto", "Compuesto", 240), ("similitud", "Similitud", 90)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="w" if col == "compuesto" else "center")
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for i, (nombre, similitud) in enumerate(resultados):
+            self.tree.insert("", "end", values=(i + 1, nombre, f"{similitud:.4f}"))
+
+        ttk.Button(self, text="Cerrar", command=self.destroy).pack(side=tk.RIGHT, padx=5, pady=(0, 5))
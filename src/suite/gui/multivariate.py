@@ -0,0 +1,156 @@
+from tkinter import ttk, messagebox, filedialog
+import tkinter as tk
+from src.suite.core.lazy import lazy_import
+
+handler = lazy_import("src.suite.core.handler")
+multivariate = lazy_import("src.suite.core.multivariate")
+np = lazy_import("numpy")
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg")
+mfigure = lazy_import("matplotlib.figure")
+
+
+class MultivariateWindow(tk.Toplevel):
+    """
+    Ventana de análisis multivariante (PCA, PLS-DA, OPLS-DA) con gráficos de scores y
+    loadings. Al hacer clic sobre los loadings se llama a on_select_ppm con el ppm del
+    punto más cercano, para marcarlo en el espectro de la aplicación principal.
+    """
+
+    def __init__(self, parent, ppm, data, sample_names, on_select_ppm=None, icon_path=None):
+        super().__init__(parent)
+        self.title("Análisis multivariante")
+        self.geometry("1000x600")
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+
+        self.ppm = np.asarray(ppm, dtype=float)
+        self.data = data
+        self.sample_names = sample_names
+        self.on_select_ppm = on_select_ppm
+        self.grupos = None
+        self.resultado = None
+        self.marcador = None
+
+        self.metodo = tk.StringVar(value="PCA")
+        self.componentes = tk.IntVar(value=2)
+        self.pliegues = tk.IntVar(value=7)
+        self.archivo_grupos = tk.StringVar(value="(sin grupos)")
+        self.resumen = tk.StringVar(value="Seleccione el método y pulse Calcular")
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        top = ttk.Frame(self)
+        top.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Label(top, text="Método:").pack(side=tk.LEFT)
+        ttk.Combobox(top, textvariable=self.metodo, values=list(multivariate.METHODS),
+                     state="readonly", width=9).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(top, text="Componentes:").pack(side=tk.LEFT)
+        ttk.Entry(top, textvariable=self.componentes, width=4).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(top, text="Pliegues VC:").pack(side=tk.LEFT)
+        ttk.Entry(top, textvariable=self.pliegues, width=4).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(top, text="Grupos...", command=self.cargar_grupos).pack(side=tk.LEFT)
+        ttk.Label(top, textvariable=self.archivo_grupos).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top, text="Calcular", command=self.calcular).pack(side=tk.RIGHT)
+
+        ttk.Label(self, textvariable=self.resumen).pack(side=tk.BOTTOM, anchor="w", padx=5, pady=(0, 5))
+
+        self.fig = mfigure.Figure(figsize=(10, 5))
+        self.ax_scores = self.fig.add_subplot(1, 2, 1)
+        self.ax_loadings = self.fig.add_subplot(1, 2, 2)
+        self.fig.subplots_adjust(left=0.07, right=0.98, top=0.93, bottom=0.1, wspace=0.25)
+        self.canvas = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5)
+        self.canvas.mpl_connect("button_press_event", self.on_click)
+
+    def cargar_grupos(self):
+        """Lee el grupo de cada muestra desde un CSV (muestra, grupo)"""
+        filename = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")], parent=self)
+        if not filename:
+            return
+        try:
+            self.grupos = handler.load_groups(filename, self.sample_names)
+            self.archivo_grupos.set(f"{len(set(self.grupos))} grupos")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al cargar los grupos:\n{str(e)}", parent=self)
+
+    def calcular(self):
+        metodo = self.metodo.get()
+        try:
+            n = self.componentes.get()
+            if metodo == "PCA":
+                self.resultado = multivariate.fit_pca(self.data, n)
+                varianza = self.resultado["varianza"]
+                self.resumen.set("Varianza explicada: " + ", ".join(
+                    f"PC{i + 1} {100 * v:.1f}%" for i, v in enumerate(varianza)))
+            else:
+                if self.grupos is None:
+                    messagebox.showinfo("Información", "Cargue primero el archivo de grupos", parent=self)
+                    return
+                self.resultado = multivariate.fit_discriminant(self.data, self.grupos, metodo, n)
+                vc = multivariate.cross_validate(self.data, self.grupos, metodo, n, self.pliegues.get())
+                self.resumen.set(f"R²Y = {self.resultado['r2y']:.3f}   Q² = {vc['q2']:.3f}   "
+                                 f"Exactitud VC = {100 * vc['exactitud']:.1f}%")
+        except tk.TclError:
+            messagebox.showerror("Error", "Ingrese valores enteros", parent=self)
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Error en el análisis:\n{str(e)}", parent=self)
+            return
+        self.plot()
+
+    def axis_labels(self):
+        metodo = self.metodo.get()
+        if metodo == "PCA":
+            v = self.resultado["varianza"]
+            return [f"PC{i + 1} ({100 * v[i]:.1f}%)" if i < len(v) else "" for i in range(2)]
+        if metodo == "OPLS-DA":
+            return ["t predictivo", "t ortogonal"]
+        return ["t1", "t2"]
+
+    def plot(self):
+        scores = self.resultado["scores"]
+        loadings = self.resultado["loadings"]
+        etiqueta_x, etiqueta_y = self.axis_labels()
+        y = scores[:, 1] if scores.shape[1] > 1 else np.zeros(len(scores))
+
+        ax = self.ax_scores
+        ax.clear()
+        if self.grupos is not None:
+            grupos = np.asarray(self.grupos)
+            for grupo in sorted(set(self.grupos)):
+                mask = grupos == grupo
+                ax.scatter(scores[mask, 0], y[mask], s=20, label=grupo)
+            ax.legend(fontsize=8)
+        else:
+            ax.scatter(scores[:, 0], y, s=20)
+        ax.axhline(0, color="gray", linewidth=0.5)
+        ax.axvline(0, color="gray", linewidth=0.5)
+        ax.set_xlabel(etiqueta_x)
+        ax.set_ylabel(etiqueta_y)
+        ax.set_title("Scores")
+
+        ax = self.ax_loadings
+        ax.clear()
+        ax.plot(self.ppm, loadings[:, 0], linewidth=0.7)
+        ax.invert_xaxis()
+        ax.set_xlabel("ppm")
+        ax.set_title(f"Loadings ({etiqueta_x.split(' (')[0]})")
+        ax.grid(True, color="gray", linestyle=":", linewidth=0.5)
+        self.marcador = None
+        self.canvas.draw_idle()
+
+    def on_click(self, event):
+        """Marca el ppm del loading más cercano y lo envía a la aplicación principal"""
+        if event.inaxes is not self.ax_loadings or event.xdata is None or self.resultado is None:
+            return
+        i = int(np.argmin(np.abs(self.ppm - event.xdata)))
+        ppm = float(self.ppm[i])
+        if self.marcador is not None:
+            self.marcador.remove()
+        self.marcador = self.ax_loadings.axvline(ppm, color="red", linestyle="--", linewidth=0.8)
+        self.resumen.set(f"ppm {ppm:.4f}: loading = {self.resultado['loadings'][i, 0]:.4g}")
+        self.canvas.draw_idle()
+        if self.on_select_ppm is not None:
+            self.on_select_ppm(ppm)
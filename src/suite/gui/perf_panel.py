@@ -0,0 +1,93 @@
+from src.suite.core import instrument
+from src.suite.core.lazy import lazy_import
+from tkinter import ttk
+import tkinter as tk
+
+integral_cache = lazy_import("src.suite.core.cache")
+
+
+class PerformancePanel(tk.Toplevel):
+    """Ventana con el resumen de tiempos y memoria por etapa"""
+
+    def __init__(self, parent, icon_path=None):
+        super().__init__(parent)
+        self.title("Rendimiento")
+        self.geometry("720x360")
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+
+        self.enabled = tk.BooleanVar(value=instrument.is_enabled())
+
+        # Controles
+        top = ttk.Frame(self)
+        top.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Checkbutton(top, text="Registrar tiempos y memoria", variable=self.enabled,
+                        command=self.toggle).pack(side=tk.LEFT)
+        ttk.Button(top, text="Limpiar", command=self.clear).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(top, text="Actualizar", command=self.refresh).pack(side=tk.RIGHT)
+
+        # Caché de integrales
+        cache_frame = ttk.Frame(self)
+        cache_frame.pack(fill=tk.X, padx=5)
+        self.cache_label = ttk.Label(cache_frame)
+        self.cache_label.pack(side=tk.LEFT)
+        ttk.Button(cache_frame, text="Vaciar caché", command=self.clear_cache).pack(side=tk.RIGHT)
+
+        # Tabla de resumen
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        columns = ("etapa", "llamadas", "total", "cpu", "maximo", "memoria")
+        headings = ("Etapa", "Llamadas", "Tiempo total (s)", "CPU (s)", "Máximo (s)", "Pico memoria (MB)")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+        for col, text in zip(columns, headings):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=100, anchor="center")
+        self.tree.column("etapa", width=200, anchor="w")
+
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.refresh()
+
+    def toggle(self):
+        if self.enabled.get():
+            instrument.enable()
+        else:
+            instrument.disable()
+
+    def clear(self):
+        instrument.clear_records()
+        self.refresh()
+
+    def clear_cache(self):
+        almacen = integral_cache.default_cache()
+        if almacen is not None:
+            almacen.clear()
+        self.refresh()
+
+    def refresh_cache(self):
+        almacen = integral_cache.default_cache()
+        if almacen is None:
+            self.cache_label.config(text="Caché de integrales desactivada")
+            return
+        s = almacen.stats()
+        self.cache_label.config(text=(
+            f"Caché de integrales: {s['aciertos']} aciertos, {s['fallos']} fallos "
+            f"({s['tasa_aciertos']:.0%}), {s['entradas']} regiones, {s['bytes'] / 1e6:.1f} MB"
+        ))
+
+    def refresh(self):
+        self.refresh_cache()
+        self.tree.delete(*self.tree.get_children())
+        for s in instrument.summary():
+            self.tree.insert("", "end", values=(
+                s["stage"],
+                s["llamadas"],
+                f"{s['wall_s']:.4f}",
+                f"{s['cpu_s']:.4f}",
+                f"{s['wall_max_s']:.4f}",
+                f"{s['peak_bytes'] / 1e6:.1f}",
+            ))
@@ -1,24 +1,35 @@
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from src.suite.core.processor import RMNProcessor
+from src.suite.core.lazy import lazy_import
+from src.suite.gui.perf_panel import PerformancePanel
+from src.suite.gui.dialogs import ask_parameters
 from tkinter import ttk, messagebox, filedialog
-from matplotlib.ticker import MultipleLocator
-import matplotlib.pyplot as plt
-from tksheet import Sheet
 from pathlib import Path
 import tkinter as tk
-import pandas as pd
-import numpy as np
 import sys
 
+# Módulos pesados: se importan en su primer uso, después de mostrar la ventana
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg")
+mticker = lazy_import("matplotlib.ticker")
+mfigure = lazy_import("matplotlib.figure")
+pd = lazy_import("pandas")
+session_io = lazy_import("src.suite.core.session")
+templates = lazy_import("src.suite.core.templates")
+quant = lazy_import("src.suite.core.quant")
+tksheet = lazy_import("tksheet")
+
+# Reglas de integración del menú: (etiqueta, regla de integration.RULES)
+REGLAS_INTEGRACION = (("Suma de puntos", "suma"), ("Trapecios (Δppm)", "trapezoidal"), ("Simpson (Δppm)", "simpson"))
+
 
 class QuantificationFrame(tk.Toplevel):
-        def __init__(self, parent, processor, factor_k=None, k_values=None):
+        def __init__(self, parent, processor, factor_k=None, k_values=None, estandar_interno=None):
             super().__init__(parent)
             self.title("Cuantificación")
             self.parent = parent
             self.processor = processor
             self.factor_k = factor_k  # Para estándar externo
             self.k_values = k_values  # Para estándar interno: diccionario {muestra: k}
+            self.estandar_interno = estandar_interno  # Región y parámetros del estándar interno
             self.geometry("1000x600")
             self.base_path = self.get_base_path()  # Obtener la ruta base del proyecto
             icon_path = self.get_resource_path("icons", "qNMR.ico")  # Cargar el icono de la ventana
@@ -48,6 +59,10 @@ class QuantificationFrame(tk.Toplevel):
                        command=self.divide_by_protons).pack(side=tk.LEFT, padx=5)
             ttk.Button(button_frame, text="Calcular Concentraciones",
                        command=self.calculate_concentrations).pack(side=tk.LEFT, padx=5)
+            ttk.Button(button_frame, text="Calidad de señal",
+                       command=self.calculate_quality).pack(side=tk.LEFT, padx=5)
+            ttk.Button(button_frame, text="Incertidumbre",
+                       command=self.calculate_uncertainty).pack(side=tk.LEFT, padx=5)
             ttk.Button(button_frame, text="Exportar Tabla",
                        command=self.export_table).pack(side=tk.LEFT, padx=5)
 
@@ -100,7 +115,7 @@ class QuantificationFrame(tk.Toplevel):
 
         def create_table(self, parent):
             """Crea la tabla editable con tksheet"""
-            self.table = Sheet(
+            self.table = tksheet.Sheet(
                 parent,
                 show_x_scrollbar=True,
                 show_y_scrollbar=True,
@@ -137,7 +152,9 @@ class QuantificationFrame(tk.Toplevel):
             df = self.processor.get_integrales()
 
             # Agregar fila para protones
-            protones_row = ["n° protones"] + [1] * len(df.columns)
+            # Los protones de las regiones importadas de una plantilla se completan solos
+            info = self.processor.info_regiones
+            protones_row = ["n° protones"] + [info.get(col, {}).get("protones", 1) for col in df.columns]
 
             # Preparar datos para la tabla
             data = [protones_row]
@@ -151,6 +168,107 @@ class QuantificationFrame(tk.Toplevel):
             self.table.highlight_cells(row=0, bg="lightblue")
             self.table.readonly_cells(row=0, readonly=False)
 
+            # Marcar valores bajo el LOQ si ya se calculó la calidad de señal
+            self.apply_loq_flags()
+
+        def apply_loq_flags(self):
+            """Resalta las celdas cuya integral está por debajo del LOQ"""
+            bajo_loq = self.processor.get_below_loq()
+            if bajo_loq is None:
+                return
+
+            columnas = self.processor.get_integrales().columns.tolist()
+            for j, col in enumerate(columnas):
+                if col not in bajo_loq.columns:
+                    continue
+                for i in bajo_loq[col].to_numpy().nonzero()[0]:
+                    self.table.highlight_cells(row=int(i) + 1, column=j + 1, bg="#f4cccc")
+            self.table.redraw()
+
+        def calculate_quality(self):
+            """Estima el ruido y calcula SNR, LOD y LOQ de cada muestra y región"""
+            params = ask_parameters(self, "Calidad de señal", [
+                ("ppm_min", "Ventana sin señal desde (ppm)", 0.0),
+                ("ppm_max", "Ventana sin señal hasta (ppm)", 0.0),
+            ], self.get_resource_path("icons", "qNMR.ico"))
+            if params is None:
+                return
+
+            # Sin ventana (ambos límites iguales) se estima el ruido por MAD en todo el espectro
+            ventana = None
+            if params["ppm_min"] != params["ppm_max"]:
+                ventana = (params["ppm_min"], params["ppm_max"])
+
+            try:
+                calidad = self.processor.calculate_quality(ventana)
+                self.apply_loq_flags()
+                bajo_loq = self.processor.get_below_loq()
+                TablesWindow(
+                    self, "Calidad de señal",
+                    {"Ruido": calidad["ruido"].to_frame(), "SNR": calidad["snr"],
+                     "LOD": calidad["lod"], "LOQ": calidad["loq"]},
+                    f"{int(bajo_loq.values.sum())} de {bajo_loq.size} valores por debajo del LOQ "
+                    f"(resaltados en la tabla de cuantificación)",
+                    self.get_resource_path("icons", "qNMR.ico")
+                )
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo calcular la calidad de señal: {str(e)}")
+
+        def get_protons(self):
+            """Lee la fila de protones de la tabla como {columna: n° de protones}"""
+            fila = self.table.get_sheet_data()[0][1:]
+            protones = {}
+            for col, val in zip(self.table.headers()[1:], fila):
+                try:
+                    protones[col] = float(val)
+                except (ValueError, TypeError):
+                    protones[col] = 1.0
+            return protones
+
+        def calculate_uncertainty(self):
+            """Propaga la incertidumbre a las concentraciones por Monte Carlo"""
+            if self.factor_k is None and not self.k_values:
+                messagebox.showerror("Error", "No se ha configurado un método de calibración")
+                return
+
+            params = ask_parameters(self, "Incertidumbre (Monte Carlo)", [
+                ("n_draws", "Número de simulaciones", 2000),
+                ("nivel", "Nivel de confianza (%)", 95.0),
+                ("edge_jitter", "Desplazamiento de bordes (± puntos)", 2),
+                ("u_protons", "Incertidumbre de protones (%)", 0.0),
+                ("u_concentration", "Incertidumbre conc. estándar interno (%)", 1.0),
+                ("u_k", "Incertidumbre de K (%, estándar externo)", 1.0),
+            ], self.get_resource_path("icons", "qNMR.ico"))
+            if params is None:
+                return
+
+            usar_interno = self.factor_k is None and self.estandar_interno is not None
+            try:
+                self.config(cursor="watch")
+                self.update_idletasks()
+                resultado = self.processor.concentration_uncertainty(
+                    self.get_protons(),
+                    k=self.factor_k if self.factor_k is not None else self.k_values,
+                    estandar=self.estandar_interno if usar_interno else None,
+                    n_draws=params["n_draws"],
+                    level=params["nivel"] / 100.0,
+                    edge_jitter=params["edge_jitter"],
+                    u_protons=params["u_protons"] / 100.0,
+                    u_concentration=params["u_concentration"] / 100.0,
+                    u_k=params["u_k"] / 100.0,
+                )
+                TablesWindow(
+                    self, "Incertidumbre de concentraciones",
+                    {"Media": resultado["media"], "Desv. estándar": resultado["sd"],
+                     "Límite inferior": resultado["inferior"], "Límite superior": resultado["superior"]},
+                    f"{params['n_draws']} simulaciones, intervalo al {params['nivel']:g}%",
+                    self.get_resource_path("icons", "qNMR.ico")
+                )
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo calcular la incertidumbre: {str(e)}")
+            finally:
+                self.config(cursor="")
+
         def divide_by_protons(self):
             """Divide los valores por el número de protones especificado"""
             try:
@@ -263,9 +381,53 @@ class QuantificationFrame(tk.Toplevel):
                 messagebox.showerror("Error", f"No se pudo exportar la tabla: {str(e)}")
 
 
+class TablesWindow(tk.Toplevel):
+    """Muestra varias tablas de resultados (DataFrames) en pestañas exportables"""
+
+    def __init__(self, parent, title, tablas, mensaje="", icon_path=None):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("900x450")
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+
+        if mensaje:
+            ttk.Label(self, text=mensaje).pack(anchor="w", padx=10, pady=5)
+
+        self.tablas = tablas
+
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        for nombre, df in self.tablas.items():
+            frame = ttk.Frame(self.notebook)
+            sheet = tksheet.Sheet(frame, show_x_scrollbar=True, show_y_scrollbar=True)
+            sheet.headers(["Muestra"] + df.columns.tolist())
+            sheet.set_sheet_data([[idx] + [round(v, 4) for v in row] for idx, row in zip(df.index, df.values)])
+            sheet.enable_bindings("single_select", "drag_select", "copy", "arrowkeys")
+            sheet.pack(fill=tk.BOTH, expand=True)
+            self.notebook.add(frame, text=nombre)
+
+        ttk.Button(self, text="Exportar pestaña", command=self.export).pack(anchor="e", padx=10, pady=5)
+
+    def export(self):
+        nombre = self.notebook.tab(self.notebook.select(), "text")
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            initialfile=f"{nombre.lower()}.csv",
+            filetypes=[("Archivo CSV", "*.csv"), ("All Files", "*.*")]
+        )
+        if file_path:
+            try:
+                self.tablas[nombre].to_csv(file_path)
+                messagebox.showinfo("Éxito", f"Tabla exportada a:\n{file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo exportar la tabla: {str(e)}")
+
+
 class QuantifyApp:
-    def __init__(self):
-        self.raiz = tk.Tk()
+    def __init__(self, master=None, shared=None):
+        self.hosted = master is not None  # Ventana alojada por el lanzador
+        self.raiz = tk.Toplevel(master) if self.hosted else tk.Tk()
         self.raiz.title("qNMR")
         self.raiz.resizable(True, True)
         self.base_path = self.get_base_path()  # Obtener la ruta base del proyecto
@@ -273,8 +435,10 @@ class QuantifyApp:
         self.raiz.iconbitmap(str(icon_path))
         self.raiz.geometry("854x480")
         self.processor = RMNProcessor()
+        self.shared = shared  # Set de datos compartido entre aplicaciones (opcional)
         self.factor_k = None  # Variable para almacenar el factor K de calibración externa
         self.k_values = {}  # Nuevo: almacenará una K por muestra (estándar interno)
+        self.estandar_interno = None  # Región, concentración y protones del estándar interno
 
         # Variables para selección
         self.selected_columns = []
@@ -283,7 +447,8 @@ class QuantifyApp:
         self.create_menu()
         self.create_plot_frame()
         self.raiz.protocol("WM_DELETE_WINDOW", self.on_close)
-        self.raiz.mainloop()
+        if not self.hosted:
+            self.raiz.mainloop()
 
     def get_base_path(self):
         """Obtiene la ruta base del proyecto"""
@@ -317,7 +482,8 @@ class QuantifyApp:
             self.raiz,
             processor=self.processor,
             factor_k=self.factor_k,  # Para estándar externo
-            k_values=self.k_values  # Para estándar interno
+            k_values=self.k_values,  # Para estándar interno
+            estandar_interno=self.estandar_interno
         )
 
     def create_menu(self):
@@ -334,15 +500,25 @@ class QuantifyApp:
 
         archivo.add_command(label="Nuevo", command=self.nuevo, accelerator="Ctrl+N")
         archivo.add_command(label="Abrir", command=self.abrir, accelerator="Ctrl+O")
+        archivo.add_command(label="Abrir sesión", command=self.abrir_sesion)
+        archivo.add_command(label="Guardar sesión", command=self.guardar_sesion)
+        archivo.add_command(label="Importar plantilla de regiones...", command=self.importar_plantilla)
+        archivo.add_command(label="Exportar plantilla de regiones...", command=self.exportar_plantilla)
+        if self.shared is not None:
+            archivo.add_command(label="Usar datos compartidos", command=self.abrir_compartido)
         archivo.add_separator()
         archivo.add_command(label="Salir", command=self.salir, accelerator="Alt+F4")
         herramientas.add_command(label="Seleccionar", command=self.seleccionar, accelerator="z")
         herramientas.add_command(label="Mostrar", command=self.mostrar_integrales, accelerator="m")
+        herramientas.add_cascade(label="Regla de integración", menu=self.crear_menu_reglas(herramientas))
+        herramientas.add_command(label="Deconvolucionar región...", command=self.deconvolucionar)
+        herramientas.add_command(label="Calibrar referencia...", command=self.calibrar_referencia)
         herramientas.add_cascade(label="Calibrar", menu=calibrar)
         calibrar.add_command(label="Estandar Interno", command=self.open_internal_frame, accelerator="R")
         calibrar.add_command(label="Estandar Externo", command=self.open_external_frame, accelerator="Q")
         herramientas.add_command(label="Cuantificar", command=self.open_quantification, accelerator="c")
 
+        ayuda.add_command(label="Rendimiento...", command=self.mostrar_rendimiento)
         ayuda.add_command(label="Acerca de...", command=self.acerca, accelerator="")
 
         self.raiz.bind("<Control-n>", self.nuevo)
@@ -362,6 +538,41 @@ class QuantifyApp:
         self.external_frame = self.ExternalFrame(self.raiz, self)  # Pasar self.raiz como padre
         self.external_frame.grab_set()  # Hacer la ventana modal
 
+    def crear_menu_reglas(self, padre):
+        """Submenú para elegir la regla con la que se integran las regiones"""
+        self.regla_integral = tk.StringVar(value=self.processor.metodo_integral)
+        reglas = tk.Menu(padre, tearoff=0)
+        for etiqueta, regla in REGLAS_INTEGRACION:
+            reglas.add_radiobutton(label=etiqueta, value=regla, variable=self.regla_integral,
+                                   command=self.cambiar_regla_integral)
+        return reglas
+
+    def cambiar_regla_integral(self):
+        """
+        Vuelve a integrar las regiones definidas con la regla elegida. Los factores K
+        calculados con la regla anterior están en otras unidades y se descartan.
+        """
+        if self.regla_integral.get() == self.processor.metodo_integral:
+            return
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            self.processor.set_integration_method(self.regla_integral.get())
+        except Exception as e:
+            self.regla_integral.set(self.processor.metodo_integral)
+            messagebox.showerror("Error", f"No se pudo cambiar la regla de integración:\n{str(e)}")
+            return
+        finally:
+            self.raiz.config(cursor="")
+
+        if self.factor_k is not None or self.k_values:
+            self.factor_k = None
+            self.k_values = {}
+            self.estandar_interno = None
+            messagebox.showinfo("Calibración", "Los factores K se calcularon con otra regla de integración "
+                                               "y se descartaron.\nVuelva a calibrar con el estándar interno "
+                                               "o externo antes de cuantificar.")
+
     def seleccionar(self, event=None):
         self.selecting_points = not self.selecting_points
         if not self.selecting_points:
@@ -396,14 +607,20 @@ class QuantifyApp:
         lim_sup = plot_data['lim_sup']
 
         # Crear figura
-        fig, ax = plt.subplots(figsize=(8, 5))
+        fig = mfigure.Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
+        self.fig, self.ax = fig, ax
         fig.subplots_adjust(left=0.04, right=0.99, top=0.99, bottom=0.04)
         ax.plot(val_x, prom_y, linewidth=0.5, color='red')
         ax.grid(True, which="both", color="gray", linestyle=":", linewidth=0.5)
         ax.set_xlim(lim_inf, lim_sup)
-        ax.xaxis.set_minor_locator(MultipleLocator(1))
+        ax.xaxis.set_minor_locator(mticker.MultipleLocator(1))
         ax.invert_xaxis()
 
+        # Regiones ya integradas (p. ej. tras calibrar la referencia)
+        for x1, x2 in self.processor.regiones:
+            self.dibujar_region(*self.processor.region_plot_data(x1, x2))
+
         # Eventos
         def on_key(event):
             if event.key == "z":
@@ -422,15 +639,11 @@ class QuantifyApp:
 
                 if len(self.selected_columns) == 2:
                     # Calcular integral usando el procesador
-                    x1_val, x2_val, x_region, y_integral = self.processor.calculate_integral(
+                    region = self.processor.calculate_integral(
                         self.selected_columns[0], self.selected_columns[1]
                     )
-
-                    # Dibujar región
-                    offset = 0.3 * max(y_integral) if max(y_integral) > 0 else 0
-                    ax.plot(x_region[::-1], y_integral + offset, color='green', linewidth=0.5)
-                    ax.hlines(0, x1_val, x2_val, colors='green', linewidth=0.8)
-                    plt.draw()
+                    self.dibujar_region(*region)
+                    fig.canvas.draw_idle()
                     self.selected_columns.clear()
 
         def on_scroll(event):
@@ -442,21 +655,27 @@ class QuantifyApp:
             new_y_min = (y_min - y_center) * zoom_factor + y_center
             new_y_max = (y_max - y_center) * zoom_factor + y_center
             ax.set_ylim(new_y_min, new_y_max)
-            plt.draw()
+            fig.canvas.draw_idle()
 
         fig.canvas.mpl_connect("scroll_event", on_scroll)
         fig.canvas.mpl_connect("key_press_event", on_key)
         fig.canvas.mpl_connect("button_press_event", on_click)
 
         # Integrar en Tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
+        canvas = backend_tkagg.FigureCanvasTkAgg(fig, master=self.plot_frame)
         canvas.draw()
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
-        toolbar = NavigationToolbar2Tk(canvas, self.plot_frame)
+        toolbar = backend_tkagg.NavigationToolbar2Tk(canvas, self.plot_frame)
         toolbar.update()
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
+    def dibujar_region(self, x1_val, x2_val, x_region, y_integral):
+        """Dibuja la curva integral y la base de una región sobre el espectro"""
+        offset = 0.3 * max(y_integral) if len(y_integral) > 0 and max(y_integral) > 0 else 0
+        self.ax.plot(x_region[::-1], y_integral + offset, color='green', linewidth=0.5)
+        self.ax.hlines(0, x1_val, x2_val, colors='green', linewidth=0.8)
+
     def abrir(self, event=None):
         """Abre un archivo de espectro"""
         file = filedialog.askopenfilename(
@@ -467,9 +686,121 @@ class QuantifyApp:
             try:
                 self.processor.load_file(file)
                 self.plot_graph()
+                if self.shared is not None:
+                    self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                        self.processor.muestras, origen=file)
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo cargar el archivo:\n{str(e)}")
 
+    def abrir_compartido(self, event=None):
+        """Carga el set de datos compartido por otra aplicación de la suite"""
+        if self.shared is None or self.shared.is_empty():
+            messagebox.showinfo("Información", "No hay datos compartidos disponibles")
+            return
+        try:
+            self.processor.load_arrays(self.shared.ppm, self.shared.data, self.shared.sample_names)
+            self.plot_graph()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron usar los datos compartidos:\n{str(e)}")
+
+    def abrir_sesion(self, event=None):
+        """Abre una sesión .isq guardada por cualquiera de las aplicaciones de la suite"""
+        file = filedialog.askopenfilename(
+            title="Abrir sesión",
+            filetypes=[("Sesión ISQ", "*" + session_io.SESSION_EXTENSION)]
+        )
+        if not file:
+            return
+        try:
+            sesion = session_io.load_session(file)
+            self.processor.load_arrays(sesion.ppm, sesion.data, sesion.sample_names)
+            self.processor.set_integration_method(sesion.metodo_integral)
+            self.regla_integral.set(sesion.metodo_integral)
+            self.processor.set_exclusions(sesion.exclusiones)
+
+            # Recalcular las regiones guardadas (se dibujan junto con el espectro)
+            self.processor.calculate_integrals([
+                (self.processor.ppm_to_index(ppm_inicio), self.processor.ppm_to_index(ppm_fin))
+                for ppm_inicio, ppm_fin in sesion.regions
+            ])
+            self.plot_graph()
+
+            # Restaurar factores de calibración
+            self.factor_k = sesion.factor_k
+            self.k_values = dict(sesion.k_values)
+            self.estandar_interno = None
+            if self.shared is not None:
+                self.shared.publish(sesion.ppm, sesion.data, sesion.sample_names, origen=file)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo abrir la sesión:\n{str(e)}")
+
+    def importar_plantilla(self, event=None):
+        """Integra en los datos actuales las regiones de una plantilla"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+        file = filedialog.askopenfilename(
+            title="Importar plantilla de regiones",
+            filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if not file:
+            return
+        try:
+            columnas = self.processor.apply_template(templates.read_template(file))
+            self.plot_graph()
+            messagebox.showinfo("Plantilla", f"{len(columnas)} regiones integradas")
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo aplicar la plantilla:\n{str(e)}")
+
+    def exportar_plantilla(self, event=None):
+        """Guarda las regiones integradas como plantilla (ppm, nombre, protones y metabolito)"""
+        if not self.processor.regiones:
+            messagebox.showinfo("Información", "No hay regiones integradas")
+            return
+        destino = filedialog.asksaveasfilename(
+            title="Exportar plantilla de regiones",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")]
+        )
+        if destino:
+            try:
+                templates.write_template(destino, self.processor.get_template())
+                messagebox.showinfo("Éxito", f"Plantilla guardada en:\n{destino}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo guardar la plantilla:\n{str(e)}")
+
+    def guardar_sesion(self, event=None):
+        """Guarda los datos, las regiones y los factores K en una sesión .isq"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados para guardar")
+            return
+
+        destino = filedialog.asksaveasfilename(
+            title="Guardar sesión",
+            defaultextension=session_io.SESSION_EXTENSION,
+            filetypes=[("Sesión ISQ", "*" + session_io.SESSION_EXTENSION)]
+        )
+        if destino:
+            try:
+                # Si se sobrescribe la sesión abierta, dejar de usar sus mapas en memoria
+                self.processor.release_file(destino)
+                if self.shared is not None:
+                    self.shared.release_file(destino)
+                sesion = session_io.NMRSession(
+                    ppm=self.processor.val_x,
+                    data=self.processor.val_y,
+                    sample_names=self.processor.muestras,
+                    regions=self.processor.get_regiones_ppm(),
+                    metodo_integral=self.processor.metodo_integral,
+                    exclusiones=self.processor.exclusiones,
+                    k_values=self.k_values,
+                    factor_k=self.factor_k,
+                )
+                session_io.save_session(destino, sesion)
+                messagebox.showinfo("Éxito", f"Sesión guardada en:\n{destino}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo guardar la sesión:\n{str(e)}")
+
     class ExternalFrame(tk.Toplevel):
         def __init__(self, parent, app):
             super().__init__(parent)
@@ -598,22 +929,6 @@ class QuantifyApp:
                 start = float(start)
                 end = float(end)
 
-                # Obtener datos del espectro
-                val_x = self.ref_processor.val_x
-                val_y = self.ref_processor.val_y[0]  # Solo la primera muestra
-
-                # Encontrar índices más cercanos a los desplazamientos
-                idx_start = np.argmin(np.abs(val_x - start))
-                idx_end = np.argmin(np.abs(val_x - end))
-
-                # Asegurar orden correcto
-                if idx_start > idx_end:
-                    idx_start, idx_end = idx_end, idx_start
-
-                # Calcular integral
-                integral = np.sum(val_y[idx_start:idx_end + 1])
-                self.integral_value.set(integral)
-
                 # Obtener otros parámetros
                 protons = float(self.proton_count.get())
                 concentration = float(self.concentration.get())
@@ -622,8 +937,13 @@ class QuantifyApp:
                     messagebox.showerror("Error", "El número de protones no puede ser cero")
                     return
 
-                # Calcular factor K: K = Concentración / (Integral / Número de protones)
-                k_value = concentration / (integral / protons)
+                # Calcular integral y factor K: K = Concentración / (Integral / Número de protones)
+                integral, k_value = quant.external_k_factor(
+                    self.ref_processor.val_x,
+                    self.ref_processor.val_y[0],  # Solo la primera muestra
+                    start, end, protons, concentration, rule=self.app.processor.metodo_integral
+                )
+                self.integral_value.set(integral)
                 self.factor_k.set(k_value)
 
             except ValueError:
@@ -654,6 +974,10 @@ class QuantifyApp:
             self.std_protons = tk.IntVar()
             self.file_path = tk.StringVar()
             self.k_values = {}
+            self.estandar = None  # Parámetros usados para calcular los K (para la incertidumbre)
+            self.standards = []  # Lista de estándares (ppm_inicio, ppm_fin, concentración, protones)
+            self.consensus = tk.StringVar(value="Mediana")
+            self.threshold = tk.DoubleVar(value=3.5)
 
             self.create_widgets()
 
@@ -720,12 +1044,35 @@ class QuantifyApp:
             self.peak_end = ttk.Entry(peak_frame, width=10)
             self.peak_end.grid(row=1, column=1, padx=5, pady=5, sticky="w")
 
+            # Sección: Varios estándares (o varios picos de un mismo estándar)
+            std_frame = ttk.LabelFrame(main_frame, text="Estándares para el consenso")
+            std_frame.pack(fill=tk.X, pady=5)
+
+            columns = ("inicio", "fin", "conc", "protones")
+            self.std_tree = ttk.Treeview(std_frame, columns=columns, show="headings", height=4)
+            for col, text in zip(columns, ("Inicio (ppm)", "Fin (ppm)", "Conc. (mM)", "Protones")):
+                self.std_tree.heading(col, text=text)
+                self.std_tree.column(col, width=80, anchor="center")
+            self.std_tree.grid(row=0, column=0, columnspan=4, padx=5, pady=5, sticky="we")
+
+            ttk.Button(std_frame, text="Agregar estándar", command=self.add_standard).grid(
+                row=1, column=0, padx=5, pady=5, sticky="w")
+            ttk.Button(std_frame, text="Quitar", command=self.remove_standard).grid(
+                row=1, column=1, padx=5, pady=5, sticky="w")
+
+            ttk.Label(std_frame, text="Consenso:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+            ttk.Combobox(std_frame, textvariable=self.consensus, values=["Mediana", "Ponderada"],
+                         state="readonly", width=10).grid(row=2, column=1, padx=5, pady=5, sticky="w")
+            ttk.Label(std_frame, text="Umbral atípicos (z):").grid(row=2, column=2, padx=5, pady=5, sticky="w")
+            ttk.Entry(std_frame, textvariable=self.threshold, width=6).grid(
+                row=2, column=3, padx=5, pady=5, sticky="w")
+
             # Sección: Resultados
             result_frame = ttk.LabelFrame(main_frame, text="Resultados")
             result_frame.pack(fill=tk.BOTH, expand=True, pady=5)
 
             # Treeview para mostrar K por muestra
-            columns = ("Muestra", "K")
+            columns = ("Muestra", "K", "Usados")
             self.tree = ttk.Treeview(result_frame, columns=columns, show="headings", height=8)
 
             # Configurar columnas
@@ -733,6 +1080,8 @@ class QuantifyApp:
             self.tree.column("Muestra", width=150, anchor="w")
             self.tree.heading("K", text="Factor K")
             self.tree.column("K", width=150, anchor="center")
+            self.tree.heading("Usados", text="Estándares usados")
+            self.tree.column("Usados", width=110, anchor="center")
 
             # Scrollbar
             scrollbar = ttk.Scrollbar(result_frame, orient="vertical", command=self.tree.yview)
@@ -750,17 +1099,38 @@ class QuantifyApp:
             ttk.Button(btn_frame, text="Usar estos factores",
                        command=self.use_factors).pack(side=tk.RIGHT, padx=5)
 
-        def calculate_k_all(self):
-            """Calcula K para todas las muestras usando el estándar interno"""
+        def read_standard(self):
+            """Lee el estándar de los campos de entrada como (inicio, fin, concentración, protones)"""
+            conc = float(self.std_concentration.get())
+            protons = int(self.std_protons.get())
+            start = float(self.peak_start.get())
+            end = float(self.peak_end.get())
+
+            if protons <= 0:
+                raise ValueError("Número de protones debe ser positivo")
+            return start, end, conc, protons
+
+        def add_standard(self):
+            """Agrega el estándar de los campos de entrada a la lista del consenso"""
             try:
-                # Obtener parámetros
-                conc = float(self.std_concentration.get())
-                protons = int(self.std_protons.get())
-                start = float(self.peak_start.get())
-                end = float(self.peak_end.get())
+                standard = self.read_standard()
+            except (ValueError, tk.TclError) as e:
+                messagebox.showerror("Error", f"Datos inválidos: {str(e)}", parent=self)
+                return
+            self.standards.append(standard)
+            self.std_tree.insert("", "end", values=standard)
 
-                if protons <= 0:
-                    raise ValueError("Número de protones debe ser positivo")
+        def remove_standard(self):
+            """Quita los estándares seleccionados de la lista"""
+            for item in self.std_tree.selection():
+                self.standards.pop(self.std_tree.index(item))
+                self.std_tree.delete(item)
+
+        def calculate_k_all(self):
+            """Calcula K para todas las muestras usando uno o varios estándares internos"""
+            try:
+                # Sin lista de estándares se usa el de los campos de entrada
+                standards = list(self.standards) or [self.read_standard()]
 
             # VERIFICACIÓN CORREGIDA (usa hasattr y verifica muestras)
                 if not hasattr(self.processor, 'muestras') or not self.processor.muestras:
@@ -771,38 +1141,30 @@ class QuantifyApp:
                 self.k_values = {}
                 self.tree.delete(*self.tree.get_children())
 
-                # Para cada muestra
-                for muestra in self.processor.muestras:
-                    # Obtener índice de la muestra
-                    idx = self.processor.muestras.index(muestra)
-
-                    # Obtener datos de la muestra
-                    val_x = self.processor.val_x
-                    val_y = self.processor.val_y[idx]
-
-                    # Encontrar índices para el rango del estándar
-                    idx_start = np.argmin(np.abs(val_x - start))
-                    idx_end = np.argmin(np.abs(val_x - end))
-
-                    if idx_start > idx_end:
-                        idx_start, idx_end = idx_end, idx_start
-
-                    # Calcular integral del estándar en esta muestra
-                    integral_std = np.sum(val_y[idx_start:idx_end + 1])
+                # K = Concentración / (Integral / Protones) para cada estándar y muestra, y consenso
+                sigma = None
+                if self.processor.calidad is not None:
+                    sigma = self.processor.calidad["ruido"].values
+                k_all, _, usados = quant.internal_k_consensus(
+                    self.processor.val_x, self.processor.get_integral_index(), standards,
+                    method=self.consensus.get().lower(), threshold=self.threshold.get(), sigma=sigma
+                )
 
-                    # Calcular K para esta muestra
-                    # K = Concentración / (Integral / Protones)
-                    k_value = conc / (integral_std / protons)
+                # La incertidumbre por Monte Carlo solo admite un estándar con región conocida
+                self.estandar = None
+                if len(standards) == 1:
+                    start, end, conc, protons = standards[0]
+                    self.estandar = {"inicio": start, "fin": end, "concentracion": conc, "protones": protons}
 
+                for muestra, k_value, usado in zip(self.processor.muestras, k_all, usados):
                     # Guardar K para esta muestra
-                    self.k_values[muestra] = k_value
+                    self.k_values[muestra] = float(k_value)
 
                     # Añadir a la tabla
-                    self.tree.insert("", "end", values=(muestra, f"{k_value:.6f}"))
-
-                #messagebox.showinfo("Éxito", "Factores K calculados para todas las muestras")
+                    self.tree.insert("", "end", values=(muestra, f"{k_value:.6f}",
+                                                        f"{int(usado.sum())}/{len(standards)}"))
 
-            except ValueError as e:
+            except (ValueError, tk.TclError) as e:
                 messagebox.showerror("Error", f"Datos inválidos: {str(e)}")
 
         def use_factors(self):
@@ -812,9 +1174,72 @@ class QuantifyApp:
                 return
 
             self.app.k_values = self.k_values
+            self.app.estandar_interno = self.estandar
             messagebox.showinfo("Éxito", "Factores K configurados para cuantificación")
             self.destroy()
 
+    def calibrar_referencia(self, event=None):
+        """Calibra el desplazamiento químico con el pico de referencia y vuelve a graficar"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        params = ask_parameters(self.raiz, "Calibración con referencia", [
+            ("target_ppm", "Desplazamiento de la referencia (ppm)", 0.0),
+            ("ventana", "Ventana de búsqueda (± ppm)", 0.2),
+        ], self.get_resource_path("icons", "qNMR.ico"))
+        if params is None:
+            return
+
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            correcciones = self.processor.calibrate_reference(params["target_ppm"], params["ventana"])
+            self.plot_graph()
+            if self.shared is not None:
+                self.shared.publish(self.processor.val_x, self.processor.val_y,
+                                    self.processor.muestras, origen=self.shared.origen)
+            messagebox.showinfo(
+                "Calibración",
+                f"Corrección aplicada: {correcciones.min():.4f} a {correcciones.max():.4f} ppm"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo calibrar la referencia:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
+    def deconvolucionar(self, event=None):
+        """Ajusta picos superpuestos en una región y agrega sus áreas a la tabla de integrales"""
+        if self.processor.val_y is None:
+            messagebox.showinfo("Información", "No hay datos cargados")
+            return
+
+        # Por defecto, la última región seleccionada
+        inicio, fin = self.processor.get_regiones_ppm()[-1] if self.processor.regiones else (0.0, 0.0)
+        params = ask_parameters(self.raiz, "Deconvolución", [
+            ("ppm_inicio", "Inicio de la región (ppm)", round(inicio, 4)),
+            ("ppm_fin", "Fin de la región (ppm)", round(fin, 4)),
+            ("n_picos", "Número de picos", 2),
+            ("forma", "Forma de línea", ["lorentziana", "gaussiana", "pseudo-voigt"]),
+        ], self.get_resource_path("icons", "qNMR.ico"))
+        if params is None:
+            return
+
+        try:
+            self.raiz.config(cursor="watch")
+            self.raiz.update_idletasks()
+            columnas = self.processor.deconvolve_region(
+                self.processor.ppm_to_index(params["ppm_inicio"]),
+                self.processor.ppm_to_index(params["ppm_fin"]),
+                params["n_picos"],
+                params["forma"]
+            )
+            messagebox.showinfo("Deconvolución", "Áreas agregadas:\n" + "\n".join(columnas))
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo deconvolucionar la región:\n{str(e)}")
+        finally:
+            self.raiz.config(cursor="")
+
     def mostrar_integrales(self, event=None):
         """Muestra las integrales absolutas calculadas en una ventana"""
         integrales_df = self.processor.get_integrales()
@@ -867,14 +1292,19 @@ class QuantifyApp:
 
         self.processor.reset()
 
+    def mostrar_rendimiento(self, event=None):
+        """Muestra el resumen de tiempos y memoria por etapa"""
+        PerformancePanel(self.raiz, self.get_resource_path("icons", "qNMR.ico"))
+
     def acerca(self):
         """Muestra información acerca de la aplicación"""
         messagebox.showinfo("Acerca de", "iRMN - Herramienta de análisis de espectros\nVersión 1.0")
 
     def salir(self, event=None):
         """Cierra la aplicación"""
-        if messagebox.askokcancel("Salir", "¿Está seguro que desea salir?"):
-            self.raiz.quit()
+        if messagebox.askokcancel("Salir", "¿Está seguro que desea salir?", parent=self.raiz):
+            if not self.hosted:
+                self.raiz.quit()
             self.raiz.destroy()
 
     def on_close(self, event=None):
@@ -0,0 +1,87 @@
+from tkinter import ttk, messagebox, filedialog
+import tkinter as tk
+from src.suite.core.lazy import lazy_import
+
+np = lazy_import("numpy")
+quality = lazy_import("src.suite.core.qc")
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg")
+mfigure = lazy_import("matplotlib.figure")
+
+
+class QCReportWindow(tk.Toplevel):
+    """Informe del control de calidad: T² y DModX de cada muestra, con sus límites"""
+
+    def __init__(self, parent, informe, sample_names, icon_path=None):
+        super().__init__(parent)
+        self.title("Control de calidad")
+        self.geometry("820x520")
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+
+        self.informe = informe
+        self.sample_names = list(sample_names)
+
+        self.create_widgets()
+        self.fill()
+
+    def create_widgets(self):
+        atipicas = int(np.sum(self.informe["atipicas"]))
+        top = ttk.Frame(self)
+        top.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(top, text=(f"{atipicas} de {len(self.sample_names)} muestras atípicas   "
+                             f"(límite T² = {self.informe['t2_lim']:.3f}, "
+                             f"límite DModX = {self.informe['dmodx_lim']:.3f})")).pack(side=tk.LEFT)
+        ttk.Button(top, text="Exportar...", command=self.exportar).pack(side=tk.RIGHT)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        tree_frame = ttk.Frame(body)
+        tree_frame.pack(side=tk.LEFT, fill=tk.Y)
+        columnas = ("muestra", "t2", "dmodx", "atipica")
+        self.tree = ttk.Treeview(tree_frame, columns=columnas, show="headings")
+        for col, text, width in zip(columnas, ("Muestra", "T²", "DModX", "Atípica"), (140, 80, 80, 60)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="center")
+        self.tree.tag_configure("atipica", background="#ffcccc")
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.Y)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.fig = mfigure.Figure(figsize=(4, 4))
+        self.ax = self.fig.add_subplot()
+        self.fig.subplots_adjust(left=0.15, right=0.97, top=0.95, bottom=0.12)
+        self.canvas = backend_tkagg.FigureCanvasTkAgg(self.fig, master=body)
+        self.canvas.get_tk_widget().pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    def fill(self):
+        t2, dmodx, atipicas = self.informe["t2"], self.informe["dmodx"], self.informe["atipicas"]
+        for i, nombre in enumerate(self.sample_names):
+            self.tree.insert("", "end", values=(nombre, f"{t2[i]:.3f}", f"{dmodx[i]:.3f}", "Sí" if atipicas[i] else ""),
+                             tags=("atipica",) if atipicas[i] else ())
+
+        ax = self.ax
+        ax.scatter(t2[~atipicas], dmodx[~atipicas], s=12, color="tab:blue")
+        ax.scatter(t2[atipicas], dmodx[atipicas], s=16, color="tab:red")
+        for i in np.flatnonzero(atipicas):
+            ax.annotate(str(self.sample_names[i]), (t2[i], dmodx[i]), fontsize=7)
+        ax.axvline(self.informe["t2_lim"], color="gray", linestyle="--", linewidth=0.8)
+        ax.axhline(self.informe["dmodx_lim"], color="gray", linestyle="--", linewidth=0.8)
+        ax.set_xlabel("T² de Hotelling")
+        ax.set_ylabel("DModX")
+        self.canvas.draw_idle()
+
+    def exportar(self):
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            title="Exportar informe de control de calidad",
+            parent=self
+        )
+        if filename:
+            try:
+                quality.report_table(self.informe, self.sample_names).to_csv(filename, index=False)
+                messagebox.showinfo("Éxito", f"Informe guardado en:\n{filename}", parent=self)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar el informe:\n{str(e)}", parent=self)
@@ -0,0 +1,121 @@
+from tkinter import ttk, messagebox
+import tkinter as tk
+
+
+class RegionEditor(tk.Toplevel):
+    """Ventana para revisar, editar y eliminar las regiones de integración"""
+
+    def __init__(self, parent, processor, on_apply=None, on_search=None, icon_path=None):
+        super().__init__(parent)
+        self.title("Regiones de integración")
+        self.geometry("420x420")
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+
+        self.processor = processor
+        self.on_apply = on_apply  # Se llama después de aplicar los cambios (p. ej. para redibujar)
+        self.on_search = on_search  # Busca una región (ppm_inicio, ppm_fin) en la biblioteca espectral
+        self.regiones = self.processor.get_regiones_ppm()
+
+        self.ppm_inicio = tk.DoubleVar()
+        self.ppm_fin = tk.DoubleVar()
+
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        # Tabla de regiones
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.tree = ttk.Treeview(tree_frame, columns=("n", "inicio", "fin"), show="headings")
+        for col, text, width in (("n", "#", 50), ("inicio", "Inicio (ppm)", 150), ("fin", "Fin (ppm)", 150)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="center")
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+        # Edición de la región seleccionada
+        edit_frame = ttk.Frame(self)
+        edit_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(edit_frame, text="Inicio:").pack(side=tk.LEFT)
+        ttk.Entry(edit_frame, textvariable=self.ppm_inicio, width=10).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Label(edit_frame, text="Fin:").pack(side=tk.LEFT)
+        ttk.Entry(edit_frame, textvariable=self.ppm_fin, width=10).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(edit_frame, text="Modificar", command=self.update_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(edit_frame, text="Agregar", command=self.add).pack(side=tk.LEFT, padx=2)
+
+        btn_frame = ttk.Frame(self)
+        btn_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        ttk.Button(btn_frame, text="Eliminar", command=self.delete_selected).pack(side=tk.LEFT, padx=2)
+        if self.on_search is not None:
+            ttk.Button(btn_frame, text="Buscar en biblioteca", command=self.search_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Cerrar", command=self.destroy).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(btn_frame, text="Aplicar", command=self.apply).pack(side=tk.RIGHT, padx=2)
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for i, (inicio, fin) in enumerate(self.regiones):
+            self.tree.insert("", "end", iid=str(i), values=(i + 1, f"{inicio:.4f}", f"{fin:.4f}"))
+
+    def selected_indices(self):
+        return sorted(int(iid) for iid in self.tree.selection())
+
+    def on_select(self, event=None):
+        seleccion = self.selected_indices()
+        if len(seleccion) == 1:
+            inicio, fin = self.regiones[seleccion[0]]
+            self.ppm_inicio.set(round(inicio, 4))
+            self.ppm_fin.set(round(fin, 4))
+
+    def read_entries(self):
+        try:
+            return self.ppm_inicio.get(), self.ppm_fin.get()
+        except tk.TclError:
+            messagebox.showerror("Error", "Ingrese valores numéricos de ppm", parent=self)
+            return None
+
+    def update_selected(self):
+        seleccion = self.selected_indices()
+        if len(seleccion) != 1:
+            messagebox.showinfo("Información", "Seleccione una región para modificar", parent=self)
+            return
+        valores = self.read_entries()
+        if valores is not None:
+            self.regiones[seleccion[0]] = valores
+            self.refresh()
+
+    def add(self):
+        valores = self.read_entries()
+        if valores is not None:
+            self.regiones.append(valores)
+            self.refresh()
+
+    def delete_selected(self):
+        seleccion = set(self.selected_indices())
+        self.regiones = [r for i, r in enumerate(self.regiones) if i not in seleccion]
+        self.refresh()
+
+    def search_selected(self):
+        seleccion = self.selected_indices()
+        if len(seleccion) != 1:
+            messagebox.showinfo("Información", "Seleccione una región para buscar", parent=self)
+            return
+        self.on_search(*self.regiones[seleccion[0]])
+
+    def apply(self):
+        """Recalcula todas las regiones en una sola pasada"""
+        try:
+            self.processor.replace_regions([
+                (self.processor.ppm_to_index(inicio), self.processor.ppm_to_index(fin))
+                for inicio, fin in self.regiones
+            ])
+            self.regiones = self.processor.get_regiones_ppm()
+            self.refresh()
+            if self.on_apply is not None:
+                self.on_apply()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron aplicar las regiones:\n{str(e)}", parent=self)
@@ -1,20 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from src.suite.core.handler import load_nmr_data, save_processed_data
-from src.suite.core.trnsf import transform
-from src.suite.core.norm import normalize
-from src.suite.core.scaling import scale
+from src.suite.core.lazy import lazy_import
+from src.suite.gui.perf_panel import PerformancePanel
 from pathlib import Path
-import numpy as np
 import sys
 
+# Módulos pesados: se importan en su primer uso, después de mostrar la ventana
+handler = lazy_import("src.suite.core.handler")
+pipeline = lazy_import("src.suite.core.pipeline")
+np = lazy_import("numpy")
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg")
+mfigure = lazy_import("matplotlib.figure")
+session_io = lazy_import("src.suite.core.session")
+exclusions = lazy_import("src.suite.core.exclusions")
+mv_window = lazy_import("src.suite.gui.multivariate")
+uv_window = lazy_import("src.suite.gui.univariate")
+qc_window = lazy_import("src.suite.gui.qc")
+
 
 class ScalingApp:
-    def __init__(self):
-        self.raiz = tk.Tk()
+    def __init__(self, master=None, shared=None):
+        self.hosted = master is not None  # Ventana alojada por el lanzador
+        self.raiz = tk.Toplevel(master) if self.hosted else tk.Tk()
         self.raiz.title("sNMR")
-        self.raiz.geometry("375x450")
-        self.raiz.resizable(False, False)
+        self.raiz.geometry("1000x700")
+        self.raiz.resizable(True, True)
         self.base_path = self.get_base_path()  # Obtener la ruta base del proyecto
         icon_path = self.get_resource_path("icons", "sNMR.ico")  # Cargar el icono de la ventana
         self.raiz.iconbitmap(str(icon_path))
@@ -24,21 +34,44 @@ class ScalingApp:
         self.data = None
         self.processed_data = None
         self.sample_names = None
+        self.processed_names = None  # Nombres de las muestras que quedan tras el control de calidad
+        self.qc_report = None  # Informe del último control de calidad (T², DModX, atípicas)
+        self.shared = shared  # Set de datos compartido entre aplicaciones (opcional)
+        self.preview = None  # Procesamiento incremental sobre un subconjunto de muestras
+        self.preview_ppm = None
+        self.preview_names = None
+        self.preview_job = None
+        self.ppm_marcado = None  # ppm seleccionado desde el análisis multivariante
 
         # Variables de control
         self.file_path = tk.StringVar()
+        self.baseline_method = tk.StringVar(value="Ninguna")
+        self.baseline_lam = tk.DoubleVar(value=1e5)
+        self.baseline_p = tk.DoubleVar(value=0.01)
         self.transform_method = tk.StringVar(value="ninguna")
+        self.qc_method = tk.StringVar(value="Ninguno")
+        self.qc_components = tk.IntVar(value=2)
+        self.qc_confidence = tk.DoubleVar(value=0.99)
         self.norm_method = tk.StringVar(value="ninguna")
         self.scale_method = tk.StringVar(value="ninguna")
         self.ref_ppm_min = tk.DoubleVar(value=0.0)
         self.ref_ppm_max = tk.DoubleVar(value=0.0)
+        self.area_exclusions = tk.StringVar(value="")  # Regiones fuera del área total, p. ej. "4.70 - 4.90"
         self.glog_lambda = tk.DoubleVar(value=1.0)
 
         # Crear interfaz
         self.create_widgets()
+        self.create_preview_pane()
         self.create_menu()
+
+        # Actualizar la vista previa cada vez que cambia un control
+        for var in (self.baseline_method, self.baseline_lam, self.baseline_p, self.transform_method, self.glog_lambda,
+                    self.qc_method, self.qc_components, self.qc_confidence, self.norm_method,
+                    self.ref_ppm_min, self.ref_ppm_max, self.area_exclusions, self.scale_method):
+            var.trace_add("write", self.schedule_preview)
         self.raiz.protocol("WM_DELETE_WINDOW", self.on_close)
-        self.raiz.mainloop()
+        if not self.hosted:
+            self.raiz.mainloop()
 
     def get_base_path(self):
         """Obtiene la ruta base del proyecto"""
@@ -63,15 +96,29 @@ class ScalingApp:
         return resource_path
 
     def create_widgets(self):
+        controls = ttk.Frame(self.raiz)
+        controls.pack(side="left", fill="y")
+
         # 1. Sección de archivo
-        file_frame = ttk.LabelFrame(self.raiz, text="Ingrese su set de datos")
+        file_frame = ttk.LabelFrame(controls, text="Ingrese su set de datos")
         file_frame.pack(pady=10, padx=20, fill="x")
 
         ttk.Entry(file_frame, textvariable=self.file_path, width=40).pack(side="left", padx=5)
         ttk.Button(file_frame, text="Examinar...", command=self.browse_file).pack(side="right", padx=5)
 
-        # 2. Sección de transformación
-        trans_frame = ttk.LabelFrame(self.raiz, text="Transformación")
+        # 2. Sección de línea base
+        baseline_frame = ttk.LabelFrame(controls, text="Línea base")
+        baseline_frame.pack(pady=10, padx=20, fill="x")
+
+        ttk.Combobox(baseline_frame, textvariable=self.baseline_method, values=["Ninguna", "ALS", "arPLS"],
+                     state="readonly", width=10).pack(side="left", padx=5, pady=5)
+        ttk.Label(baseline_frame, text="λ:").pack(side="left")
+        ttk.Entry(baseline_frame, textvariable=self.baseline_lam, width=8).pack(side="left")
+        ttk.Label(baseline_frame, text="p:").pack(side="left", padx=(5, 0))
+        ttk.Entry(baseline_frame, textvariable=self.baseline_p, width=6).pack(side="left")
+
+        # 3. Sección de transformación
+        trans_frame = ttk.LabelFrame(controls, text="Transformación")
         trans_frame.pack(pady=10, padx=20, fill="x")
 
         ttk.Radiobutton(trans_frame, text="Ninguna", variable=self.transform_method, value="ninguna").pack(anchor="w")
@@ -86,8 +133,19 @@ class ScalingApp:
         ttk.Entry(self.glog_frame, textvariable=self.glog_lambda, width=8).pack(side="left")
         self.glog_frame.pack_forget()  # Ocultar inicialmente
 
-        # 3. Sección de normalización
-        norm_frame = ttk.LabelFrame(self.raiz, text="Normalización")
+        # 4. Sección de control de calidad
+        qc_frame = ttk.LabelFrame(controls, text="Control de calidad")
+        qc_frame.pack(pady=10, padx=20, fill="x")
+
+        ttk.Combobox(qc_frame, textvariable=self.qc_method, values=["Ninguno", "Marcar atípicas", "Excluir atípicas"],
+                     state="readonly", width=15).pack(side="left", padx=5, pady=5)
+        ttk.Label(qc_frame, text="PCs:").pack(side="left")
+        ttk.Entry(qc_frame, textvariable=self.qc_components, width=3).pack(side="left")
+        ttk.Label(qc_frame, text="Conf.:").pack(side="left", padx=(5, 0))
+        ttk.Entry(qc_frame, textvariable=self.qc_confidence, width=5).pack(side="left")
+
+        # 5. Sección de normalización
+        norm_frame = ttk.LabelFrame(controls, text="Normalización")
         norm_frame.pack(pady=10, padx=20, fill="x")
 
         methods = ["Ninguna", "Área Total", "PQN", "Vector Unitario", "Estándar Interno"]
@@ -104,16 +162,22 @@ class ScalingApp:
         ttk.Label(self.ref_frame, text="ppm").pack(side="left")
         self.ref_frame.pack_forget()  # Ocultar inicialmente
 
-        # 4. Sección de escalado
-        scale_frame = ttk.LabelFrame(self.raiz, text="Escalado")
+        # Frame para las regiones excluidas del área total (agua, disolvente...)
+        self.exclusion_frame = ttk.Frame(norm_frame)
+        ttk.Label(self.exclusion_frame, text="Excluir (ppm):").pack(side="left")
+        ttk.Entry(self.exclusion_frame, textvariable=self.area_exclusions, width=20).pack(side="left", fill="x", expand=True)
+        self.exclusion_frame.pack_forget()
+
+        # 6. Sección de escalado
+        scale_frame = ttk.LabelFrame(controls, text="Escalado")
         scale_frame.pack(pady=10, padx=20, fill="x")
 
         scale_methods = ["Ninguno", "Autoescalado", "Pareto", "Rango"]
         scale_combo = ttk.Combobox(scale_frame, textvariable=self.scale_method, values=scale_methods, state="readonly")
         scale_combo.pack(fill="x", padx=5, pady=5)
 
-        # 5. Botón de procesamiento
-        ttk.Button(self.raiz, text="PROCESAR", command=self.process_data, style="Accent.TButton").pack(pady=20)
+        # 7. Botón de procesamiento
+        ttk.Button(controls, text="PROCESAR", command=self.process_data, style="Accent.TButton").pack(pady=20)
 
         # Estilo para botón destacado
         style = ttk.Style()
@@ -124,16 +188,29 @@ class ScalingApp:
         bm = tk.Menu(self.raiz)
         self.raiz.config(menu=bm)
         archivo = tk.Menu(bm, tearoff=0)
+        analisis = tk.Menu(bm, tearoff=0)
         ayuda = tk.Menu(bm, tearoff=0)
 
         bm.add_cascade(label="Archivo", menu=archivo)
+        bm.add_cascade(label="Análisis", menu=analisis)
         bm.add_cascade(label="Ayuda", menu=ayuda)
 
         archivo.add_command(label="Nuevo", command=self.nuevo, accelerator="Ctrl+N")
+        if self.shared is not None:
+            archivo.add_command(label="Usar datos compartidos", command=self.usar_compartido)
         archivo.add_command(label="Guardar", command=self.guardar, accelerator="Ctrl+S")
         archivo.add_separator()
+        archivo.add_command(label="Abrir sesión", command=self.abrir_sesion)
+        archivo.add_command(label="Guardar sesión", command=self.guardar_sesion)
+        archivo.add_separator()
         archivo.add_command(label="Salir", command=self.salir, accelerator="Alt+F4")
 
+        analisis.add_command(label="Análisis multivariante...", command=self.analisis_multivariante)
+        analisis.add_command(label="Estadística univariante...", command=self.estadistica_univariante)
+        analisis.add_separator()
+        analisis.add_command(label="Informe de control de calidad...", command=self.informe_calidad)
+
+        ayuda.add_command(label="Rendimiento...", command=self.mostrar_rendimiento)
         ayuda.add_command(label="Acerca de...", command=self.acerca, accelerator="")
 
         self.raiz.bind("<Control-n>", self.nuevo)
@@ -148,6 +225,12 @@ class ScalingApp:
         else:
             self.ref_frame.pack_forget()
 
+        # Mostrar/ocultar exclusiones del área total
+        if self.norm_method.get() == "Área Total":
+            self.exclusion_frame.pack(pady=5, fill="x")
+        else:
+            self.exclusion_frame.pack_forget()
+
         # Mostrar/ocultar parámetro glog
         if self.transform_method.get() == "glog":
             self.glog_frame.pack(pady=5, fill="x")
@@ -161,11 +244,28 @@ class ScalingApp:
             self.file_path.set(filename)
             try:
                 # Cargar y validar los datos
-                self.ppm, self.data, self.sample_names = load_nmr_data(filename)
+                self.ppm, self.data, self.sample_names = handler.load_nmr_data(filename)
+                self.reset_preview()
+                if self.shared is not None:
+                    self.shared.publish(self.ppm, self.data, self.sample_names, origen=filename)
                 messagebox.showinfo("Éxito", "Datos cargados correctamente!")
             except Exception as e:
                 messagebox.showerror("Error", f"Error al cargar los datos:\n{str(e)}")
 
+    def usar_compartido(self, event=None):
+        """Toma el set de datos compartido por otra aplicación de la suite"""
+        if self.shared is None or self.shared.is_empty():
+            messagebox.showinfo("Información", "No hay datos compartidos disponibles")
+            return
+        self.ppm = self.shared.ppm
+        self.data = self.shared.data
+        self.sample_names = self.shared.sample_names
+        self.processed_data = None
+        self.qc_report = None
+        self.file_path.set(self.shared.origen or "(datos compartidos)")
+        self.reset_preview()
+        messagebox.showinfo("Éxito", "Datos compartidos cargados correctamente!")
+
     def process_data(self):
         """Procesa los datos según las opciones seleccionadas"""
         if not self.file_path.get():
@@ -190,80 +290,182 @@ class ScalingApp:
                     f"Se encontraron {nan_count} valores NaN en los datos. Se reemplazaron por 0."
                 )
 
-            # 2. Aplicar transformación
-            transform_method = self.transform_method.get()
-            if transform_method != "ninguna":
-                transform_kwargs = {}
-                if transform_method == "glog":
-                    transform_kwargs["lambda_val"] = self.glog_lambda.get()
-
-                processed_data = transform(processed_data, method=transform_method, **transform_kwargs)
-
-            # 3. Aplicar normalización
-            norm_method = self.norm_method.get()
-            if norm_method != "Ninguna":
-                norm_kwargs = {}
-                if norm_method == "Estándar Interno":
-                    norm_kwargs["ppm"] = self.ppm
-                    norm_kwargs["ppm_min"] = self.ref_ppm_min.get()
-                    norm_kwargs["ppm_max"] = self.ref_ppm_max.get()
-
-                # Para normalización por área total, escalar a 100
-                if norm_method == "Área Total":
-                    norm_kwargs["scale_to"] = 100.0
-
-                # Mapear nombres de métodos
-                method_map = {
-                    "Área Total": "total_area",
-                    "PQN": "pqn",
-                    "Vector Unitario": "vector",
-                    "Estándar Interno": "internal_standard"
-                }
-                processed_data = normalize(
-                    processed_data,
-                    method=method_map[norm_method],
-                    **norm_kwargs
-                )
-
-            # 4. Aplicar escalado
-            scale_method = self.scale_method.get()
-            if scale_method != "Ninguno":
-                # Mapear nombres de métodos
-                method_map = {
-                    "Autoescalado": "auto",
-                    "Pareto": "pareto",
-                    "Rango": "range"
-                }
-                scale_kwargs = {}
-                if scale_method == "Rango":
-                    scale_kwargs["feature_range"] = (0, 1)
-
-                processed_data = scale(
-                    processed_data,
-                    method=method_map[scale_method],
-                    **scale_kwargs
-                )
+            # 2-6. Aplicar línea base, transformación, control de calidad, normalización y escalado
+            informe = {}
+            processed_data = pipeline.run_pipeline(processed_data, self.ppm, self.get_stage_config(), informe)
 
             # Guardar los datos procesados
             self.processed_data = processed_data
-            messagebox.showinfo("Éxito", "Procesamiento completado correctamente!")
+            self.qc_report = informe.get("control_calidad")
+            self.processed_names = list(self.sample_names)
+            if self.qc_report is not None:
+                self.processed_names = [self.sample_names[i] for i in self.qc_report["conservadas"]]
+            if self.shared is not None:
+                self.shared.publish(self.ppm, self.processed_data, self.processed_names,
+                                    origen=f"sNMR: {self.file_path.get()}")
+
+            mensaje = "Procesamiento completado correctamente!"
+            if self.qc_report is not None:
+                n_atipicas = int(self.qc_report["atipicas"].sum())
+                accion = "excluidas" if self.qc_method.get() == "Excluir atípicas" else "marcadas"
+                mensaje += (f"\n\nControl de calidad: {n_atipicas} muestras atípicas {accion}"
+                            "\n(ver Análisis > Informe de control de calidad)")
+            messagebox.showinfo("Éxito", mensaje)
 
         except Exception as e:
             messagebox.showerror("Error", f"Error durante el procesamiento:\n{str(e)}")
 
+    def get_stage_config(self):
+        """Traduce los controles de la interfaz a la configuración de cada etapa"""
+        config = {}
+
+        baseline_method = self.baseline_method.get()
+        if baseline_method in ("ALS", "arPLS"):
+            params = {"lam": self.baseline_lam.get()}
+            if baseline_method == "ALS":
+                params["p"] = self.baseline_p.get()
+            config["linea_base"] = (baseline_method.lower(), params)
+
+        transform_method = self.transform_method.get()
+        if transform_method in ("log", "glog"):
+            params = {"lambda_val": self.glog_lambda.get()} if transform_method == "glog" else {}
+            config["transformacion"] = (transform_method, params)
+
+        qc_map = {"Marcar atípicas": "marcar", "Excluir atípicas": "excluir"}
+        qc_method = self.qc_method.get()
+        if qc_method in qc_map:
+            config["control_calidad"] = (qc_map[qc_method], {"n_components": self.qc_components.get(),
+                                                            "confidence": self.qc_confidence.get()})
+
+        norm_map = {
+            "Área Total": "total_area",
+            "PQN": "pqn",
+            "Vector Unitario": "vector",
+            "Estándar Interno": "internal_standard"
+        }
+        norm_method = self.norm_method.get()
+        if norm_method in norm_map:
+            params = {}
+            if norm_method == "Estándar Interno":
+                params = {"ppm_min": self.ref_ppm_min.get(), "ppm_max": self.ref_ppm_max.get()}
+            elif norm_method == "Área Total":
+                params = {"scale_to": 100.0,  # Para normalización por área total, escalar a 100
+                          "exclusiones": exclusions.parse_exclusions(self.area_exclusions.get())}
+            config["normalizacion"] = (norm_map[norm_method], params)
+
+        scale_map = {
+            "Autoescalado": "auto",
+            "Pareto": "pareto",
+            "Rango": "range"
+        }
+        scale_method = self.scale_method.get()
+        if scale_method in scale_map:
+            params = {"feature_range": (0, 1)} if scale_method == "Rango" else {}
+            config["escalado"] = (scale_map[scale_method], params)
+
+        return config
+
+    def create_preview_pane(self):
+        """Crea el panel de vista previa del procesamiento"""
+        self.preview_frame = ttk.LabelFrame(self.raiz, text="Vista previa")
+        self.preview_frame.pack(side="right", fill="both", expand=True, padx=10, pady=10)
+
+        self.preview_status = tk.StringVar(value="Cargue un set de datos para ver la vista previa")
+        ttk.Label(self.preview_frame, textvariable=self.preview_status).pack(side="bottom", anchor="w", padx=5)
+        self.preview_canvas = None
+
+    def reset_preview(self):
+        """Elige el subconjunto de la vista previa para los datos recién cargados"""
+        if self.data is None:
+            self.preview = None
+            return
+
+        sample_idx, point_idx = pipeline.select_preview_subset(self.data)
+        subset = np.nan_to_num(np.asarray(self.data)[np.ix_(sample_idx, point_idx)], nan=0.0)
+        self.preview_ppm = np.asarray(self.ppm)[point_idx]
+        self.preview_names = [self.sample_names[i] for i in sample_idx]
+        point_step = int(point_idx[1] - point_idx[0]) if len(point_idx) > 1 else 1
+        self.preview = pipeline.IncrementalPipeline(subset, self.preview_ppm, point_step)
+
+        if self.preview_canvas is None:
+            self.preview_fig = mfigure.Figure(figsize=(6, 4))
+            self.preview_ax = self.preview_fig.add_subplot()
+            self.preview_fig.subplots_adjust(left=0.08, right=0.99, top=0.98, bottom=0.08)
+            self.preview_canvas = backend_tkagg.FigureCanvasTkAgg(self.preview_fig, master=self.preview_frame)
+            self.preview_canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+
+        self.update_preview()
+
+    def schedule_preview(self, *args):
+        """Agrupa cambios rápidos de los controles en una sola actualización"""
+        if self.preview is None:
+            return
+        if self.preview_job is not None:
+            self.raiz.after_cancel(self.preview_job)
+        self.preview_job = self.raiz.after(150, self.update_preview)
+
+    def update_preview(self):
+        """Recalcula solo las etapas modificadas y redibuja la vista previa"""
+        self.preview_job = None
+        if self.preview is None:
+            return
+
+        try:
+            self.preview.configure_all(self.get_stage_config())
+            resultado = self.preview.run()
+        except (ValueError, tk.TclError) as e:
+            self.preview_status.set(f"Vista previa no disponible: {str(e)}")
+            return
+
+        nombres = self.preview_names
+        informe = self.preview.qc_report
+        if informe is not None:
+            nombres = [self.preview_names[i] for i in informe["conservadas"]]
+
+        ax = self.preview_ax
+        ax.clear()
+        for fila, nombre in zip(resultado, nombres):
+            ax.plot(self.preview_ppm, fila, linewidth=0.5, label=str(nombre))
+        if self.ppm_marcado is not None:
+            ax.axvline(self.ppm_marcado, color="red", linestyle="--", linewidth=0.8)
+        ax.invert_xaxis()
+        ax.grid(True, color="gray", linestyle=":", linewidth=0.5)
+        self.preview_canvas.draw_idle()
+
+        recalculadas = ", ".join(self.preview.last_recomputed) or "ninguna"
+        estado = f"{resultado.shape[0]} muestras x {resultado.shape[1]} puntos (etapas recalculadas: {recalculadas})"
+        if informe is not None:
+            estado += f", {int(informe['atipicas'].sum())} atípicas"
+        self.preview_status.set(estado)
+
     def nuevo(self, event=None):
         """Reinicia la aplicación a su estado inicial"""
         self.file_path.set("")
+        self.baseline_method.set("Ninguna")
+        self.baseline_lam.set(1e5)
+        self.baseline_p.set(0.01)
         self.transform_method.set("ninguna")
+        self.qc_method.set("Ninguno")
+        self.qc_components.set(2)
+        self.qc_confidence.set(0.99)
         self.norm_method.set("ninguna")
         self.scale_method.set("ninguna")
         self.ref_ppm_min.set(0.0)
         self.ref_ppm_max.set(0.0)
+        self.area_exclusions.set("")
         self.glog_lambda.set(1.0)
         self.ppm = None
         self.data = None
         self.processed_data = None
         self.sample_names = None
+        self.processed_names = None
+        self.qc_report = None
+        self.ppm_marcado = None
+        self.reset_preview()
+        if self.preview_canvas is not None:
+            self.preview_ax.clear()
+            self.preview_canvas.draw_idle()
+        self.preview_status.set("Cargue un set de datos para ver la vista previa")
         self.toggle_norm_params()  # Actualizar la UI
         messagebox.showinfo("Nuevo", "Configuración reiniciada. Puede cargar un nuevo archivo.")
 
@@ -281,16 +483,147 @@ class ScalingApp:
 
         if filename:
             try:
-                save_processed_data(
+                handler.save_processed_data(
                     filename,
                     self.ppm,
                     self.processed_data,
-                    self.sample_names
+                    self.processed_names
                 )
                 messagebox.showinfo("Éxito", f"Datos guardados en:\n{filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Error al guardar los datos:\n{str(e)}")
 
+    def get_pipeline_params(self):
+        """Devuelve los parámetros de procesamiento seleccionados"""
+        params = {
+            "linea_base": self.baseline_method.get(),
+            "transformacion": self.transform_method.get(),
+            "control_calidad": self.qc_method.get(),
+            "normalizacion": self.norm_method.get(),
+            "escalado": self.scale_method.get(),
+        }
+        if params["linea_base"] in ("ALS", "arPLS"):
+            params["linea_base_lam"] = self.baseline_lam.get()
+            if params["linea_base"] == "ALS":
+                params["linea_base_p"] = self.baseline_p.get()
+        if params["transformacion"] == "glog":
+            params["glog_lambda"] = self.glog_lambda.get()
+        if self.qc_report is not None:
+            params["control_calidad_componentes"] = self.qc_components.get()
+            params["control_calidad_confianza"] = self.qc_confidence.get()
+            params["muestras_atipicas"] = [self.sample_names[i] for i in self.qc_report["atipicas"].nonzero()[0]]
+        if params["normalizacion"] == "Estándar Interno":
+            params["ref_ppm"] = [self.ref_ppm_min.get(), self.ref_ppm_max.get()]
+        if params["normalizacion"] == "Área Total" and self.area_exclusions.get().strip():
+            params["exclusiones"] = self.area_exclusions.get().strip()
+        return params
+
+    def abrir_sesion(self, event=None):
+        """Abre una sesión .isq y usa su matriz como datos de entrada"""
+        filename = filedialog.askopenfilename(
+            title="Abrir sesión",
+            filetypes=[("Sesión ISQ", "*" + session_io.SESSION_EXTENSION)]
+        )
+        if not filename:
+            return
+        try:
+            sesion = session_io.load_session(filename)
+            self.ppm, self.data, self.sample_names = sesion.ppm, sesion.data, sesion.sample_names
+            self.processed_data = None
+            self.qc_report = None
+            self.file_path.set(filename)
+            self.reset_preview()
+            if self.shared is not None:
+                self.shared.publish(self.ppm, self.data, self.sample_names, origen=filename)
+
+            mensaje = "Sesión cargada correctamente!"
+            if sesion.pipeline:
+                aplicado = ", ".join(f"{k}: {v}" for k, v in sesion.pipeline.items())
+                mensaje += f"\n\nProcesamiento ya aplicado:\n{aplicado}"
+            messagebox.showinfo("Éxito", mensaje)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al abrir la sesión:\n{str(e)}")
+
+    def guardar_sesion(self, event=None):
+        """Guarda los datos procesados (o los originales) en una sesión .isq"""
+        data = self.processed_data if self.processed_data is not None else self.data
+        if data is None:
+            messagebox.showerror("Error", "No hay datos para guardar.")
+            return
+
+        filename = filedialog.asksaveasfilename(
+            defaultextension=session_io.SESSION_EXTENSION,
+            filetypes=[("Sesión ISQ", "*" + session_io.SESSION_EXTENSION)],
+            title="Guardar sesión"
+        )
+        if filename:
+            try:
+                # Si se sobrescribe la sesión abierta, dejar de usar sus mapas en memoria
+                self.ppm = session_io.in_memory(self.ppm, filename)
+                self.data = session_io.in_memory(self.data, filename)
+                self.processed_data = session_io.in_memory(self.processed_data, filename)
+                data = self.processed_data if self.processed_data is not None else self.data
+                if self.shared is not None:
+                    self.shared.release_file(filename)
+                sesion = session_io.NMRSession(
+                    ppm=self.ppm,
+                    data=data,
+                    sample_names=self.processed_names if self.processed_data is not None else self.sample_names,
+                    pipeline=self.get_pipeline_params() if self.processed_data is not None else None,
+                    origen=self.file_path.get()
+                )
+                session_io.save_session(filename, sesion)
+                messagebox.showinfo("Éxito", f"Sesión guardada en:\n{filename}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar la sesión:\n{str(e)}")
+
+    def get_analysis_data(self):
+        """
+        Datos procesados (o los originales) listos para el análisis y sus nombres de
+        muestra, o (None, None) si no hay datos
+        """
+        if self.processed_data is not None:
+            data, nombres = self.processed_data, self.processed_names
+        else:
+            data, nombres = self.data, self.sample_names
+        if data is None:
+            messagebox.showerror("Error", "No hay datos cargados para analizar.")
+            return None, None
+        return np.nan_to_num(np.asarray(data), nan=0.0), nombres
+
+    def analisis_multivariante(self, event=None):
+        """Abre el análisis multivariante sobre los datos procesados (o los originales)"""
+        data, nombres = self.get_analysis_data()
+        if data is not None:
+            mv_window.MultivariateWindow(self.raiz, self.ppm, data, nombres,
+                                         on_select_ppm=self.marcar_ppm,
+                                         icon_path=self.get_resource_path("icons", "sNMR.ico"))
+
+    def estadistica_univariante(self, event=None):
+        """Abre las pruebas univariantes por punto sobre los datos procesados (o los originales)"""
+        data, nombres = self.get_analysis_data()
+        if data is not None:
+            uv_window.UnivariateWindow(self.raiz, self.ppm, data, nombres,
+                                       on_select_ppm=self.marcar_ppm,
+                                       icon_path=self.get_resource_path("icons", "sNMR.ico"))
+
+    def informe_calidad(self, event=None):
+        """Muestra T², DModX y las muestras atípicas del último procesamiento"""
+        if self.qc_report is None:
+            messagebox.showinfo("Información", "Procese los datos con el control de calidad activado.")
+            return
+        qc_window.QCReportWindow(self.raiz, self.qc_report, self.sample_names,
+                                 self.get_resource_path("icons", "sNMR.ico"))
+
+    def marcar_ppm(self, ppm):
+        """Marca en la vista previa el ppm seleccionado en los loadings"""
+        self.ppm_marcado = ppm
+        self.update_preview()
+
+    def mostrar_rendimiento(self, event=None):
+        """Muestra el resumen de tiempos y memoria por etapa"""
+        PerformancePanel(self.raiz, self.get_resource_path("icons", "sNMR.ico"))
+
     def acerca(self):
         """Muestra información acerca de la aplicación"""
         messagebox.showinfo("Acerca de",
@@ -301,8 +634,9 @@ class ScalingApp:
 
     def salir(self, event=None):
         """Cierra la aplicación"""
-        if messagebox.askokcancel("Salir", "¿Está seguro que desea salir?"):
-            self.raiz.quit()
+        if messagebox.askokcancel("Salir", "¿Está seguro que desea salir?", parent=self.raiz):
+            if not self.hosted:
+                self.raiz.quit()
             self.raiz.destroy()
 
     def on_close(self, event=None):
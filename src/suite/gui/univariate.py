@@ -0,0 +1,203 @@
+from tkinter import ttk, messagebox, filedialog
+import tkinter as tk
+from src.suite.core.lazy import lazy_import
+
+handler = lazy_import("src.suite.core.handler")
+univariate = lazy_import("src.suite.core.univariate")
+np = lazy_import("numpy")
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg")
+mfigure = lazy_import("matplotlib.figure")
+
+TESTS = {"t de Welch": ("p_t", "q_t"), "Mann-Whitney": ("p_u", "q_u")}
+
+
+class UnivariateWindow(tk.Toplevel):
+    """
+    Ventana de estadística univariante entre dos grupos: gráfico volcán, espectro promedio
+    con los puntos significativos resaltados y tabla de resultados exportable. Al hacer
+    clic sobre un punto del volcán se llama a on_select_ppm con su ppm.
+    """
+
+    def __init__(self, parent, ppm, data, sample_names, on_select_ppm=None, icon_path=None):
+        super().__init__(parent)
+        self.title("Estadística univariante")
+        self.geometry("1000x700")
+        if icon_path:
+            self.iconbitmap(str(icon_path))
+
+        self.ppm = np.asarray(ppm, dtype=float)
+        self.data = data
+        self.sample_names = sample_names
+        self.on_select_ppm = on_select_ppm
+        self.grupos = None
+        self.resultado = None
+        self.tabla = None
+
+        self.prueba = tk.StringVar(value="t de Welch")
+        self.alfa = tk.DoubleVar(value=0.05)
+        self.min_fc = tk.DoubleVar(value=1.0)
+        self.archivo_grupos = tk.StringVar(value="(sin grupos)")
+        self.resumen = tk.StringVar(value="Cargue los grupos y pulse Calcular")
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        top = ttk.Frame(self)
+        top.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Button(top, text="Grupos...", command=self.cargar_grupos).pack(side=tk.LEFT)
+        ttk.Label(top, textvariable=self.archivo_grupos).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(top, text="Prueba:").pack(side=tk.LEFT)
+        combo = ttk.Combobox(top, textvariable=self.prueba, values=list(TESTS), state="readonly", width=13)
+        combo.pack(side=tk.LEFT, padx=(0, 10))
+        combo.bind("<<ComboboxSelected>>", lambda e: self.plot())
+        ttk.Label(top, text="FDR (q) <").pack(side=tk.LEFT)
+        ttk.Entry(top, textvariable=self.alfa, width=6).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(top, text="|log2 FC| ≥").pack(side=tk.LEFT)
+        ttk.Entry(top, textvariable=self.min_fc, width=5).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(top, text="Exportar tabla...", command=self.exportar).pack(side=tk.RIGHT)
+        ttk.Button(top, text="Calcular", command=self.calcular).pack(side=tk.RIGHT, padx=5)
+
+        ttk.Label(self, textvariable=self.resumen).pack(side=tk.BOTTOM, anchor="w", padx=5, pady=(0, 5))
+
+        # Tabla de puntos significativos
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+        columnas = ("ppm", "log2fc", "p", "q")
+        self.tree = ttk.Treeview(tree_frame, columns=columnas, show="headings", height=6)
+        for col, text in zip(columnas, ("ppm", "log2 FC", "p", "q")):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=120, anchor="center")
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select_row)
+
+        self.fig = mfigure.Figure(figsize=(10, 5))
+        self.ax_volcan = self.fig.add_subplot(1, 2, 1)
+        self.ax_espectro = self.fig.add_subplot(1, 2, 2)
+        self.fig.subplots_adjust(left=0.07, right=0.98, top=0.93, bottom=0.1, wspace=0.25)
+        self.canvas = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5)
+        self.canvas.mpl_connect("pick_event", self.on_pick)
+
+    def cargar_grupos(self):
+        """Lee el grupo de cada muestra desde un CSV (muestra, grupo)"""
+        filename = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")], parent=self)
+        if not filename:
+            return
+        try:
+            self.grupos = handler.load_groups(filename, self.sample_names)
+            self.archivo_grupos.set(" vs ".join(sorted(set(self.grupos))))
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al cargar los grupos:\n{str(e)}", parent=self)
+
+    def calcular(self):
+        if self.grupos is None:
+            messagebox.showinfo("Información", "Cargue primero el archivo de grupos", parent=self)
+            return
+        try:
+            self.config(cursor="watch")
+            self.update_idletasks()
+            self.resultado = univariate.univariate_tests(self.data, self.grupos)
+            self.tabla = univariate.results_table(self.ppm, self.resultado)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error en el análisis:\n{str(e)}", parent=self)
+            return
+        finally:
+            self.config(cursor="")
+        self.plot()
+
+    def significant(self):
+        """Máscara de puntos significativos según la prueba, el FDR y el fold change elegidos"""
+        _, clave_q = TESTS[self.prueba.get()]
+        q = self.resultado[clave_q]
+        fc = self.resultado["log2fc"]
+        mask = q < self.alfa.get()
+        if self.min_fc.get() > 0:
+            mask &= np.abs(fc) >= self.min_fc.get()  # Los NaN de fold change no pasan el filtro
+        return mask
+
+    def plot(self):
+        if self.resultado is None:
+            return
+        try:
+            mask = self.significant()
+        except tk.TclError:
+            messagebox.showerror("Error", "Ingrese valores numéricos", parent=self)
+            return
+
+        clave_p, clave_q = TESTS[self.prueba.get()]
+        p = self.resultado[clave_p]
+        fc = self.resultado["log2fc"]
+        ref, comp = self.resultado["clases"]
+        with np.errstate(divide="ignore"):
+            log_p = -np.log10(p)
+
+        ax = self.ax_volcan
+        ax.clear()
+        ax.scatter(fc[~mask], log_p[~mask], s=4, color="gray", picker=3)
+        ax.scatter(fc[mask], log_p[mask], s=8, c=np.sign(fc[mask]), cmap="coolwarm", vmin=-1, vmax=1, picker=3)
+        ax.axvline(0, color="gray", linewidth=0.5)
+        ax.set_xlabel(f"log2 FC ({comp} / {ref})")
+        ax.set_ylabel("-log10 p")
+        ax.set_title(f"Volcán ({self.prueba.get()})")
+        self._indices_volcan = [np.flatnonzero(~mask), np.flatnonzero(mask)]
+
+        # Espectro promedio con los puntos significativos resaltados
+        media = np.asarray(self.data).mean(axis=0)
+        ax = self.ax_espectro
+        ax.clear()
+        ax.plot(self.ppm, media, linewidth=0.5, color="black")
+        ax.scatter(self.ppm[mask], media[mask], s=6, c=np.sign(fc[mask]), cmap="coolwarm", vmin=-1, vmax=1, zorder=3)
+        ax.invert_xaxis()
+        ax.set_xlabel("ppm")
+        ax.set_title("Puntos significativos")
+        ax.grid(True, color="gray", linestyle=":", linewidth=0.5)
+        self.canvas.draw_idle()
+
+        # Tabla, ordenada por q
+        self.tree.delete(*self.tree.get_children())
+        q = self.resultado[clave_q]
+        for i in np.flatnonzero(mask)[np.argsort(q[mask])]:
+            self.tree.insert("", "end", iid=str(i), values=(
+                f"{self.ppm[i]:.4f}", f"{fc[i]:.3f}", f"{p[i]:.3g}", f"{q[i]:.3g}"))
+        self.resumen.set(f"{int(mask.sum())} de {len(mask)} puntos significativos")
+
+    def select_point(self, i):
+        ppm = float(self.ppm[i])
+        fc = self.resultado["log2fc"][i]
+        self.resumen.set(f"ppm {ppm:.4f}: log2 FC = {fc:.3f}")
+        if self.on_select_ppm is not None:
+            self.on_select_ppm(ppm)
+
+    def on_pick(self, event):
+        """Clic sobre un punto del volcán: lo marca en el espectro de la aplicación principal"""
+        colecciones = self.ax_volcan.collections
+        if event.artist not in colecciones[:2] or len(event.ind) == 0:
+            return
+        indices = self._indices_volcan[colecciones.index(event.artist)]
+        self.select_point(int(indices[event.ind[0]]))
+
+    def on_select_row(self, event=None):
+        seleccion = self.tree.selection()
+        if seleccion:
+            self.select_point(int(seleccion[0]))
+
+    def exportar(self):
+        if self.tabla is None:
+            messagebox.showinfo("Información", "No hay resultados para exportar", parent=self)
+            return
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            title="Exportar resultados",
+            parent=self
+        )
+        if filename:
+            try:
+                self.tabla.to_csv(filename, index=False)
+                messagebox.showinfo("Éxito", f"Resultados guardados en:\n{filename}", parent=self)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar los resultados:\n{str(e)}", parent=self)
@@ -1,10 +1,32 @@
 import os
 import sys
-import subprocess
+import threading
+import importlib
 import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 from pathlib import Path
+from src.suite.core.shared import SharedDataset
+
+# Módulos pesados que se precargan en segundo plano para que abrir una aplicación sea
+# inmediato. Solo módulos sin Tk: tkinter no admite otros hilos.
+PRELOAD_MODULES = [
+    "numpy",
+    "pandas",
+    "scipy.optimize",
+    "matplotlib.figure",
+    "src.suite.core.processor",
+]
+
+# Módulos que usan Tk: se importan en el hilo principal, uno por vez, cuando la
+# interfaz está libre
+PRELOAD_GUI_MODULES = [
+    "matplotlib.backends.backend_tkagg",
+    "tksheet",
+    "src.suite.gui.i_app",
+    "src.suite.gui.s_app",
+    "src.suite.gui.q_app",
+]
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta a los recursos en cualquier entorno"""
@@ -56,8 +78,48 @@ class SuiteApp:
             print(f"Ícono de ventana no encontrado: {icon_path}")
         
         self.app_icons = []  # Para mantener referencias a imágenes
+        self.shared = SharedDataset()  # Set de datos compartido entre las aplicaciones
+        self.open_apps = []  # Ventanas alojadas en este proceso
         self.create_widgets()
         self.center_window()
+
+        # Precargar módulos pesados una vez que la ventana ya es visible
+        self.root.after(100, self.preload_modules)
+
+    def preload_modules(self):
+        """
+        Importa los módulos pesados sin Tk en un hilo para no bloquear la interfaz; al
+        terminar, los módulos de interfaz se importan en el hilo principal.
+        """
+        def _preload():
+            for module_name in PRELOAD_MODULES:
+                try:
+                    importlib.import_module(module_name)
+                except Exception as e:
+                    print(f"No se pudo precargar {module_name}: {str(e)}")
+
+        hilo = threading.Thread(target=_preload, daemon=True)
+        hilo.start()
+        self.root.after(100, self.wait_preload, hilo)
+
+    def wait_preload(self, hilo):
+        """Espera (desde el hilo principal) a que termine la precarga sin Tk"""
+        if hilo.is_alive():
+            self.root.after(100, self.wait_preload, hilo)
+        else:
+            self.preload_gui_modules()
+
+    def preload_gui_modules(self, pendientes=None):
+        """Importa un módulo de interfaz por vez en el hilo principal, cuando no hay eventos pendientes"""
+        pendientes = list(PRELOAD_GUI_MODULES) if pendientes is None else pendientes
+        if not pendientes:
+            return
+        module_name = pendientes.pop(0)
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"No se pudo precargar {module_name}: {str(e)}")
+        self.root.after_idle(lambda: self.root.after(10, self.preload_gui_modules, pendientes))
     
     def center_window(self):
         """Centra la ventana en la pantalla"""
@@ -143,40 +205,34 @@ class SuiteApp:
         )
         app_btn.pack(pady=(0, 10))
 
+    def get_app_class(self, app_name):
+        """Devuelve la clase de la aplicación solicitada"""
+        if app_name == "iNMR":
+            from src.suite.gui.i_app import MainApp
+            return MainApp
+        elif app_name == "sNMR":
+            from src.suite.gui.s_app import ScalingApp
+            return ScalingApp
+        elif app_name == "qNMR":
+            from src.suite.gui.q_app import QuantifyApp
+            return QuantifyApp
+        raise ValueError(f"Aplicación no reconocida: {app_name}")
+
     def launch_app(self, app_name):
-        """Inicia la aplicación seleccionada"""
+        """Abre la aplicación seleccionada como ventana de este mismo proceso"""
         try:
-            # Determinar rutas según el entorno
-            if getattr(sys, 'frozen', False):
-                # Modo empaquetado
-                base_dir = Path(sys.executable).parent
-                app_path = base_dir / app_name / f"{app_name}.exe"
-                
-                # Fallback: Buscar en dist/
-                if not app_path.exists():
-                    app_path = base_dir / "dist" / app_name / f"{app_name}.exe"
-            else:
-                # Modo desarrollo
-                base_dir = Path(__file__).resolve().parent.parent.parent
-                app_path = base_dir / "dist" / app_name / app_name
-                if sys.platform == "win32":
-                    app_path = app_path.with_suffix(".exe")
-            
-            # Verificar existencia y ejecutar
-            if app_path.exists():
-                # Configurar entorno para las dependencias
-                env = os.environ.copy()
-                env["PYTHONPATH"] = str(base_dir) + os.pathsep + env.get("PYTHONPATH", "")
-                
-                subprocess.Popen([str(app_path)], env=env)
-            else:
-                messagebox.showerror(
-                    "Error", 
-                    f"Ejecutable no encontrado:\n{app_path}"
-                )
+            app_class = self.get_app_class(app_name)
+            app = app_class(master=self.root, shared=self.shared)
+            self.open_apps.append(app)
+            app.raiz.bind("<Destroy>", lambda e, a=app: self.on_app_closed(e, a), add="+")
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo iniciar la aplicación:\n{str(e)}")
 
+    def on_app_closed(self, event, app):
+        """Olvida la referencia a una aplicación cuando se cierra su ventana"""
+        if event.widget is app.raiz and app in self.open_apps:
+            self.open_apps.remove(app)
+
 def run():
     """Función principal para iniciar la aplicación"""
     root = tk.Tk()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from src.suite.core.cache import IntegralCache, cached_integrals, dataset_hash
+
+
+@pytest.fixture
+def cache(tmp_path):
+    store = IntegralCache(str(tmp_path / "integrales.sqlite"))
+    yield store
+    store.close()
+
+
+def test_aciertos_y_fallos(cache):
+    valores = np.arange(6, dtype=float).reshape(3, 2)
+    assert cache.get_many("a", [(0, 5), (6, 9)]) == {}
+    cache.put_many("a", [(0, 5), (6, 9)], valores)
+
+    encontradas = cache.get_many("a", [(0, 5), (6, 9), (10, 12)])
+
+    np.testing.assert_array_equal(encontradas[(0, 5)], valores[:, 0])
+    np.testing.assert_array_equal(encontradas[(6, 9)], valores[:, 1])
+    stats = cache.stats()
+    assert (stats["aciertos"], stats["fallos"], stats["entradas"]) == (2, 3, 2)
+    assert stats["tasa_aciertos"] == pytest.approx(0.4)
+
+
+def test_la_clave_incluye_dataset_y_modo(cache):
+    cache.put_many("a", [(0, 5)], np.ones((2, 1)), mode="suma")
+
+    assert cache.get_many("b", [(0, 5)], mode="suma") == {}
+    assert cache.get_many("a", [(0, 5)], mode="simpson") == {}
+    assert (0, 5) in cache.get_many("a", [(0, 5)], mode="suma")
+
+
+def test_descarta_las_menos_usadas(tmp_path):
+    # Cada entrada ocupa 2 muestras x 8 bytes: caben tres
+    store = IntegralCache(str(tmp_path / "lru.sqlite"), max_bytes=48)
+    try:
+        for i in range(3):
+            store.put_many("a", [(i, i + 1)], np.full((2, 1), float(i)))
+        store.get_many("a", [(0, 1)])  # (0, 1) pasa a ser la más reciente
+        store.put_many("a", [(3, 4)], np.full((2, 1), 3.0))
+
+        presentes = store.get_many("a", [(0, 1), (1, 2), (2, 3), (3, 4)])
+
+        assert set(presentes) == {(0, 1), (2, 3), (3, 4)}
+        assert store.stats()["bytes"] <= 48
+    finally:
+        store.close()
+
+
+def test_cached_integrals_calcula_solo_las_faltantes(cache):
+    Y = np.random.default_rng(0).random((3, 50))
+    huella = dataset_hash(np.arange(50.0), Y)
+    pedidas = []
+
+    def calcular(regiones):
+        pedidas.append(list(regiones))
+        return np.column_stack([Y[:, a:b + 1].sum(axis=1) for a, b in regiones])
+
+    primera = cached_integrals(cache, huella, [(0, 9), (10, 19)], calcular)
+    segunda = cached_integrals(cache, huella, [(10, 19), (20, 29), (0, 9)], calcular)
+
+    assert pedidas == [[(0, 9), (10, 19)], [(20, 29)]]
+    np.testing.assert_allclose(segunda[:, [2, 0]], primera)
+    np.testing.assert_allclose(segunda[:, 1], Y[:, 20:30].sum(axis=1))
+
+
+def test_la_huella_cambia_con_los_datos():
+    ppm = np.linspace(10, 0, 100)
+    Y = np.ones((2, 100))
+    otra = Y.copy()
+    otra[1, 50] += 1e-9
+
+    assert dataset_hash(ppm, Y) == dataset_hash(ppm, Y.copy())
+    assert dataset_hash(ppm, Y) != dataset_hash(ppm, otra)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from src.suite.core.integration import IntegralIndex, RULES, region_integrals
+
+
+def _eje_no_uniforme(n=801, inicio=10.0, fin=0.0, seed=0):
+    """Eje ppm descendente con espaciado irregular, como tras un alineamiento"""
+    rng = np.random.default_rng(seed)
+    pasos = 1.0 + 0.3 * rng.uniform(-1, 1, n - 1)
+    x = np.concatenate([[0.0], np.cumsum(pasos)])
+    return inicio + (fin - inicio) * x / x[-1]
+
+
+def _area_analitica(a, b):
+    """Integral de sin(x) + x³/100 + exp(-x) entre a y b (a < b)"""
+    primitiva = lambda t: -np.cos(t) + t ** 4 / 400 - np.exp(-t)
+    return primitiva(b) - primitiva(a)
+
+
+@pytest.mark.parametrize("regla, tolerancia", [("trapezoidal", 5e-3), ("simpson", 1e-6)])
+def test_reglas_contra_area_analitica(regla, tolerancia):
+    x = _eje_no_uniforme()
+    Y = np.vstack([np.sin(x) + x ** 3 / 100 + np.exp(-x), 2 * (np.sin(x) + x ** 3 / 100 + np.exp(-x))])
+    regiones = [(0, len(x) - 1), (100, 400), (401, 650)]
+
+    obtenidas = IntegralIndex(Y, x, regla).integrate(regiones)
+
+    for j, (x1, x2) in enumerate(regiones):
+        esperada = _area_analitica(x[x2], x[x1])
+        assert obtenidas[0, j] == pytest.approx(esperada, rel=tolerancia)
+        assert obtenidas[1, j] == pytest.approx(2 * esperada, rel=tolerancia)
+
+
+def test_simpson_exacto_para_cubicas():
+    x = np.linspace(5.0, -1.0, 201)
+    Y = (x ** 3 - 2 * x + 1)[None, :]
+    primitiva = lambda t: t ** 4 / 4 - t ** 2 + t
+
+    obtenida = IntegralIndex(Y, x, "simpson").integrate([(0, 200), (20, 141)])
+
+    assert obtenida[0, 0] == pytest.approx(primitiva(5.0) - primitiva(-1.0), rel=1e-12)
+    assert obtenida[0, 1] == pytest.approx(primitiva(x[20]) - primitiva(x[141]), rel=1e-12)
+
+
+def test_suma_es_la_suma_de_puntos():
+    rng = np.random.default_rng(1)
+    Y = rng.normal(size=(4, 300))
+
+    obtenidas = IntegralIndex(Y).integrate([(0, 299), (10, 10), (50, 120)])
+
+    np.testing.assert_allclose(obtenidas[:, 0], Y.sum(axis=1))
+    np.testing.assert_allclose(obtenidas[:, 1], Y[:, 10])
+    np.testing.assert_allclose(obtenidas[:, 2], Y[:, 50:121].sum(axis=1))
+
+
+@pytest.mark.parametrize("regla", RULES)
+def test_region_integrals_coincide_con_el_indice(regla):
+    x = _eje_no_uniforme(n=500)
+    Y = np.random.default_rng(2).random((3, 500))
+    regiones = [(0, 499), (0, 3), (37, 210), (495, 499), (250, 251)]
+
+    np.testing.assert_allclose(
+        region_integrals(Y, regiones, x, regla),
+        IntegralIndex(Y, x, regla).integrate(regiones),
+        rtol=1e-10, atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("regla", ["trapezoidal", "simpson"])
+def test_reglas_requieren_eje(regla):
+    with pytest.raises(ValueError):
+        IntegralIndex(np.ones((2, 10)), None, regla)
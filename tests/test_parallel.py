@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.suite.core.integration import IntegralIndex, SharedIntegrator, integrate_regions, make_integrator
+
+
+@pytest.fixture(scope="module")
+def datos():
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(-0.5, 10.0, 2000))[::-1].copy()
+    Y = rng.normal(size=(12, 2000)).cumsum(axis=1)
+    return x, Y
+
+
+def _regiones(n_points, n=40, seed=1):
+    rng = np.random.default_rng(seed)
+    bordes = rng.integers(0, n_points, size=(n, 2))
+    # Regiones de un solo punto, en los extremos y con los bordes invertidos
+    return [tuple(b) for b in bordes] + [(0, 0), (n_points - 1, n_points - 1), (n_points - 1, 0)]
+
+
+@pytest.mark.parametrize("regla", ["suma", "trapezoidal", "simpson"])
+def test_paralelo_igual_a_serie(datos, regla):
+    x, Y = datos
+    regiones = _regiones(Y.shape[1])
+
+    with SharedIntegrator(Y, 2, x, regla) as integrador:
+        paralelo = integrador.integrate(regiones)
+        # El pool se reutiliza entre llamadas
+        repetido = integrador.integrate(regiones[::-1])
+
+    serie = IntegralIndex(Y, x, regla).integrate(regiones)
+    np.testing.assert_allclose(paralelo, serie, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(repetido, serie[:, ::-1], rtol=1e-9, atol=1e-9)
+
+
+def test_integrate_regions_en_paralelo(datos):
+    x, Y = datos
+    regiones = _regiones(Y.shape[1], seed=2)
+
+    np.testing.assert_allclose(
+        integrate_regions(Y, regiones, n_jobs=2, x=x, rule="simpson"),
+        IntegralIndex(Y, x, "simpson").integrate(regiones),
+        rtol=1e-9, atol=1e-9,
+    )
+
+
+def test_matrices_pequeñas_usan_el_indice(datos):
+    x, Y = datos
+
+    assert isinstance(make_integrator(Y, n_jobs=4, x=x, rule="trapezoidal"), IntegralIndex)
+    assert isinstance(make_integrator(Y, n_jobs=1, min_size=0), IntegralIndex)
+
+
+def test_region_fuera_de_rango(datos):
+    _, Y = datos
+
+    with SharedIntegrator(Y, 2) as integrador:
+        with pytest.raises(ValueError):
+            integrador.integrate([(0, Y.shape[1])])